@@ -0,0 +1,6 @@
+"""Benchmarks of exactcover on standard exact cover instances.
+
+Run ``python -m benchmarks`` from the root of the repository to time every instance in every mode
+of `solve`, and ``python -m benchmarks --help`` for the options that save a baseline and compare
+against it.
+"""
@@ -0,0 +1,69 @@
+"""Command line interface of the benchmarks: ``python -m benchmarks``."""
+
+
+import argparse
+import sys
+
+from . import runner
+
+
+def main(argv=None):
+    """Run the benchmarks, print their measurements and compare them with a baseline.
+
+    Returns:
+        int: The exit status, `1` when a regression was found and `0` otherwise.
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Time exactcover.solve on standard instances.')
+    names = list(runner.BENCHMARKS) + list(runner.SLOW_BENCHMARKS)
+    parser.add_argument('names', nargs='*', metavar='benchmark',
+                        help=f'the benchmarks to run, among {", ".join(names)} '
+                             '(default: all but the slow ones)')
+    parser.add_argument('--all', action='store_true', help='also run the slow benchmarks')
+    parser.add_argument('--mode', action='append', choices=list(runner.MODES), dest='modes',
+                        help='a mode of solve to run, which may be repeated (default: all)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='the number of timed runs, of which the best is kept (default: 3)')
+    parser.add_argument('--engine', choices=['dict', 'dlx', 'bitset'],
+                        help='the search engine (default: that of solve)')
+    parser.add_argument('--save', metavar='PATH', help='save the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH',
+                        help='compare the results with a JSON baseline and flag regressions')
+    parser.add_argument('--tolerance', type=float, default=runner.TOLERANCE,
+                        help='the relative increase flagged as a regression '
+                             f'(default: {runner.TOLERANCE})')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in names]
+    if unknown:
+        parser.error(f'unknown benchmarks: {", ".join(unknown)}')
+    if args.names:
+        selected = args.names
+    elif args.all:
+        selected = names
+    else:
+        selected = None
+    baseline = None if args.compare is None else runner.load(args.compare)
+
+    print(f'{"benchmark":24} {"mode":10} {"time":>12} {"nodes":>10} {"peak memory":>12} '
+          f'{"solutions":>10}')
+
+    def report(name, mode, measured):
+        print(f'{name:24} {mode:10} {measured["time"] * 1000:9.1f} ms {measured["nodes"]:10} '
+              f'{measured["peak_memory"] / 1024:8.0f} KiB {measured["solutions"]:10}',
+              flush=True)
+
+    results = runner.run(selected, args.modes, args.repeat, args.engine, report)
+    if args.save is not None:
+        runner.save(args.save, results)
+    if baseline is None:
+        return 0
+    regressions = runner.compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if not regressions:
+        print(f'No regressions against {args.compare}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Generators of standard exact cover instances.
+
+Each generator returns the universe, the subsets and a dict of other `solve` options, such as the
+preseed of a sudoku or the secondary elements of the N-queens problem.
+"""
+
+
+import random
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+Instance = Tuple[List[Hashable], Dict[Hashable, Set[Hashable]], Dict[str, Any]]
+
+#: A sudoku with 36 givens that is solved without backtracking.
+EASY_SUDOKU = '..3.2.6..9..3.5..1..18.64....81.29..7.......8..67.82....26.95..8..2.3..9..5.1.3..'
+#: A sudoku with 17 givens that needs a deep search.
+HARD_SUDOKU = '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......'
+
+#: The cells of each pentomino in one orientation.
+PENTOMINOES = {
+    'F': ((0, 1), (0, 2), (1, 0), (1, 1), (2, 1)),
+    'I': ((0, 0), (1, 0), (2, 0), (3, 0), (4, 0)),
+    'L': ((0, 0), (1, 0), (2, 0), (3, 0), (3, 1)),
+    'N': ((0, 1), (1, 1), (2, 0), (2, 1), (3, 0)),
+    'P': ((0, 0), (0, 1), (1, 0), (1, 1), (2, 0)),
+    'T': ((0, 0), (0, 1), (0, 2), (1, 1), (2, 1)),
+    'U': ((0, 0), (0, 2), (1, 0), (1, 1), (1, 2)),
+    'V': ((0, 0), (1, 0), (2, 0), (2, 1), (2, 2)),
+    'W': ((0, 0), (1, 0), (1, 1), (2, 1), (2, 2)),
+    'X': ((0, 1), (1, 0), (1, 1), (1, 2), (2, 1)),
+    'Y': ((0, 1), (1, 0), (1, 1), (2, 1), (3, 1)),
+    'Z': ((0, 0), (0, 1), (1, 1), (2, 1), (2, 2)),
+}
+
+
+def sudoku(grid: str) -> Instance:
+    """Return the sudoku `grid`, given row by row with `.` for empty cells, as an instance.
+
+    Each subset places a digit in a cell, and covers the cell and the digit in its row, column and
+    box. The givens are the preseed.
+    """
+    subsets = {}
+    for r in range(9):
+        for c in range(9):
+            b = (r // 3) * 3 + c // 3
+            for d in range(1, 10):
+                subsets[(r, c, d)] = {('cell', r, c), ('row', r, d), ('col', c, d),
+                                      ('box', b, d)}
+    universe = [(kind, i, j) for kind in ('cell', 'row', 'col', 'box') for i in range(9)
+                for j in (range(9) if kind == 'cell' else range(1, 10))]
+    preseed = {(i // 9, i % 9, int(ch)) for i, ch in enumerate(grid) if ch != '.'}
+    return universe, subsets, {'preseed': preseed}
+
+
+def queens(n: int) -> Instance:
+    """Return the N-queens problem on an `n` x `n` board as an instance.
+
+    Each subset places a queen, and covers its row, its column and its two diagonals. The
+    diagonals are secondary, since most of them hold no queen.
+    """
+    subsets = {}
+    for r in range(n):
+        for c in range(n):
+            subsets[(r, c)] = {('row', r), ('col', c), ('diag', r + c), ('anti', r - c)}
+    secondary = {('diag', k) for k in range(2 * n - 1)} | {('anti', k) for k in range(1 - n, n)}
+    universe = ([('row', r) for r in range(n)] + [('col', c) for c in range(n)]
+                + [('diag', k) for k in range(2 * n - 1)] + [('anti', k) for k in range(1 - n, n)])
+    return universe, subsets, {'secondary': secondary}
+
+
+def pentominoes(rows: int, cols: int, holes: Sequence[Tuple[int, int]] = (),
+                quarter: Optional[str] = None) -> Instance:
+    """Return the tilings of a `rows` x `cols` board without `holes` by the 12 pentominoes.
+
+    Each subset places a pentomino in one of its orientations, and covers the pentomino and its
+    cells. Tilings that are rotations or reflections of each other are all counted, unless
+    `quarter` names a pentomino that is only placed with the centre of its bounding box in the
+    top left quarter of the board, middle lines included. With the X pentomino, which every
+    rotation and reflection maps onto itself, this leaves one of the four images of a tiling of a
+    rectangle, or two when its X is centred on a middle line.
+    """
+    holes = set(holes)
+    cells = [(r, c) for r in range(rows) for c in range(cols) if (r, c) not in holes]
+    board = set(cells)
+    subsets = {}
+    for name, shape in PENTOMINOES.items():
+        for orientation in _orientations(shape):
+            height = max(r for r, _ in orientation) + 1
+            width = max(c for _, c in orientation) + 1
+            for r in range(rows):
+                for c in range(cols):
+                    if name == quarter and (2 * r + height > rows or 2 * c + width > cols):
+                        continue
+                    placed = {(r + dr, c + dc) for dr, dc in orientation}
+                    if placed <= board:
+                        subsets[(name, orientation, r, c)] = placed | {name}
+    return list(PENTOMINOES) + cells, subsets, {}
+
+
+def _orientations(shape):
+    """Return the distinct rotations and reflections of `shape`, each moved to the origin."""
+    orientations = set()
+    cells = list(shape)
+    for _ in range(4):
+        cells = [(c, -r) for r, c in cells]
+        for variant in (cells, [(r, -c) for r, c in cells]):
+            low_r = min(r for r, _ in variant)
+            low_c = min(c for _, c in variant)
+            orientations.add(tuple(sorted((r - low_r, c - low_c) for r, c in variant)))
+    return sorted(orientations)
+
+
+def langford(n: int) -> Instance:
+    """Return the Langford pairs problem for `1, 1, ..., n, n` as an instance.
+
+    A solution places the two copies of each `k` in positions `k + 1` apart, among `2 * n`
+    positions. Each subset places one pair, and covers `k` and its two positions. Each sequence
+    and its reverse are both counted.
+    """
+    subsets = {}
+    for k in range(1, n + 1):
+        for i in range(2 * n - k - 1):
+            subsets[(k, i)] = {k, ('pos', i), ('pos', i + k + 1)}
+    return list(range(1, n + 1)) + [('pos', i) for i in range(2 * n)], subsets, {}
+
+
+def random_sparse(columns: int, rows: int, max_size: int = 4,
+                  seed: Optional[int] = 0) -> Instance:
+    """Return a random instance with `columns` elements and `rows` subsets of 1 to `max_size`.
+
+    The subsets of a random partition of the elements are planted among them, so there is at
+    least one solution.
+    """
+    rng = random.Random(seed)
+    universe = list(range(columns))
+    shuffled = list(universe)
+    rng.shuffle(shuffled)
+    subsets = {}
+    start = 0
+    while start < columns:
+        size = rng.randint(1, max_size)
+        subsets[len(subsets)] = set(shuffled[start:start + size])
+        start += size
+    while len(subsets) < rows:
+        subsets[len(subsets)] = set(rng.sample(universe, rng.randint(1, max_size)))
+    keys = list(subsets)
+    rng.shuffle(keys)
+    return universe, {i: subsets[key] for i, key in enumerate(keys)}, {}
@@ -0,0 +1,240 @@
+"""Measurement of `solve` on the benchmark instances, and comparison with a saved baseline.
+
+Each benchmark is solved in every mode of `MODES`. Its wall time is the best of a few runs, and
+its nodes and peak memory come from one more run in a new process, whose peak resident memory
+only grows with that search. The peak resident memory is read from `/proc`, and on systems without
+it the memory allocated by Python is traced with `tracemalloc` instead, which makes that run many
+times slower.
+"""
+
+
+import json
+import multiprocessing
+import os
+import platform
+import random
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from exactcover import SearchStats, solve
+
+from . import instances
+
+#: The modes of `solve` that every benchmark is run in, as the options that select them.
+MODES: Dict[str, Dict[str, Any]] = {
+    'enumerate': {},
+    'count': {'count': True},
+    'limit=1': {'limit': 1},
+    'randomize': {'randomize': True},
+}
+
+#: The benchmarks run by default, as functions that build their instance.
+BENCHMARKS: Dict[str, Callable[[], instances.Instance]] = {
+    'sudoku-easy': lambda: instances.sudoku(instances.EASY_SUDOKU),
+    'sudoku-hard': lambda: instances.sudoku(instances.HARD_SUDOKU),
+    'queens-8': lambda: instances.queens(8),
+    'queens-10': lambda: instances.queens(10),
+    'langford-8': lambda: instances.langford(8),
+    'pentominoes-3x20': lambda: instances.pentominoes(3, 20, quarter='X'),
+    'random-100x300': lambda: instances.random_sparse(100, 300, 6),
+}
+
+#: Benchmarks that take seconds to minutes in each mode, only run when asked for.
+SLOW_BENCHMARKS: Dict[str, Callable[[], instances.Instance]] = {
+    'langford-11': lambda: instances.langford(11),
+    'pentominoes-6x10': lambda: instances.pentominoes(6, 10, quarter='X'),
+    'pentominoes-8x8-center': lambda: instances.pentominoes(
+        8, 8, [(3, 3), (3, 4), (4, 3), (4, 4)], quarter='X'),
+}
+
+#: The relative increase of a measurement over the baseline that is flagged as a regression.
+TOLERANCE = 0.2
+
+#: The absolute increase of each measurement that is never flagged, since it is within the noise
+#: of the measurement: a millisecond of time and a MiB of memory.
+SLACK = {'time': 0.001, 'nodes': 0, 'peak_memory': 1 << 20}
+
+
+class Regression(NamedTuple):
+    """A measurement that is worse than its baseline.
+
+    Attributes:
+        benchmark:
+            The name of the benchmark.
+        mode:
+            The mode of `solve`, a key of `MODES`.
+        metric:
+            `'time'`, `'nodes'`, `'peak_memory'` or `'solutions'`. A number of solutions that
+            differs from the baseline is always flagged, since it means that `solve` is wrong.
+        baseline:
+            The value of the baseline.
+        value:
+            The value measured.
+    """
+
+    benchmark: str
+    mode: str
+    metric: str
+    baseline: float
+    value: float
+
+    def __str__(self):
+        """Return the regression as one line of text."""
+        if self.metric == 'solutions':
+            change = 'changed'
+        else:
+            change = f'{self.value / self.baseline - 1:+.0%}' if self.baseline else 'from 0'
+        return (f'{self.benchmark} {self.mode}: {self.metric} {change} '
+                f'({_format(self.baseline, self.metric)} -> {_format(self.value, self.metric)})')
+
+
+def run(names: Optional[Iterable[str]] = None, modes: Optional[Iterable[str]] = None,
+        repeat: int = 3, engine: Optional[str] = None,
+        report: Optional[Callable[[str, str, Dict[str, float]], Any]] = None
+        ) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Measure `solve` on benchmarks in each mode.
+
+    Args:
+        names:
+            The names of the benchmarks, keys of `BENCHMARKS` or `SLOW_BENCHMARKS`. When `None`,
+            those of `BENCHMARKS` are run. Default: `None`
+        modes:
+            The names of the modes, keys of `MODES`. When `None`, every mode is run.
+            Default: `None`
+        repeat:
+            The number of timed runs of each benchmark in each mode. Default: `3`
+        engine:
+            The `engine` option of `solve`. Default: `None`
+        report:
+            A function called with the name of the benchmark, the mode and the measurements as
+            soon as they are taken. Default: `None`
+
+    Returns:
+        Dict[str, Dict[str, Dict[str, float]]]: The measurements of each benchmark in each mode:
+        the best wall time in seconds, the number of nodes, the peak memory in bytes, and the
+        number of solutions.
+
+    Raises:
+        KeyError: A name is not that of a benchmark or a mode.
+    """
+    builders = {**BENCHMARKS, **SLOW_BENCHMARKS}
+    results = {}
+    for name in BENCHMARKS if names is None else names:
+        universe, subsets, options = builders[name]()
+        results[name] = {}
+        for mode in MODES if modes is None else modes:
+            results[name][mode] = measure(universe, subsets, {**options, **MODES[mode]}, repeat,
+                                          engine)
+            if report is not None:
+                report(name, mode, results[name][mode])
+    return results
+
+
+def measure(universe: List[Any], subsets: Dict[Any, set], options: Dict[str, Any],
+            repeat: int = 3, engine: Optional[str] = None) -> Dict[str, float]:
+    """Measure `solve(universe, subsets, engine=engine, **options)`.
+
+    The random module is seeded before each run, so a randomized search takes the same path every
+    time. The peak memory is the growth of the peak resident memory of a new process during the
+    search, so allocations that reuse memory freed before the search are not counted.
+
+    Returns:
+        Dict[str, float]: The best wall time of `repeat` runs in seconds, the number of nodes, the
+        peak memory in bytes, and the number of solutions.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        random.seed(0)
+        start = time.perf_counter()
+        solve(universe, subsets, engine=engine, **options)
+        best = min(best, time.perf_counter() - start)
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(1, mp_context=context) as executor:
+        nodes, peak, solutions = executor.submit(_instrumented, universe, subsets, options,
+                                                 engine).result()
+    return {'time': best, 'nodes': nodes, 'peak_memory': peak, 'solutions': solutions}
+
+
+def _instrumented(universe, subsets, options, engine):
+    """Return the nodes, the peak memory in bytes and the number of solutions of a search."""
+    stats = SearchStats()
+    random.seed(0)
+    before = _peak_resident_memory()
+    if before is None:
+        tracemalloc.start()
+        result = solve(universe, subsets, engine=engine, stats=stats, **options)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    else:
+        result = solve(universe, subsets, engine=engine, stats=stats, **options)
+        peak = _peak_resident_memory() - before
+    return stats.nodes, peak, result if options.get('count') else len(result)
+
+
+def _peak_resident_memory():
+    """Return the peak resident memory of the process in bytes, or `None` without `/proc`.
+
+    Unlike the `ru_maxrss` of `resource.getrusage`, which a new process inherits from its parent,
+    this peak starts again when a process is spawned.
+    """
+    path = '/proc/self/status'
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) * 1024
+    return None
+
+
+def compare(results: Dict[str, Dict[str, Dict[str, float]]],
+            baseline: Dict[str, Dict[str, Dict[str, float]]],
+            tolerance: float = TOLERANCE) -> List[Regression]:
+    """Return the measurements of `results` that are worse than those of `baseline`.
+
+    A time, number of nodes or peak memory is worse when it is more than `tolerance` times higher
+    than in the baseline, and higher by more than its `SLACK`. The nodes of the `'randomize'` mode
+    are not compared, since they depend on the random choices. Benchmarks and modes that are not
+    in both are skipped.
+    """
+    regressions = []
+    for name, modes in results.items():
+        for mode, measured in modes.items():
+            expected = baseline.get(name, {}).get(mode)
+            if expected is None:
+                continue
+            if measured['solutions'] != expected['solutions']:
+                regressions.append(Regression(name, mode, 'solutions', expected['solutions'],
+                                              measured['solutions']))
+            for metric in ('time', 'nodes', 'peak_memory'):
+                if metric == 'nodes' and mode == 'randomize':
+                    continue
+                if measured[metric] > expected[metric] * (1 + tolerance) + SLACK[metric]:
+                    regressions.append(Regression(name, mode, metric, expected[metric],
+                                                  measured[metric]))
+    return regressions
+
+
+def save(path: str, results: Dict[str, Dict[str, Dict[str, float]]]):
+    """Write `results` to the JSON file `path`, with the Python version that measured them."""
+    with open(path, 'w') as f:
+        json.dump({'python': platform.python_version(), 'results': results}, f, indent=2,
+                  sort_keys=True)
+        f.write('\n')
+
+
+def load(path: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Return the results saved by `save` to `path`."""
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def _format(value, metric):
+    """Return a measurement as text."""
+    if metric == 'time':
+        return f'{value * 1000:.1f} ms'
+    if metric == 'peak_memory':
+        return f'{value / 1024:.0f} KiB'
+    return str(value)
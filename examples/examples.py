@@ -1,5 +1,10 @@
 """Examples for exactcover."""
-from exactcover.exactcover import solve
+import os
+import random
+import tempfile
+
+from exactcover import Problem, SearchStats, estimate, parallel_solve, presolve, solve_zdd
+from exactcover.exactcover import solve, iter_solve, ExactCoverSearchStopped
 
 
 # Basic usage
@@ -158,3 +163,157 @@ s = {
 result = solve(u, s, count=True, limit=2)
 print(result)
 # 2
+
+
+# Use iter_solve to get the solutions one at a time as they are found.
+# The search is suspended between solutions, so it can be stopped at any time.
+u = {1, 2, 3, 4, 5, 6, 7}
+s = {
+    'A': {1, 4, 7},
+    'B': {1, 4},
+    'C': {4, 5, 7},
+    'D': {3, 5, 6},
+    'E': {2, 3, 6, 7},
+    'F': {2, 7},
+    'G': {3, 5, 6},
+    'H': {1, 4},
+}
+for solution in iter_solve(u, s):
+    print(solution)
+    if 'H' in solution:
+        break
+# {'D', 'F', 'B'}
+# {'G', 'F', 'B'}
+# {'H', 'D', 'F'}
+
+
+# Use engine='dlx' to search with Dancing Links instead of dicts, or engine='bitset' to search
+# with int bitmasks. All engines find the same solutions. By default, the bitset engine is used
+# for small universes and the dict engine for large ones.
+result = solve(u, s, engine='dlx')
+print(result)
+# [{'D', 'F', 'B'}, {'G', 'F', 'B'}, {'H', 'D', 'F'}, {'H', 'G', 'F'}]
+
+
+# Use Problem to compile a problem once and solve it many times.
+# The index is built once and each search only covers its preseed rows.
+problem = Problem(u, s)
+for row in ['B', 'D', 'A']:
+    result = problem.solve(preseed={row})
+    print(row, result)
+# B [{'D', 'F', 'B'}, {'G', 'F', 'B'}]
+# D [{'D', 'F', 'B'}, {'H', 'D', 'F'}]
+# A []
+print(problem.count())
+# 4
+
+
+# Use secondary for elements that may be covered at most once, instead of adding a slack subset
+# for each of them. Here, the 8 queens puzzle: every row and column of the board holds one queen,
+# and every diagonal at most one.
+queens_s = {(r, c): {('r', r), ('c', c), ('d', r + c), ('a', r - c)}
+            for r in range(8) for c in range(8)}
+queens_u = set().union(*queens_s.values())
+diagonals = {x for x in queens_u if x[0] in ('d', 'a')}
+print(solve(queens_u, queens_s, count=True, secondary=diagonals))
+# 92
+
+# Use symmetries to get one solution for each class of solutions that map onto each other. Each
+# symmetry is a dict that permutes the elements. Here, the domino tilings of a 4 x 4 board, up to
+# rotations and reflections. With orbits=True, each solution comes with the size of its class.
+board = [(r, c) for r in range(4) for c in range(4)]
+board_s = {}
+for r, c in board:
+    if r < 3:
+        board_s[('v', r, c)] = {(r, c), (r + 1, c)}
+    if c < 3:
+        board_s[('h', r, c)] = {(r, c), (r, c + 1)}
+flip = {(r, c): (3 - r, c) for r, c in board}
+transpose = {(r, c): (c, r) for r, c in board}
+result = solve(board, board_s, symmetries=[flip, transpose], orbits=True)
+print(len(result), sum(size for _, size in result))
+# 9 36
+
+# Use memo with count=True to cache the number of solutions below each set of covered columns.
+# Problems that reach the same columns through many partial solutions, such as tilings, are then
+# counted without visiting every solution. Here, the domino tilings of a 2 x 100 strip.
+strip_u = [(r, i) for i in range(100) for r in range(2)]
+strip_s = {}
+for i in range(100):
+    strip_s[('v', i)] = {(0, i), (1, i)}
+    if i + 1 < 100:
+        strip_s[('h', 0, i)] = {(0, i), (0, i + 1)}
+        strip_s[('h', 1, i)] = {(1, i), (1, i + 1)}
+print(solve(strip_u, strip_s, count=True, memo=1000))
+# 573147844013817084101
+
+# Use decompose to solve the parts of a problem that share no subsets separately. Their counts
+# are multiplied and their solutions combined, instead of searching every combination. Here, two
+# copies of the 2 x 100 strip side by side.
+two_strips_u = [(k, x) for k in range(2) for x in strip_u]
+two_strips_s = {(k, key): {(k, x) for x in value}
+                for k in range(2) for key, value in strip_s.items()}
+print(solve(two_strips_u, two_strips_s, count=True, decompose=True, memo=1000))
+# 328498451097686799925900568301054106978201
+
+# Use solve_zdd to get every solution as a zero-suppressed decision diagram. Shared subproblems are
+# stored once, so the diagram stays small when there are too many solutions to list.
+tilings = solve_zdd(strip_u, strip_s)
+print(tilings.count(), tilings.containing(('v', 50)).count())
+# 573147844013817084101 256319508074468182850
+tiling = tilings.sample()  # Uniformly at random
+print(len(set().union(*(strip_s[row] for row in tiling))))
+# 200
+for solution in solve_zdd(u, s).containing('H'):
+    print(solution)
+# {'H', 'D', 'F'}
+# {'H', 'G', 'F'}
+
+# Use presolve to force the subsets that are the only ones containing an element, merge duplicate
+# subsets and remove the subsets that can never be part of a solution before searching.
+reduced = presolve(u, s)
+print(reduced.merged, reduced.subsets_rows)
+# {'D': ['D', 'G'], 'B': ['B', 'H']} {}
+print(reduced.forced, reduced.removed_rows)
+# ['B', 'F', 'D'] ['C', 'A', 'E']
+print(reduced.solve(count=True))
+# 4
+
+# Use checkpoint to save the position of a long search to a file every checkpoint_every nodes. If
+# the file exists, the search resumes from it, and a count includes the solutions found before.
+short_u = strip_u[:40]
+short_s = {row: cells for row, cells in strip_s.items() if cells <= set(short_u)}
+checkpoint = os.path.join(tempfile.mkdtemp(), 'tilings.json')
+for i, solution in enumerate(iter_solve(short_u, short_s, checkpoint=checkpoint)):
+    if i == 99:
+        break  # The position after the 100th solution is saved
+print(solve(short_u, short_s, count=True, checkpoint=checkpoint))
+# 10946
+
+# Use stats to see how the search went: the nodes visited, the branching factors and solutions at
+# each depth, the rows removed and restored, and the time spent in setup and search.
+stats = SearchStats()
+solve(u, s, stats=stats)
+print(stats.nodes, stats.branching, stats.solutions_by_depth, stats.updates)
+# 9 {0: {2: 1}, 1: {0: 1, 2: 1}, 2: {2: 2}} {3: 4} 44
+
+# Use estimate to predict the size of a search before running it, from random root-to-leaf probes.
+guess = estimate(strip_u, strip_s, probes=100, rng=random.Random(0))
+print(f'{guess.nodes:.2e} {guess.solutions:.2e}')
+# 1.77e+21 5.20e+20  (there are 5.73e+20 solutions)
+
+# Use max_nodes, timeout or cancel (a threading.Event) to bound a search. A search that is stopped
+# raises ExactCoverSearchStopped, which holds the partial result. progress is called every
+# progress_every nodes with the depth, the number of nodes and the number of solutions so far.
+try:
+    solve(strip_u, strip_s, timeout=0.5)
+except ExactCoverSearchStopped as stopped:
+    print(stopped.reason, len(stopped.result) == stopped.found)
+    # timeout True
+
+# Use parallel_solve to split the search across worker processes. On platforms that start
+# workers with spawn, call it from under `if __name__ == '__main__':`.
+if __name__ == '__main__':
+    result = parallel_solve(u, s, jobs=2)
+    print(result)
+    # [{'D', 'F', 'B'}, {'G', 'F', 'B'}, {'H', 'D', 'F'}, {'H', 'G', 'F'}]
@@ -1,4 +1,16 @@
 """Exactcover __init__."""
-from .exactcover import solve, ExactCoverKeyError
+from .batch import solve_many
+from .exactcover import solve, iter_solve, ExactCoverKeyError, ExactCoverSearchStopped
+from .estimate import Estimate, estimate
+from .parallel import parallel_solve
+from .presolve import Presolved, presolve
+from .problem import Problem
+from .problemfile import MappedProblem, ProblemWriter, write_problem
+from .solutions import SolutionReader, SolutionWriter, Solutions, read_solutions
+from .stats import SearchStats
+from .zdd import ZDD, solve_zdd
 
-__all__ = ['solve', 'ExactCoverKeyError']
+__all__ = ['solve', 'iter_solve', 'ExactCoverKeyError', 'Problem', 'parallel_solve', 'ZDD',
+           'solve_zdd', 'presolve', 'Presolved', 'ExactCoverSearchStopped', 'SearchStats',
+           'estimate', 'Estimate', 'solve_many', 'Solutions', 'SolutionWriter', 'SolutionReader',
+           'read_solutions', 'ProblemWriter', 'MappedProblem', 'write_problem']
@@ -0,0 +1,188 @@
+"""Solving exact cover problems from asyncio code without blocking the event loop."""
+
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional, Tuple, Union
+
+from .exactcover import ExactCoverSearchStopped, iter_solve, solve
+from .parallel import _PolledEvent
+
+# The manager that shares cancellation events with process executors, started when first needed
+_manager = None
+
+# Put in the queue of `iter_solve_async` once the search is over
+_DONE = object()
+
+
+async def solve_async(universe_columns: Union[Dict[Hashable, Any], List[Hashable], set, str,
+                                              Tuple[Hashable]],
+                      subsets_rows: Dict[Hashable, set], executor: Optional[Executor] = None,
+                      **options: Any) -> Union[List[set], int]:
+    """Solves exact cover problems in an executor, so the event loop keeps running.
+
+    Cancelling the task that awaits the result stops the search at its next node in a thread, or
+    within a few nodes in a process. A process executor runs the search on another core, while
+    the search of a thread executor shares the interpreter with the event loop, which it slows
+    down but does not block.
+
+    Args:
+        universe_columns:
+            The set of elements in the universe/columns, as in `solve`.
+        subsets_rows:
+            The subsets of `universe_columns`, as in `solve`. With a process executor, the keys
+            and values must be picklable.
+        executor:
+            The `concurrent.futures` executor that runs the search. With a
+            `ProcessPoolExecutor`, a `multiprocessing.Manager` process is started the first time,
+            to share the event that cancels the search. When `None`, the default executor of the
+            event loop, a thread pool, is used. Default: `None`
+        **options:
+            The options of `solve`. With a process executor they must be picklable, and
+            `progress` is called in the worker process. `cancel` still stops the search, as well
+            as cancelling the task.
+
+    Returns:
+        Union[List[set], int]: The result of `solve`.
+
+    Raises:
+        ExactCoverKeyError: A subset contains an element that is not in `universe_columns`, or the
+            preseed contains a row that is not in `subsets_rows`.
+        ExactCoverSearchStopped: The search was stopped by `max_nodes`, `timeout` or `cancel`.
+    """
+    loop = asyncio.get_running_loop()
+    in_process = isinstance(executor, ProcessPoolExecutor)
+    cancel = _shared_event() if in_process else threading.Event()
+    future = loop.run_in_executor(executor, _solve_cancellable, cancel, in_process,
+                                  universe_columns, subsets_rows, options)
+    try:
+        return await future
+    except asyncio.CancelledError:
+        cancel.set()
+        raise
+
+
+async def iter_solve_async(universe_columns: Union[Dict[Hashable, Any], List[Hashable], set, str,
+                                                   Tuple[Hashable]],
+                           subsets_rows: Dict[Hashable, set], maxsize: int = 64,
+                           executor: Optional[Executor] = None,
+                           **options: Any) -> AsyncIterator[set]:
+    """Yield the solutions of an exact cover problem as a thread finds them.
+
+    The search of `iter_solve` runs in a thread and hands its solutions over through a queue. Once
+    `maxsize` solutions are waiting in the queue, the search waits until one is taken, so a slow
+    consumer does not fill the memory with solutions. The search stops at its next node when the
+    task of the consumer is cancelled, or when the iterator is closed early by its `aclose()`
+    method or by the garbage collector, after the consumer leaves an `async for` loop.
+
+    Args:
+        universe_columns:
+            The set of elements in the universe/columns, as in `solve`.
+        subsets_rows:
+            The subsets of `universe_columns`, as in `solve`.
+        maxsize:
+            A positive integer. The number of solutions that the search may find ahead of the
+            consumer. This option is ignored if the value is not a positive integer.
+            Default: `64`
+        executor:
+            The thread executor, such as a `ThreadPoolExecutor`, that runs the search. When
+            `None`, the default executor of the event loop is used. Default: `None`
+        **options:
+            The options of `iter_solve`. `cancel` still stops the search.
+
+    Returns:
+        AsyncIterator[set]: An iterator over the solutions, in the same order as `iter_solve`.
+
+    Raises:
+        ExactCoverKeyError: A subset contains an element that is not in `universe_columns`, or the
+            preseed contains a row that is not in `subsets_rows`. Raised by the iterator.
+        ExactCoverSearchStopped: The search was stopped by `max_nodes`, `timeout` or `cancel`,
+            after yielding the solutions found before. Raised by the iterator.
+    """
+    if not isinstance(maxsize, int) or maxsize <= 0:
+        maxsize = 64
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    # The free places in the queue, taken by the search and given back by the consumer
+    slots = threading.Semaphore(maxsize)
+    stop = threading.Event()
+    search = loop.run_in_executor(executor, _produce, loop, queue, slots, stop, universe_columns,
+                                  subsets_rows, options)
+    try:
+        while True:
+            solution = await queue.get()
+            if solution is _DONE:
+                break
+            slots.release()
+            yield solution
+        # Raise the exception of the search, if any
+        await search
+    finally:
+        stop.set()
+        # Wake the search if it is waiting for a place in the queue
+        slots.release()
+
+
+def _solve_cancellable(cancel, polled, universe_columns, subsets_rows, options):
+    """Return the result of `solve`, stopping the search once `cancel` is set.
+
+    `cancel` is only read every few nodes when `polled` is true, for events that live in another
+    process.
+    """
+    if polled:
+        cancel = _PolledEvent(cancel)
+    return solve(universe_columns, subsets_rows, **_with_cancel(options, cancel))
+
+
+def _produce(loop, queue, slots, stop, universe_columns, subsets_rows, options):
+    """Put the solutions of `iter_solve` in the asyncio `queue` of `loop`, then `_DONE`.
+
+    A place is taken from `slots` before each solution is put. The search stops once `stop` is
+    set.
+    """
+    solutions = None
+    try:
+        solutions = iter_solve(universe_columns, subsets_rows, **_with_cancel(options, stop))
+        for solution in solutions:
+            slots.acquire()
+            if stop.is_set():
+                return
+            loop.call_soon_threadsafe(queue.put_nowait, solution)
+    except ExactCoverSearchStopped:
+        if not stop.is_set():
+            raise
+    finally:
+        if solutions is not None:
+            solutions.close()
+        if not stop.is_set():
+            loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+
+def _with_cancel(options, cancel):
+    """Return `options` with `cancel` as the `cancel` option, or with both if one was given."""
+    given = options.get('cancel')
+    if callable(getattr(given, 'is_set', None)):
+        cancel = _AnyEvent(given, cancel)
+    return {**options, 'cancel': cancel}
+
+
+class _AnyEvent:
+    """An event that is set when any of `events` is set."""
+
+    def __init__(self, *events):
+        """Wrap `events`."""
+        self.events = events
+
+    def is_set(self):
+        """Return whether one of the events is set."""
+        return any(event.is_set() for event in self.events)
+
+
+def _shared_event():
+    """Return a new event that can be passed to worker processes."""
+    global _manager
+    if _manager is None:
+        _manager = multiprocessing.Manager()
+    return _manager.Event()
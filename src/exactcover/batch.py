@@ -0,0 +1,177 @@
+"""Solving many independent exact cover problems in chunks on worker processes."""
+
+
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .exactcover import (_build_engine, _check_preseed, _collect, _engine_name, _make_limit,
+                         _search, solve)
+
+#: The number of problems sent to a worker at a time when `chunksize` is not given.
+CHUNKSIZE = 32
+
+# The number of chunks per worker submitted ahead of the results taken
+_CHUNKS_AHEAD = 2
+
+# The options of `solve` that a search on a shared compiled engine supports
+_SHARED_OPTIONS = {'limit', 'preseed', 'count', 'engine', 'secondary'}
+
+
+def solve_many(problems: Iterable[Tuple[Union[Dict[Hashable, Any], List[Hashable], set, str,
+                                              Tuple[Hashable]],
+                                        Dict[Hashable, set], Dict[str, Any]]],
+               jobs: Optional[int] = None, chunksize: Optional[int] = None, ordered: bool = True,
+               executor: Optional[Executor] = None) -> Iterator[Any]:
+    """Solves many exact cover problems, yielding their results as they are ready.
+
+    The problems are read lazily and sent to worker processes in chunks of `chunksize`, a few
+    chunks per worker ahead of the results taken, so a long stream of problems is never held in
+    memory at once. The workers are started once and solve every chunk, so their start-up cost is
+    paid once per call, or once for many calls with a shared `executor`.
+
+    Problems of a chunk whose universe and subsets are the same objects, such as sudokus that only
+    differ by their preseed, share one compiled search index when their options are among
+    `limit`, `preseed`, `count`, `engine` and `secondary` and select the `'dlx'` or `'bitset'`
+    engine. The objects are sent to a worker once per chunk. Other problems are solved by `solve`.
+
+    Args:
+        problems:
+            An iterable of `(universe_columns, subsets_rows, options)` tuples, whose result is
+            `solve(universe_columns, subsets_rows, **options)`. The universes, subsets and options
+            must be picklable.
+        jobs:
+            The number of worker processes. When it is not a positive integer, the number of CPUs
+            is used. With `1`, the problems are solved in the calling process. This option is
+            ignored when `executor` is given. Default: `None`
+        chunksize:
+            A positive integer. The number of problems sent to a worker at a time. Larger chunks
+            cost less to send, and share compiled indexes between more problems, but take longer
+            before their first result. When it is not a positive integer, `CHUNKSIZE` is used.
+            Default: `None`
+        ordered:
+            When `True`, the results are yielded in the order of `problems`. Otherwise each
+            result is yielded as soon as its chunk is solved, as a pair of the index of its
+            problem in `problems` and the result. This option is ignored if the value is not a
+            boolean. Default: `True`
+        executor:
+            A `concurrent.futures` executor, such as a `ProcessPoolExecutor`, that solves the
+            chunks. It is not shut down, so its workers stay warm for the next call.
+            Default: `None`
+
+    Returns:
+        Iterator[Any]: An iterator over the results of `solve`, or over pairs of an index and a
+        result when `ordered` is `False`.
+
+    Raises:
+        ExactCoverKeyError: A problem raised it. It is raised by the iterator in place of the
+            result of that problem.
+        ExactCoverSearchStopped: The search of a problem was stopped by its `max_nodes`,
+            `timeout` or `cancel` options. It is raised by the iterator in place of the result of
+            that problem.
+    """
+    _chunksize = chunksize if isinstance(chunksize, int) and chunksize > 0 else CHUNKSIZE
+    _ordered = ordered is not False
+    chunks = _chunks(problems, _chunksize)
+    if executor is None:
+        _jobs = jobs if isinstance(jobs, int) and jobs > 0 else os.cpu_count() or 1
+        if _jobs == 1:
+            return _results((_solve_chunk(chunk) for chunk in chunks), _ordered)
+        return _pooled(chunks, ProcessPoolExecutor(_jobs), _jobs, _ordered, True)
+    return _pooled(chunks, executor, os.cpu_count() or 1, _ordered, False)
+
+
+def _chunks(problems, chunksize):
+    """Yield lists of up to `chunksize` problems of `problems`, each with its index first."""
+    problems = iter(problems)
+    index = 0
+    while True:
+        chunk = [(index + i, *problem) for i, problem in enumerate(islice(problems, chunksize))]
+        if not chunk:
+            return
+        index += len(chunk)
+        yield chunk
+
+
+def _pooled(chunks, executor, jobs, ordered, shutdown):
+    """Yield the results of `chunks` solved by `executor`, shutting it down at the end if asked."""
+    pending = deque()
+    try:
+        yield from _results(_submitted(chunks, executor, jobs * _CHUNKS_AHEAD, ordered, pending),
+                            ordered)
+    finally:
+        for future in pending:
+            future.cancel()
+        if shutdown:
+            executor.shutdown()
+
+
+def _submitted(chunks, executor, ahead, ordered, pending):
+    """Yield the solved chunks, keeping up to `ahead` chunks submitted in `pending`.
+
+    The chunks come in the order of `chunks` when `ordered` is true, and as they are solved
+    otherwise.
+    """
+    while True:
+        for chunk in islice(chunks, ahead - len(pending)):
+            pending.append(executor.submit(_solve_chunk, chunk))
+        if not pending:
+            return
+        if ordered:
+            yield pending[0].result()
+            pending.popleft()
+        else:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                yield future.result()
+
+
+def _results(solved, ordered):
+    """Yield the results of the solved chunks, raising the exceptions of their problems."""
+    for chunk in solved:
+        for index, raised, result in chunk:
+            if raised:
+                raise result
+            yield result if ordered else (index, result)
+
+
+def _solve_chunk(chunk):
+    """Return the index of each problem of `chunk`, whether it raised, and its result or error.
+
+    The compiled engines are shared by the problems of the chunk, which holds their universes and
+    subsets, so the ids of those objects are not reused while the engines are kept.
+    """
+    engines = {}
+    results = []
+    for index, universe_columns, subsets_rows, options in chunk:
+        try:
+            results.append((index, False,
+                            _solve_shared(engines, universe_columns, subsets_rows, options)))
+        except Exception as e:
+            results.append((index, True, e))
+    return results
+
+
+def _solve_shared(engines, universe_columns, subsets_rows, options):
+    """Return the result of `solve`, searching on the engine of `engines` that fits the problem."""
+    if not options.keys() <= _SHARED_OPTIONS:
+        return solve(universe_columns, subsets_rows, **options)
+    engine = _engine_name(universe_columns, options.get('engine'))
+    if engine == 'dict':
+        # The dict engine tries its rows in an order that depends on its earlier searches
+        return solve(universe_columns, subsets_rows, **options)
+    secondary = options.get('secondary')
+    key = (id(universe_columns), id(subsets_rows), engine, id(secondary))
+    if key not in engines:
+        engines[key] = _build_engine(universe_columns, subsets_rows, False, engine, secondary)
+    search_engine, row_keys, row_index = engines[key]
+    count = options.get('count') is True
+    preseed = _check_preseed(options.get('preseed'), subsets_rows)
+    if preseed is None:
+        return 0 if count else []
+    solutions = _search(search_engine, [row_index[r] for r in preseed],
+                        _make_limit(options.get('limit')), count, row_keys)
+    return _collect(solutions, count)
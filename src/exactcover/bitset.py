@@ -0,0 +1,121 @@
+"""Bitset search engine for problems with small universes."""
+
+
+from typing import List, Optional, Sequence
+
+
+class Bitset:
+    """Exact cover search over Python int bitmasks.
+
+    Each row is an int mask with one bit per column and the covered columns are a single int, so a
+    row conflicts with the partial solution when `mask & covered` is not zero. The rows that can
+    still be chosen are kept as an int with one bit per row.
+
+    The number of rows left in each column is stored bit-sliced: bit `i` of the size of column `c`
+    is bit `c` of `planes[i]`. Removing a row subtracts its mask from every column at once, and the
+    first column with the fewest rows is found with one mask operation per plane, without visiting
+    the columns one by one.
+
+    Args:
+        num_columns:
+            The number of columns. Columns are numbered from `0` to `num_columns - 1`.
+        row_columns:
+            The columns of each row. Rows are numbered by their position in the sequence.
+        secondary:
+            The columns that are covered at most once. They are left out of `primary`, the mask of
+            the columns to choose from.
+    """
+
+    def __init__(self, num_columns: int, row_columns: Sequence[Sequence[int]],
+                 secondary: Sequence[int] = ()):
+        """Build the row masks, the per-column row lists and the column sizes."""
+        self.masks = []
+        self.col_rows = [[] for _ in range(num_columns)]
+        for row, cols in enumerate(row_columns):
+            mask = 0
+            for col in cols:
+                mask |= 1 << col
+                self.col_rows[col].append(row)
+            self.masks.append(mask)
+        self.col_bits = []
+        for rows in self.col_rows:
+            bits = 0
+            for row in rows:
+                bits |= 1 << row
+            self.col_bits.append(bits)
+        max_size = max((len(rows) for rows in self.col_rows), default=0)
+        self.planes = [0] * max_size.bit_length()
+        for col, rows in enumerate(self.col_rows):
+            for i in range(len(self.planes)):
+                if len(rows) >> i & 1:
+                    self.planes[i] |= 1 << col
+        self.primary = (1 << num_columns) - 1
+        for col in secondary:
+            self.primary &= ~(1 << col)
+        self.covered = 0
+        self.live = (1 << len(self.masks)) - 1
+        self.trail = []
+
+    def choose(self) -> Optional[List[int]]:
+        """Return the rows of the uncovered primary column with the fewest rows.
+
+        Ties go to the first such column. `None` is returned when every primary column is covered.
+        """
+        covered = self.covered
+        candidates = self.primary & ~covered
+        if not candidates:
+            return None
+        # Keep the columns whose size has a 0 bit where some candidate has a 1 bit, from the most
+        # significant plane down, which leaves the columns of the smallest size
+        for plane in reversed(self.planes):
+            smaller = candidates & ~plane
+            if smaller:
+                candidates = smaller
+        selected = (candidates & -candidates).bit_length() - 1
+        masks = self.masks
+        return [row for row in self.col_rows[selected] if not masks[row] & covered]
+
+    def conflicts(self, row: int) -> int:
+        """Return the number of rows that `cover(row)` removes, `row` included."""
+        masks = self.masks
+        col_bits = self.col_bits
+        mask = masks[row]
+        conflicts = 0
+        while mask:
+            low = mask & -mask
+            conflicts |= col_bits[low.bit_length() - 1]
+            mask ^= low
+        return bin(self.live & conflicts).count('1')
+
+    def cover(self, row: int):
+        """Cover every column of `row`, removing the rows that conflict with it."""
+        self.trail.append((self.live, self.planes))
+        masks = self.masks
+        col_bits = self.col_bits
+        mask = masks[row]
+        self.covered |= mask
+        conflicts = 0
+        while mask:
+            low = mask & -mask
+            conflicts |= col_bits[low.bit_length() - 1]
+            mask ^= low
+        removed = self.live & conflicts
+        self.live ^= removed
+        planes = list(self.planes)
+        while removed:
+            low = removed & -removed
+            removed ^= low
+            # Subtract one from the size of each column of the removed row, borrowing upwards
+            borrow = masks[low.bit_length() - 1]
+            i = 0
+            while borrow:
+                plane = planes[i]
+                planes[i] = plane ^ borrow
+                borrow &= ~plane
+                i += 1
+        self.planes = planes
+
+    def uncover(self, row: int):
+        """Undo `cover(row)`. Rows must be uncovered in the reverse order they were covered."""
+        self.covered &= ~self.masks[row]
+        self.live, self.planes = self.trail.pop()
@@ -0,0 +1,255 @@
+"""Dancing Links search engine over flat integer arrays."""
+
+
+from typing import List, Optional, Sequence
+
+
+class DLX:
+    """Knuth's Dancing Links over integer node arrays.
+
+    Columns and rows are dense integers. Node 0 is the root, nodes 1 to `num_columns` are the
+    column headers and the remaining nodes hold one entry per (row, column) pair. The left, right,
+    up, down and column fields of the nodes, the column lengths and the row of each node are stored
+    in flat lists of integers, so covering and uncovering a column only rewrites integers. Lists
+    are used rather than `array('i')` because indexing an array boxes a new int on every read,
+    which makes the search loops more than twice as slow.
+
+    Args:
+        num_columns:
+            The number of columns. Columns are numbered from `0` to `num_columns - 1`.
+        row_columns:
+            The columns of each row. Rows are numbered by their position in the sequence.
+        secondary:
+            The columns that are covered at most once. Their headers are left out of the list of
+            columns to choose from, but their rows are linked as usual so covering one of them
+            still removes the others.
+
+    Rows and columns can be added and removed in place between searches, while no row is covered.
+    The nodes of removed rows and columns are unlinked but not reused, so the arrays only grow.
+    """
+
+    def __init__(self, num_columns: int, row_columns: Sequence[Sequence[int]],
+                 secondary: Sequence[int] = ()):
+        """Link the column headers and the row nodes."""
+        # The header node of each column, which `add_column` appends after the row nodes
+        self.headers = list(range(1, num_columns + 1))
+        num_nodes = 1 + num_columns + sum(len(cols) for cols in row_columns)
+        self.L = L = list(range(-1, num_nodes - 1))
+        self.R = R = list(range(1, num_nodes + 1))
+        self.U = U = list(range(num_nodes))
+        self.D = D = list(range(num_nodes))
+        self.C = C = list(range(num_nodes))
+        self.S = S = [0] * (num_columns + 1)
+        self.ROW = ROW = [-1] * num_nodes
+        # The first node of each row, or -1 for an empty row
+        self.first = first = [-1] * len(row_columns)
+        L[0] = num_columns
+        R[num_columns] = 0
+        for col in secondary:
+            header = col + 1
+            R[L[header]] = R[header]
+            L[R[header]] = L[header]
+            L[header] = R[header] = header
+        node = num_columns + 1
+        for row, cols in enumerate(row_columns):
+            if not cols:
+                continue
+            first[row] = node
+            for col in cols:
+                header = col + 1
+                C[node] = header
+                ROW[node] = row
+                U[node] = U[header]
+                D[node] = header
+                D[U[header]] = node
+                U[header] = node
+                S[header] += 1
+                node += 1
+            L[first[row]] = node - 1
+            R[node - 1] = first[row]
+
+    def choose(self) -> Optional[List[int]]:
+        """Return the rows of the uncovered primary column with the fewest rows.
+
+        Ties go to the first such column. `None` is returned when every primary column is covered.
+        """
+        R = self.R
+        S = self.S
+        col = R[0]
+        if not col:
+            return None
+        selected = col
+        size = S[col]
+        col = R[col]
+        while col and size:
+            if S[col] < size:
+                selected = col
+                size = S[col]
+            col = R[col]
+        D = self.D
+        ROW = self.ROW
+        rows = []
+        node = D[selected]
+        while node != selected:
+            rows.append(ROW[node])
+            node = D[node]
+        return rows
+
+    def conflicts(self, row: int) -> int:
+        """Return the number of rows that `cover(row)` removes, `row` included."""
+        node = self.first[row]
+        if node < 0:
+            return 0
+        R, D, ROW = self.R, self.D, self.ROW
+        rows = set()
+        j = node
+        while True:
+            col = self.C[j]
+            i = D[col]
+            while i != col:
+                rows.add(ROW[i])
+                i = D[i]
+            j = R[j]
+            if j == node:
+                break
+        return len(rows)
+
+    def cover(self, row: int):
+        """Cover every column of `row`, removing the rows that conflict with it."""
+        node = self.first[row]
+        if node < 0:
+            return
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        j = node
+        while True:
+            col = C[j]
+            L[R[col]] = L[col]
+            R[L[col]] = R[col]
+            i = D[col]
+            while i != col:
+                k = R[i]
+                while k != i:
+                    U[D[k]] = U[k]
+                    D[U[k]] = D[k]
+                    S[C[k]] -= 1
+                    k = R[k]
+                i = D[i]
+            j = R[j]
+            if j == node:
+                break
+
+    def uncover(self, row: int):
+        """Undo `cover(row)`. Rows must be uncovered in the reverse order they were covered."""
+        node = self.first[row]
+        if node < 0:
+            return
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        j = node
+        while True:
+            j = L[j]
+            col = C[j]
+            i = U[col]
+            while i != col:
+                k = L[i]
+                while k != i:
+                    S[C[k]] += 1
+                    U[D[k]] = k
+                    D[U[k]] = k
+                    k = L[k]
+                i = U[i]
+            L[R[col]] = col
+            R[L[col]] = col
+            if j == node:
+                break
+
+    def add_column(self, secondary: bool = False) -> int:
+        """Add a column without rows and return its number.
+
+        A primary column is linked last in the list of columns to choose from. Its header is a new
+        node at the end of the arrays, so the column lengths are extended to reach it.
+        """
+        L, R = self.L, self.R
+        header = len(L)
+        if secondary:
+            L.append(header)
+            R.append(header)
+        else:
+            L.append(L[0])
+            R.append(0)
+            R[L[0]] = header
+            L[0] = header
+        self.U.append(header)
+        self.D.append(header)
+        self.C.append(header)
+        self.ROW.append(-1)
+        self.S.extend([0] * (header + 1 - len(self.S)))
+        self.headers.append(header)
+        return len(self.headers) - 1
+
+    def add_row(self, cols: Sequence[int]) -> int:
+        """Add a row with the columns `cols` and return its number.
+
+        Its nodes are appended to the arrays and linked last in their columns.
+        """
+        L, R, U, D, C, S, ROW = self.L, self.R, self.U, self.D, self.C, self.S, self.ROW
+        row = len(self.first)
+        self.first.append(len(L) if cols else -1)
+        for col in cols:
+            header = self.headers[col]
+            node = len(L)
+            L.append(node - 1)
+            R.append(node + 1)
+            U.append(U[header])
+            D.append(header)
+            C.append(header)
+            ROW.append(row)
+            D[U[header]] = node
+            U[header] = node
+            S[header] += 1
+        if cols:
+            L[self.first[row]] = len(L) - 1
+            R[-1] = self.first[row]
+        return row
+
+    def remove_row(self, row: int):
+        """Unlink the nodes of `row` from their columns, so it is never chosen or covered again."""
+        node = self.first[row]
+        if node < 0:
+            return
+        U, D, C, S = self.U, self.D, self.C, self.S
+        self.first[row] = -1
+        j = node
+        while True:
+            U[D[j]] = U[j]
+            D[U[j]] = D[j]
+            S[C[j]] -= 1
+            j = self.R[j]
+            if j == node:
+                break
+
+    def remove_column(self, col: int) -> List[int]:
+        """Unlink column `col` from the columns and its nodes from their rows.
+
+        Returns:
+            List[int]: The rows that had the column, which keep their other columns.
+        """
+        L, R, U, D, first = self.L, self.R, self.U, self.D, self.first
+        header = self.headers[col]
+        R[L[header]] = R[header]
+        L[R[header]] = L[header]
+        rows = []
+        node = D[header]
+        while node != header:
+            row = self.ROW[node]
+            rows.append(row)
+            if R[node] == node:
+                first[row] = -1
+            else:
+                R[L[node]] = R[node]
+                L[R[node]] = L[node]
+                if first[row] == node:
+                    first[row] = R[node]
+            node = D[node]
+        L[header] = R[header] = U[header] = D[header] = header
+        self.S[header] = 0
+        return rows
@@ -0,0 +1,198 @@
+"""Monte Carlo estimates of the size of the search for an exact cover problem."""
+
+
+import math
+import sys
+from decimal import Decimal, localcontext
+from fractions import Fraction
+from random import Random, randrange
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+
+from .exactcover import _make_limit, _preseeded, _prepare
+
+
+def estimate(universe_columns: Union[Dict[Hashable, Any], List[Hashable], set, str,
+                                     Tuple[Hashable]],
+             subsets_rows: Dict[Hashable, set], probes: int = 1000,
+             preseed: Optional[set] = None, engine: Optional[str] = None,
+             secondary: Optional[set] = None, rng: Optional[Random] = None,
+             confidence: float = 0.95) -> 'Estimate':
+    """Estimate the number of nodes and solutions of the search that `solve` runs.
+
+    This is Knuth's estimator. Each probe walks down the search tree from the root, choosing the
+    element to cover as the search does and one of the subsets that can cover it at random, until
+    it reaches a solution or a dead end. A node reached after choosing among `d1, ..., dk` subsets
+    stands for `d1 * ... * dk` nodes, so the sum of these products along a probe is an unbiased
+    estimate of the number of nodes, and the product at its end, if it is a solution, is an
+    unbiased estimate of the number of solutions. The estimates are averaged over the probes.
+
+    A probe only covers as many subsets as a solution has, so thousands of probes take far less
+    time than a search of any size. The estimates have a high variance when the search tree is
+    unbalanced, and then the confidence intervals are too narrow until enough probes reach the
+    rare large subtrees.
+
+    Args:
+        universe_columns:
+            The set of elements in the universe/columns. Duplicate elements are silently ignored.
+        subsets_rows:
+            The collection of subsets in `universe_columns` of type dict.  The values are python
+            set objects that is a subset of `universe_columns`.
+        probes:
+            A positive integer. The number of probes. This option is ignored if the value is not
+            a positive integer. Default: `1000`
+        preseed:
+            A set of hashable row objects used to preseed a partial solution. This option is
+            ignored if the value is not a set object. Default: `None`
+        engine:
+            The search engine, as in `solve`. The estimates are of the tree that this engine
+            searches. The `'dict'` engine breaks ties between elements by the order in which they
+            were last uncovered, so its probes may choose other elements than its search does.
+            Default: `None`
+        secondary:
+            The elements that are covered at most once, as in `solve`. Default: `None`
+        rng:
+            The `random.Random` instance to draw from. The `random` module is used when it is
+            `None`. Default: `None`
+        confidence:
+            The confidence level of the intervals, between `0` and `1`. This option is ignored if
+            the value is not a number in that range. Default: `0.95`
+
+    Returns:
+        Estimate: The estimated number of nodes and solutions, with their confidence intervals.
+
+    Raises:
+        ExactCoverKeyError: A subset contains an element that is not in `universe_columns`, or the
+            preseed contains a row that is not in `subsets_rows`.
+    """
+    _probes = _make_limit(probes) or 1000
+    if (not isinstance(confidence, (int, float)) or isinstance(confidence, bool)
+            or not 0 < confidence < 1):
+        confidence = 0.95
+    search_engine, preseed_rows, _ = _prepare(universe_columns, subsets_rows, False, preseed,
+                                              engine, secondary)
+    if preseed_rows is None:
+        return Estimate(_probes, confidence, [0] * _probes, [0] * _probes)
+    draw = randrange if rng is None else rng.randrange
+    node_samples = []
+    solution_samples = []
+    with _preseeded(search_engine, preseed_rows) as chosen:
+        for _ in range(_probes):
+            nodes, solutions = _probe(search_engine, chosen, draw)
+            node_samples.append(nodes)
+            solution_samples.append(solutions)
+    return Estimate(_probes, confidence, node_samples, solution_samples)
+
+
+def _probe(engine, chosen, draw):
+    """Walk down from the current node of `engine` and return its estimated nodes and solutions.
+
+    `chosen` holds the rows covered so far, and the rows the walk covers are appended to it and
+    uncovered before returning. `draw(n)` returns a random integer below `n`.
+    """
+    depth = len(chosen)
+    weight = 1
+    nodes = 0
+    solutions = 0
+    while True:
+        nodes += weight
+        rows = engine.choose()
+        if rows is None:
+            solutions = weight
+            break
+        if not rows:
+            break
+        rows = list(rows)
+        row = rows[draw(len(rows))]
+        weight *= len(rows)
+        engine.cover(row)
+        chosen.append(row)
+    while len(chosen) > depth:
+        engine.uncover(chosen.pop())
+    return nodes, solutions
+
+
+class Estimate:
+    """The estimated size of a search, returned by `estimate`.
+
+    Attributes:
+        probes:
+            The number of probes the estimates are averaged over.
+        confidence:
+            The confidence level of the intervals.
+        nodes:
+            The estimated number of nodes, counted as in `SearchStats.nodes`. The estimates and
+            the bounds of their intervals are floats, or ints when they are too large for floats.
+        solutions:
+            The estimated number of solutions.
+        nodes_interval:
+            The lower and upper bounds of the confidence interval of `nodes`, from the normal
+            approximation of the mean of the probes. The lower bound is at least `1`.
+        solutions_interval:
+            The lower and upper bounds of the confidence interval of `solutions`. The lower bound
+            is at least `0`.
+    """
+
+    def __init__(self, probes: int, confidence: float, node_samples: List[int],
+                 solution_samples: List[int]):
+        """Average the estimates of each probe."""
+        self.probes = probes
+        self.confidence = confidence
+        z = _normal_quantile((1 + confidence) / 2)
+        self.nodes, self.nodes_interval = _mean_interval(node_samples, z, 1)
+        self.solutions, self.solutions_interval = _mean_interval(solution_samples, z, 0)
+
+    def __repr__(self):
+        """Return the estimates and their intervals."""
+        return (f'Estimate(probes={self.probes}, confidence={self.confidence}, '
+                f'nodes={_format(self.nodes)}, nodes_interval=({_format(self.nodes_interval[0])}, '
+                f'{_format(self.nodes_interval[1])}), solutions={_format(self.solutions)}, '
+                f'solutions_interval=({_format(self.solutions_interval[0])}, '
+                f'{_format(self.solutions_interval[1])}))')
+
+
+def _mean_interval(samples, z, lowest):
+    """Return the mean of `samples` and the interval of `z` standard errors around it.
+
+    The samples are ints, which may be too large for floats even once they are averaged, so the
+    mean is taken exactly and the standard error as a decimal. The interval is clipped below at
+    `lowest`.
+    """
+    n = len(samples)
+    total = sum(samples)
+    mean = Fraction(total, n)
+    if n < 2:
+        return _number(mean), (_number(mean), _number(mean))
+    # n * (n - 1) times the variance of the samples, then the standard error of the mean
+    spread = n * sum(x * x for x in samples) - total * total
+    with localcontext() as context:
+        context.prec = 30
+        error = Fraction(Decimal(z) * (Decimal(spread) / (n * n * (n - 1))).sqrt())
+    return _number(mean), (_number(max(mean - error, lowest)), _number(mean + error))
+
+
+def _number(value):
+    """Return the fraction `value` as a float, or as an int if it is too large for a float."""
+    if value > sys.float_info.max:
+        return round(value)
+    return float(value)
+
+
+def _format(value):
+    """Return `value` with 6 significant digits, as the `'.6g'` format gives for floats."""
+    if isinstance(value, float):
+        return f'{value:.6g}'
+    with localcontext() as context:
+        context.prec = 6
+        return format((+Decimal(value)).normalize(), 'g')
+
+
+def _normal_quantile(p):
+    """Return the value below which a standard normal variable falls with probability `p`."""
+    low, high = -40.0, 40.0
+    for _ in range(100):
+        middle = (low + high) / 2
+        if (1 + math.erf(middle / math.sqrt(2))) / 2 < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
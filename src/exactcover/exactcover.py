@@ -1,21 +1,52 @@
 """Exactcover finds all solutions to an exact cover problem."""
 
 
+import json
+import os
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
 from copy import deepcopy
+from itertools import islice, product
 from random import shuffle
-from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple, Union
+
+from .bitset import Bitset
+from .dlx import DLX
+from .solutions import Solutions
+from .stats import SearchStats, _StatsEngine
+
+#: Universes with at most this many columns are searched with the bitset engine by default.
+BITSET_MAX_COLUMNS = 1024
 
 
 def solve(universe_columns: Union[Dict[Hashable, Any], List[Hashable], set, str,
                                   Tuple[Hashable]],
           subsets_rows: Dict[Hashable, set],
           limit: Optional[int] = None, randomize: bool = False,
-          preseed: Optional[set] = None, count: bool = False) -> List[set]:
+          preseed: Optional[set] = None, count: bool = False,
+          engine: Optional[str] = None, memo: Optional[int] = None,
+          secondary: Optional[set] = None, decompose: bool = False,
+          symmetries: Optional[List[Dict[Hashable, Hashable]]] = None,
+          orbits: bool = False, checkpoint: Optional[str] = None,
+          checkpoint_every: int = 100000, max_nodes: Optional[int] = None,
+          timeout: Optional[float] = None, cancel: Optional[Any] = None,
+          progress: Optional[Callable[[int, int, int], Any]] = None,
+          progress_every: int = 10000, stats: Optional[SearchStats] = None,
+          output: Optional[str] = None,
+          sink: Optional[Any] = None) -> Union[List[set], List[Tuple[int, ...]], Solutions, int,
+                                               Any]:
     """Solves exact cover problems.
 
     Given the set universe_columns and collection of subsets, the function finds all solutions to
     the exact cover problem.
 
+    A long search can be bounded with `max_nodes`, `timeout` and `cancel`, and watched with
+    `progress`. With `decompose`, they bound the searches of all the components together, and
+    the progress is that of the component being solved. With `checkpoint`, the position is saved
+    when the search is stopped, so it can be resumed later.
+
     Args:
         universe_columns:
             The set of elements in the universe/columns. Duplicate elements are silently ignored.
@@ -35,68 +66,1148 @@ def solve(universe_columns: Union[Dict[Hashable, Any], List[Hashable], set, str,
             When `True`, the total number of solutions is returned instead of the solution sets.
             The `limit` and `randomize` options are ignonred when `count` is set to `True`. This
             option is ignored if the value is not a boolean. Defaut: `False`
+        engine:
+            The search engine. `'dict'` searches dicts keyed by the rows and columns. `'dlx'`
+            searches Dancing Links over integer arrays, which is faster on larger problems.
+            `'bitset'` searches int bitmasks, which is fastest when the universe is small. All
+            engines find the same solutions, but `'dict'` may find them in another order than
+            `'dlx'` and `'bitset'`, which changes the order of the list and which solutions
+            `limit` keeps. When `None`, `'bitset'` is used for universes with at most
+            `BITSET_MAX_COLUMNS` elements and `'dict'` otherwise. Before `'bitset'` was added,
+            `'dict'` was always the default, so pass `'dict'` to keep the order of earlier
+            versions. This option is ignored if the value is not one of these names.
+            Default: `None`
+        memo:
+            A positive integer. When `count` is `True`, the number of solutions below each set of
+            covered columns is cached and reused whenever the search covers the same columns
+            again, which turns repeated subproblems into lookups. At most `memo` sets are kept,
+            and the least recently used one is evicted when the cache is full. The result is the
+            same as without `memo`. This option is ignored if the value is not a positive integer.
+            Default: `None`
+        secondary:
+            A set of elements of `universe_columns` that are covered at most once instead of
+            exactly once. The search never branches on them and a solution may leave them
+            uncovered, which replaces the singleton slack rows otherwise needed for "at most once"
+            constraints. A subset whose elements are all secondary is never part of a solution.
+            This option is ignored if the value is not a set object. Default: `None`
+        decompose:
+            When `True`, the elements and subsets left after the preseed are split into
+            components that no subset spans, and each component is solved on its own. The counts
+            of the components are multiplied and their solutions are combined as a product, so
+            the work adds up over the components instead of multiplying. The solutions come in a
+            different order than without `decompose`. This option is ignored if the value is not
+            a boolean. Default: `False`
+        symmetries:
+            A list of permutations of `universe_columns` that map the subsets onto subsets, given
+            as dicts from elements to elements. Elements that are not keys stay in place. One
+            solution is returned for each orbit of the group they generate. At each branch, the
+            search only tries one subset of each orbit of the permutations that fix the subsets
+            already chosen. Each solution found is compared with its images under every
+            permutation of the group, so the group should have at most a few thousand
+            permutations. With `preseed`, only the permutations that map the preseed onto itself
+            are used. A permutation that does not map every subset onto a subset is ignored. The
+            `memo` and `decompose` options are ignored when this option is used. This option is
+            ignored if the value is not a list. Default: `None`
+        orbits:
+            When `True` and `symmetries` is given, each solution is returned as a pair of the
+            solution and the number of solutions in its orbit, and `count` returns the total of
+            those numbers, which is the number of solutions without `symmetries`. This option is
+            ignored if the value is not a boolean. Default: `False`
+        checkpoint:
+            The path of a file where the position of the search is saved every `checkpoint_every`
+            search nodes. The file holds the index of the subset being tried at each depth and
+            the number of solutions found before it, not the problem. If the file exists when the
+            search starts, the search resumes from the saved position, and the count includes
+            the solutions found before it, so a search that was stopped finds each solution
+            exactly once over all its runs. Once the search is over, the file records that it is
+            finished and resuming from it finds no more solutions. The search order must not
+            depend on the search history, so the `'dict'` engine is replaced by `'dlx'`, and
+            `randomize` and `memo` are ignored. The universe must be iterated in the same order
+            on every run, so pass a list rather than a set of strings. When resuming, only the
+            solutions found after the saved position are returned, which makes this option most
+            useful with `count` or with `iter_solve`. It is ignored with `decompose` or
+            `symmetries`, or if the value is not a `str` or path object. Default: `None`
+        checkpoint_every:
+            A positive integer. The number of search nodes between two saves of `checkpoint`.
+            Default: `100000`
+        max_nodes:
+            A positive integer. The search is stopped with `ExactCoverSearchStopped` before it
+            enters more than `max_nodes` nodes. A node is a partial solution whose next element
+            to cover is chosen, or a solution. This option is ignored if the value is not a
+            positive integer. Default: `None`
+        timeout:
+            A positive number of seconds. The search is stopped with `ExactCoverSearchStopped`
+            at the first node entered after `timeout` seconds. This option is ignored if the
+            value is not a positive number. Default: `None`
+        cancel:
+            An object with an `is_set()` method, such as a `threading.Event`. The search is
+            stopped with `ExactCoverSearchStopped` at the first node entered after `is_set()`
+            returns `True`, which lets another thread cancel it. This option is ignored if the
+            object has no `is_set` method. Default: `None`
+        progress:
+            A function called every `progress_every` nodes with the number of subsets chosen by
+            the search at the current node, the number of nodes entered and the number of
+            solutions found so far. This option is ignored if the value is not callable.
+            Default: `None`
+        progress_every:
+            A positive integer. The number of nodes between two calls of `progress`.
+            Default: `10000`
+        stats:
+            A `SearchStats` object that is filled in with the number of nodes, the solutions and
+            branching factors at each depth, the number of row updates and the time spent in setup
+            and in the search. The search is only instrumented when this option is given, so it
+            costs nothing otherwise. With `decompose`, the searches of the components are added
+            up, with depths counted in the subsets chosen within each component, and splitting
+            the problem counts as setup. This option is ignored if the value is not a
+            `SearchStats` object. Default: `None`
+        output:
+            The form of the solutions. With `'indices'`, each solution is a sorted tuple of the
+            indices of its subsets in `subsets_rows`. With `'array'`, the solutions are returned
+            as a `Solutions` sequence, which stores those indices in flat arrays and decodes them
+            into sets of row keys on demand. Both take several times less memory than sets. With
+            `orbits`, the pairs hold solutions as indices and `'array'` is the same as
+            `'indices'`. This option is ignored with `count`, or if the value is not one of these
+            names. Default: `None`
+        sink:
+            An object with an `append` method, such as a `SolutionWriter`, that is called with
+            each solution as a sorted tuple of the indices of its subsets in `subsets_rows` as
+            soon as it is found. The solutions are not kept in memory, and the sink is returned
+            instead of a list. This option is ignored with `count` or `orbits`, or if the value
+            has no `append` method. Default: `None`
 
     Returns:
-        List[set]: A list of solutions.
+        Union[List[set], List[Tuple[int, ...]], Solutions, int, Any]: A list of solutions in the
+        form chosen by `output`, the number of solutions when `count` is `True`, or `sink`.
+
+    Raises:
+        ExactCoverSearchStopped: The search was stopped by `max_nodes`, `timeout` or `cancel`
+            before it was complete. The solutions found so far, their number, or the sink they
+            were written to, are in its `result` attribute. With `decompose`, no solution is
+            complete until every component is solved, so the result is empty.
+        ValueError: `checkpoint` holds the position of a different problem or is not a
+            checkpoint file.
     """
+    budget = _make_budget(max_nodes, timeout, cancel, progress, progress_every)
+    if not isinstance(stats, SearchStats):
+        stats = None
+    indexed = output in ('indices', 'array') and count is not True
+    result = None
+    if not (isinstance(symmetries, list) and orbits is True):
+        if callable(getattr(sink, 'append', None)) and count is not True:
+            indexed = True
+            result = sink
+        elif output == 'array':
+            result = Solutions(list(subsets_rows))
+    if isinstance(symmetries, list):
+        solutions = _symmetric_setup(universe_columns, subsets_rows, limit, randomize, preseed,
+                                     engine, secondary, symmetries, orbits is True, budget, stats,
+                                     indexed)
+        return _collect(solutions, count is True, orbits=orbits is True, result=result)
+    if decompose is True:
+        parts = _timed_decompose(universe_columns, subsets_rows, preseed, secondary, stats)
+        if count is True:
+            return _count_components(parts, limit, engine, memo, secondary, budget, stats)
+        index = _row_indices(subsets_rows, None) if indexed else None
+        return _collect(_iter_components(parts, limit, randomize, engine, secondary, budget,
+                                         stats, index), False, result=result)
+    if isinstance(checkpoint, (str, os.PathLike)):
+        solutions, found = _checkpoint_setup(universe_columns, subsets_rows, limit, preseed,
+                                             count is True, engine, secondary, checkpoint,
+                                             checkpoint_every, budget, stats, indexed)
+        return _collect(solutions, count is True, found, result=result)
+    return _solve_search(universe_columns, subsets_rows, limit, randomize, preseed, count is True,
+                         engine, memo, secondary, budget, stats, indexed, result)
 
-    def _reduce_and_update(row, sr_backtrack, uc_backtrack):
-        for co_uc_idx in SR[row]:
-            if co_uc_idx not in UC:
-                # contradiction
-                return False
-            for co_sr_idx in UC[co_uc_idx]:
-                if co_sr_idx in sr_backtrack:
-                    continue
-                sr_backtrack[co_sr_idx] = set()
-                for other_uc_idx in SR[co_sr_idx]:
-                    if other_uc_idx not in SR[row]:
-                        sr_backtrack[co_sr_idx].add(other_uc_idx)
-                        del UC[other_uc_idx][co_sr_idx]
-            uc_backtrack[co_uc_idx] = UC[co_uc_idx]
-            del UC[co_uc_idx]
-        partial.add(row)
+
+def _solve_search(universe_columns, subsets_rows, limit, randomize, preseed, count, engine, memo,
+                  secondary, budget=None, stats=None, indexed=False, result=None):
+    """Return the solutions of a plain search, or their number when `count` is true.
+
+    The solutions are sets of row keys, or tuples of row indices when `indexed` is true, appended
+    to `result` when it is given.
+    """
+    _memo = _make_limit(memo)
+    if count and _memo is not None:
+        start = time.perf_counter()
+        search_engine, preseed_rows, row_keys = _prepare(universe_columns, subsets_rows, False,
+                                                         preseed, engine, secondary)
+        if preseed_rows is None:
+            return 0
+        masks = _row_masks(universe_columns, subsets_rows)
+        if row_keys is not None:
+            masks = [masks[s_key] for s_key in row_keys]
+        if stats is None:
+            return _count_memoized(search_engine, preseed_rows, _make_limit(limit), masks, _memo,
+                                   budget=budget)
+        search_engine = _instrument(search_engine, preseed_rows, stats, start)
+        start = time.perf_counter()
+        try:
+            return _count_memoized(search_engine, preseed_rows, _make_limit(limit), masks, _memo,
+                                   budget=budget)
+        finally:
+            stats.search_time += time.perf_counter() - start
+    solutions = _setup(universe_columns, subsets_rows, limit, randomize, preseed, count, engine,
+                       secondary, budget, stats, indexed)
+    return _collect(solutions, count, result=result)
+
+
+def iter_solve(universe_columns: Union[Dict[Hashable, Any], List[Hashable], set, str,
+                                       Tuple[Hashable]],
+               subsets_rows: Dict[Hashable, set],
+               limit: Optional[int] = None, randomize: bool = False,
+               preseed: Optional[set] = None,
+               engine: Optional[str] = None,
+               secondary: Optional[set] = None, decompose: bool = False,
+               symmetries: Optional[List[Dict[Hashable, Hashable]]] = None,
+               orbits: bool = False, checkpoint: Optional[str] = None,
+               checkpoint_every: int = 100000, max_nodes: Optional[int] = None,
+               timeout: Optional[float] = None, cancel: Optional[Any] = None,
+               progress: Optional[Callable[[int, int, int], Any]] = None,
+               progress_every: int = 10000,
+               stats: Optional[SearchStats] = None,
+               output: Optional[str] = None) -> Iterator[Union[set, Tuple[int, ...]]]:
+    """Yield the solutions of an exact cover problem as they are found.
+
+    The search is suspended between solutions, so solutions can be streamed, or the search can be
+    stopped early, without holding every solution in memory. The arguments are validated when
+    `iter_solve` is called, not when the first solution is requested.
+
+    Args:
+        universe_columns:
+            The set of elements in the universe/columns. Duplicate elements are silently ignored.
+        subsets_rows:
+            The collection of subsets in `universe_columns` of type dict.  The values are python
+            set objects that is a subset of `universe_columns`.
+        limit:
+            A positive integer. The number of solutions yielded is <= `limit`. This option is
+            ignored if the value is not a positive integer. Default: `None`
+        randomize:
+            When `true`, solutions are yielded in random order. This option is ignored if the
+            value is not a boolean. Default: `False`
+        preseed:
+            A set of hashable row objects used to preseed a partial solution. This option is
+            ignored if the value is not a set object. Default: `None`
+        engine:
+            The search engine, as in `solve`. Default: `None`
+        secondary:
+            The elements that are covered at most once, as in `solve`. Default: `None`
+        decompose:
+            When `True`, the independent components are solved on their own, as in `solve`. The
+            solutions of every component are found before the first solution is yielded.
+            Default: `False`
+        symmetries:
+            The permutations of `universe_columns` whose orbits yield one solution each, as in
+            `solve`. Default: `None`
+        orbits:
+            When `True` and `symmetries` is given, pairs of a solution and the size of its orbit
+            are yielded, as in `solve`. Default: `False`
+        checkpoint:
+            The path of a file where the position of the search is saved, as in `solve`. The
+            saved position is always past the solutions already yielded, so a resumed search
+            yields the solutions after them. Solutions yielded after the last save are yielded
+            again if the process dies, but when the iterator is closed, for example by leaving a
+            `for` loop, the position after the last solution yielded is saved. Default: `None`
+        checkpoint_every:
+            The number of search nodes between two saves of `checkpoint`. Default: `100000`
+        max_nodes:
+            The number of nodes after which the search is stopped, as in `solve`. Default: `None`
+        timeout:
+            The number of seconds after which the search is stopped, as in `solve`. The time
+            counts from the call to `iter_solve` and includes the time spent between solutions.
+            Default: `None`
+        cancel:
+            An object whose `is_set()` method stops the search, as in `solve`. Default: `None`
+        progress:
+            A function called with the progress of the search, as in `solve`. Default: `None`
+        progress_every:
+            The number of nodes between two calls of `progress`. Default: `10000`
+        stats:
+            A `SearchStats` object to fill in, as in `solve`. Default: `None`
+        output:
+            With `'indices'`, each solution is a sorted tuple of the indices of its subsets in
+            `subsets_rows`, as in `solve`. This option is ignored if the value is not
+            `'indices'`. Default: `None`
+
+    Returns:
+        Iterator[Union[set, Tuple[int, ...]]]: An iterator over the solutions, in the same order
+        as `solve`.
+
+    Raises:
+        ExactCoverSearchStopped: The search was stopped by `max_nodes`, `timeout` or `cancel`,
+            after yielding the solutions found before. Raised by the iterator.
+        ValueError: `checkpoint` holds the position of a different problem or is not a
+            checkpoint file.
+    """
+    budget = _make_budget(max_nodes, timeout, cancel, progress, progress_every)
+    if not isinstance(stats, SearchStats):
+        stats = None
+    indexed = output == 'indices'
+    if isinstance(symmetries, list):
+        return _symmetric_setup(universe_columns, subsets_rows, limit, randomize, preseed, engine,
+                                secondary, symmetries, orbits is True, budget, stats, indexed)
+    if decompose is True:
+        return _iter_components(_timed_decompose(universe_columns, subsets_rows, preseed,
+                                                 secondary, stats),
+                                limit, randomize, engine, secondary, budget, stats,
+                                _row_indices(subsets_rows, None) if indexed else None)
+    if isinstance(checkpoint, (str, os.PathLike)):
+        return _checkpoint_setup(universe_columns, subsets_rows, limit, preseed, False, engine,
+                                 secondary, checkpoint, checkpoint_every, budget, stats,
+                                 indexed)[0]
+    return _setup(universe_columns, subsets_rows, limit, randomize, preseed, False, engine,
+                  secondary, budget, stats, indexed)
+
+
+def _collect(solutions, count, found=0, orbits=False, result=None):
+    """Return the list of `solutions`, or `found` plus their number when `count` is true.
+
+    With `orbits`, the solutions are pairs of a solution and the size of its orbit, which is what
+    they count for. The solutions are appended to `result` when it is given, such as a
+    `Solutions`. If the search is stopped, the result so far is stored in the exception.
+    """
+    if count:
+        result = found
+    elif result is None:
+        result = []
+    try:
+        if not count:
+            for solution in solutions:
+                result.append(solution)
+        elif orbits:
+            for _, size in solutions:
+                result += size
+        else:
+            for _ in solutions:
+                result += 1
+    except ExactCoverSearchStopped as stopped:
+        stopped.result = result
+        raise
+    return result
+
+
+def _make_budget(max_nodes, timeout, cancel, progress, progress_every):
+    """Return the `_Budget` of the options, or `None` when they are all ignored."""
+    max_nodes = _make_limit(max_nodes)
+    if not isinstance(timeout, (int, float)) or isinstance(timeout, bool) or timeout <= 0:
+        timeout = None
+    if not callable(getattr(cancel, 'is_set', None)):
+        cancel = None
+    if not callable(progress):
+        progress = None
+    if max_nodes is None and timeout is None and cancel is None and progress is None:
+        return None
+    return _Budget(max_nodes, timeout, cancel, progress, _make_limit(progress_every) or 10000)
+
+
+class _Budget:
+    """The node, time and cancellation limits of a search, and its progress callback.
+
+    The search calls `step` when it enters a node, which counts the node, calls the callback every
+    `progress_every` nodes and raises `ExactCoverSearchStopped` once a limit is reached.
+    """
+
+    def __init__(self, max_nodes, timeout, cancel, progress, progress_every):
+        """Start the clock."""
+        self.nodes = 0
+        self.max_nodes = max_nodes
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.cancel = cancel
+        self.progress = progress
+        self.progress_every = progress_every
+
+    def step(self, depth, found):
+        """Enter a node at `depth` subsets below the preseed, with `found` solutions so far."""
+        if self.max_nodes is not None and self.nodes == self.max_nodes:
+            raise ExactCoverSearchStopped('max_nodes', self.nodes, found)
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise ExactCoverSearchStopped('timeout', self.nodes, found)
+        if self.cancel is not None and self.cancel.is_set():
+            raise ExactCoverSearchStopped('cancel', self.nodes, found)
+        self.nodes += 1
+        if self.progress is not None and not self.nodes % self.progress_every:
+            self.progress(depth, self.nodes, found)
+
+
+def _instrument(engine, preseed_rows, stats, start):
+    """Return `engine` wrapped to count the search in `stats`, adding the setup time since `start`.
+
+    `start` is a `time.perf_counter` value.
+    """
+    stats.setup_time += time.perf_counter() - start
+    return _StatsEngine(engine, stats, len(preseed_rows))
+
+
+def _timed(solutions, stats):
+    """Yield from the generator `solutions`, adding the time spent in it to `stats.search_time`."""
+    start = time.perf_counter()
+    try:
+        for solution in solutions:
+            stats.search_time += time.perf_counter() - start
+            start = None
+            yield solution
+            start = time.perf_counter()
+    finally:
+        if start is not None:
+            stats.search_time += time.perf_counter() - start
+        solutions.close()
+
+
+def _setup(universe_columns, subsets_rows, limit, randomize, preseed, count, engine, secondary,
+           budget=None, stats=None, indexed=False):
+    """Build the search engine and return an iterator over its solutions.
+
+    The solutions are tuples of row indices when `indexed` is true.
+    """
+    start = time.perf_counter()
+    search_engine, preseed_rows, row_keys = _prepare(universe_columns, subsets_rows,
+                                                     randomize is True, preseed, engine,
+                                                     secondary)
+    if preseed_rows is None:
+        return iter(())
+    indices = _row_indices(subsets_rows, row_keys) if indexed else None
+    if stats is None:
+        return _search(search_engine, preseed_rows, _make_limit(limit), count, row_keys,
+                       budget=budget, indices=indices)
+    search_engine = _instrument(search_engine, preseed_rows, stats, start)
+    return _timed(_search(search_engine, preseed_rows, _make_limit(limit), count, row_keys,
+                          budget=budget, indices=indices), stats)
+
+
+def _prepare(universe_columns, subsets_rows, randomize, preseed, engine, secondary=None):
+    """Return the engine named by `engine`, the rows of `preseed` in it and its row keys.
+
+    The preseed rows are `None` when two of them share a column.
+    """
+    search_engine, row_keys, row_index = _build_engine(universe_columns, subsets_rows, randomize,
+                                                       engine, secondary)
+    _preseed = _check_preseed(preseed, subsets_rows)
+    if _preseed is not None and row_index is not None:
+        _preseed = [row_index[r] for r in _preseed]
+    return search_engine, _preseed, row_keys
+
+
+def _build_engine(universe_columns, subsets_rows, randomize, engine, secondary=None):
+    """Return the engine named by `engine`, its row keys and a map from row keys to its rows.
+
+    The row keys and the map are `None` for the dict engine, whose rows are the row keys.
+    """
+    if not isinstance(secondary, set):
+        secondary = set()
+    engine = _engine_name(universe_columns, engine)
+    if engine == 'dict':
+        return _DictEngine(universe_columns, subsets_rows, randomize, secondary), None, None
+    columns, row_keys, row_columns = _intern(universe_columns, subsets_rows, randomize)
+    secondary_columns = [col for col, u_element in enumerate(columns) if u_element in secondary]
+    search_engine = (DLX if engine == 'dlx' else Bitset)(len(columns), row_columns,
+                                                         secondary_columns)
+    return search_engine, row_keys, {s_key: row for row, s_key in enumerate(row_keys)}
+
+
+def _row_indices(subsets_rows, row_keys):
+    """Return the index in `subsets_rows` of each row of an engine whose rows are `row_keys`.
+
+    The result is a list, or a dict for the dict engine, whose rows are the row keys themselves
+    and `row_keys` is `None`.
+    """
+    index = {s_key: i for i, s_key in enumerate(subsets_rows)}
+    return index if row_keys is None else [index[s_key] for s_key in row_keys]
+
+
+def _engine_name(universe_columns, engine):
+    """Return the name of the engine that the `engine` option selects for `universe_columns`."""
+    if engine in ('dict', 'dlx', 'bitset'):
+        return engine
+    return 'bitset' if len(set(universe_columns)) <= BITSET_MAX_COLUMNS else 'dict'
+
+
+def _search(engine, preseed_rows, limit, count, row_keys, shuffle_rows=False, budget=None,
+            hooks=None, indices=None):
+    """Return an iterator over the solutions found by `engine` after covering `preseed_rows`.
+
+    An engine provides `choose()`, which returns the rows of the next column to branch on, or
+    `None` when all columns are covered, and `cover(row)` and `uncover(row)`, which select a row
+    and undo the most recent selection. Solutions are decoded through `row_keys` unless it is
+    `None`, or into sorted tuples of `indices[row]` when `indices` is given. When `count` is true
+    the live list of chosen rows is yielded instead of a solution.
+    When `shuffle_rows` is true the rows are tried in random order at every node. `budget` is a
+    `_Budget` whose `step` is called at every node, or `None`. `hooks` is a `_Hooks` that can
+    resume the search from a position, save its position, and prune the rows tried and the
+    solutions yielded, or `None`.
+
+    The engine is left as it was found once the iterator is exhausted or closed.
+    """
 
     def _solve():
-        nonlocal results
-        if not UC:
-            # Solution was found
-            if not _count:
-                results.append(partial.copy())
-            else:
-                results += 1
-            return True
+        # Choice stack: the iterator over the rows of the selected column at each depth, and the
+        # index of the row it returned last
+        row_iters = []
+        positions = []
+        found = 0 if hooks is None else hooks.found
+        # Set when the search must save its position and stop once it has left the current node
+        stop = False
+        with _preseeded(engine, preseed_rows) as chosen:
+            depth = len(chosen)
+            if hooks is not None:
+                if hooks.path is None or limit is not None and found >= limit:
+                    return
+                for i in hooks.path:
+                    rows = engine.choose()
+                    row_iter = iter(hooks.branch(() if rows is None else rows))
+                    row = next(islice(row_iter, i, None), _EXHAUSTED) if i >= 0 else _EXHAUSTED
+                    if row is _EXHAUSTED:
+                        raise ValueError(f'{hooks.path} is not a position of this search')
+                    row_iters.append(row_iter)
+                    positions.append(i)
+                    engine.cover(row)
+                    chosen.append(row)
+                    hooks.advance(row)
+            while True:
+                if stop:
+                    hooks.save(positions, found)
+                    return
+                if hooks is not None:
+                    hooks.node(positions, found)
+                if budget is not None:
+                    try:
+                        budget.step(len(chosen) - depth, found)
+                    except ExactCoverSearchStopped:
+                        if hooks is not None:
+                            hooks.save(positions, found)
+                        raise
+                rows = engine.choose()
+                if rows is None:
+                    # Solution was found
+                    if count:
+                        solution = chosen
+                    elif indices is not None:
+                        solution = tuple(sorted([indices[row] for row in chosen]))
+                    elif row_keys is None:
+                        solution = set(chosen)
+                    else:
+                        solution = {row_keys[row] for row in chosen}
+                    if hooks is not None:
+                        solution = hooks.solution(chosen, solution)
+                    if solution is not None:
+                        try:
+                            yield solution
+                        except GeneratorExit:
+                            if hooks is None:
+                                raise
+                            # Closed after the solution was used: stop past it
+                            stop = True
+                        found += 1
+                        if limit is not None and found >= limit:
+                            if hooks is None:
+                                return
+                            stop = True
+                else:
+                    if shuffle_rows:
+                        rows = list(rows)
+                        shuffle(rows)
+                    if hooks is not None:
+                        rows = hooks.branch(rows)
+                    # A universe element not covered by any subset has no rows, so the loop
+                    # below backtracks straight away
+                    row_iters.append(iter(rows))
+                    positions.append(-1)
+
+                while row_iters:
+                    if len(chosen) - depth == len(row_iters):
+                        # Backtrack: Restore cols & rows; Remove row from partial solution
+                        engine.uncover(chosen.pop())
+                    selected_row_idx = next(row_iters[-1], _EXHAUSTED)
+                    if selected_row_idx is not _EXHAUSTED:
+                        positions[-1] += 1
+                        engine.cover(selected_row_idx)
+                        chosen.append(selected_row_idx)
+                        if hooks is not None:
+                            hooks.advance(selected_row_idx)
+                        break
+                    row_iters.pop()
+                    positions.pop()
+                    if hooks is not None:
+                        hooks.backtrack()
+                else:
+                    if hooks is not None:
+                        hooks.save(None, found)
+                    return
+
+    return _solve()
+
+
+@contextmanager
+def _preseeded(engine, preseed_rows):
+    """Cover `preseed_rows` and give the list of covered rows, which is uncovered on exit.
+
+    Rows that the caller covers are appended to the list and popped when they are uncovered, so
+    the engine is left as it was found however the caller exits.
+    """
+    chosen = []
+    try:
+        for row in preseed_rows:
+            engine.cover(row)
+            chosen.append(row)
+        yield chosen
+    finally:
+        while chosen:
+            engine.uncover(chosen.pop())
+
+
+class _Hooks:
+    """Callbacks through which `_search` is resumed, saved and pruned.
+
+    The search calls `branch` with the rows of each node and tries the rows it returns, calls
+    `advance` after covering one of them and `backtrack` when the node is left. It passes each
+    solution to `solution`, which returns the value to yield or `None` to skip it. A position is
+    the list of the index of the row being tried at each depth, among the rows `branch` returned.
+    The search starts from the position `path`, or finds nothing if it is `None`, with `found`
+    solutions already counted. It calls `node` with its position before entering each node, and
+    `save` when it stops: with the position to resume from, or `None` when the search is over.
+    The methods of this class do nothing.
+    """
+
+    found = 0
+    path = ()
+
+    def branch(self, rows):
+        """Return the rows to try at a node with `rows`."""
+        return rows
+
+    def advance(self, row):
+        """Handle the covering of `row` by the node on top of the stack."""
+
+    def backtrack(self):
+        """Handle the end of the node on top of the stack."""
+
+    def solution(self, chosen, solution):
+        """Return the value to yield for `solution`, whose rows are `chosen`, or `None`."""
+        return solution
+
+    def node(self, positions, found):
+        """Handle the entry to the node at `positions`, with `found` solutions so far."""
+
+    def save(self, positions, found):
+        """Handle the end of the search, to be resumed from `positions`."""
+
+
+def _checkpoint_setup(universe_columns, subsets_rows, limit, preseed, count, engine, secondary,
+                      checkpoint, every, budget=None, stats=None, indexed=False):
+    """Build an integer engine and return an iterator that saves its position to `checkpoint`.
+
+    The number of solutions found before the position read from `checkpoint` is also returned. The
+    problem is identified in the file by a CRC of its columns and rows numbered from zero. The
+    solutions are tuples of row indices when `indexed` is true.
+    """
+    start = time.perf_counter()
+    if engine not in ('dlx', 'bitset'):
+        engine = 'bitset' if len(set(universe_columns)) <= BITSET_MAX_COLUMNS else 'dlx'
+    if not isinstance(secondary, set):
+        secondary = set()
+    columns, row_keys, row_columns = _intern(universe_columns, subsets_rows, False)
+    secondary_columns = [col for col, u_element in enumerate(columns) if u_element in secondary]
+    _preseed = _check_preseed(preseed, subsets_rows)
+    if _preseed is None:
+        return iter(()), 0
+    row_index = {s_key: row for row, s_key in enumerate(row_keys)}
+    preseed_rows = sorted(row_index[r] for r in _preseed)
+    fingerprint = zlib.crc32(repr((engine, len(columns), [sorted(cols) for cols in row_columns],
+                                   secondary_columns, preseed_rows)).encode())
+    hooks = _Checkpoint(checkpoint, _make_limit(every) or 100000, fingerprint)
+    if os.path.exists(checkpoint):
+        with open(checkpoint) as f:
+            state = json.load(f)
+        if not isinstance(state, dict) or state.get('fingerprint') != fingerprint:
+            raise ValueError(f'{checkpoint} is not a checkpoint of this problem')
+        hooks.found = state['found']
+        hooks.path = state['path']
+    search_engine = (DLX if engine == 'dlx' else Bitset)(len(columns), row_columns,
+                                                         secondary_columns)
+    # The rows are numbered in the order of `subsets_rows`
+    indices = range(len(row_keys)) if indexed else None
+    if stats is None:
+        return _search(search_engine, preseed_rows, _make_limit(limit), count, row_keys,
+                       budget=budget, hooks=hooks, indices=indices), hooks.found
+    search_engine = _instrument(search_engine, preseed_rows, stats, start)
+    return _timed(_search(search_engine, preseed_rows, _make_limit(limit), count, row_keys,
+                          budget=budget, hooks=hooks, indices=indices), stats), hooks.found
+
+
+class _Checkpoint(_Hooks):
+    """Hooks that save the position of the search to the file `checkpoint` every `every` nodes.
 
-        selected_uc = min(UC, key=lambda x: len(UC[x]))
-        if not UC[selected_uc]:
-            # There is no solution if this universe element is not covered by any subset
+    The file holds the position, the number of solutions found so far and `fingerprint`. The
+    position is saved before the node is entered, so resuming from it explores the node again.
+    It is also saved when the search stops, and it is `None` once the search is over.
+    """
+
+    def __init__(self, checkpoint, every, fingerprint):
+        """Start from the root with no solutions found."""
+        self.checkpoint = checkpoint
+        self.every = every
+        self.fingerprint = fingerprint
+        self.found = 0
+        self.path = []
+        self.nodes = 0
+
+    def node(self, positions, found):
+        """Save the position every `every` nodes."""
+        self.nodes += 1
+        if self.nodes == self.every:
+            self.nodes = 0
+            self.save(positions, found)
+
+    def save(self, positions, found):
+        """Write the position to a new file and rename it over the checkpoint.
+
+        A crash while saving leaves the previous checkpoint.
+        """
+        temp = f'{self.checkpoint}.tmp'
+        with open(temp, 'w') as f:
+            json.dump({'fingerprint': self.fingerprint, 'found': found, 'path': positions}, f,
+                      separators=(',', ':'))
+        os.replace(temp, self.checkpoint)
+
+
+def _symmetric_setup(universe_columns, subsets_rows, limit, randomize, preseed, engine, secondary,
+                     symmetries, orbits, budget=None, stats=None, indexed=False):
+    """Build the search engine and return an iterator over one solution per orbit.
+
+    The rows are numbered by their position in `subsets_rows` and the group generated by
+    `symmetries` is enumerated as tuples that map row numbers to row numbers. The search is pruned
+    by `_Orbits`. The solutions are tuples of row numbers when `indexed` is true.
+    """
+    start = time.perf_counter()
+    search_engine, preseed_rows, row_keys = _prepare(universe_columns, subsets_rows,
+                                                     randomize is True, preseed, engine,
+                                                     secondary)
+    if preseed_rows is None:
+        return iter(())
+    # The number of each engine row
+    rank = _row_indices(subsets_rows, row_keys)
+    group = _row_group(universe_columns, subsets_rows, list(subsets_rows), symmetries)
+    preseed_set = {rank[row] for row in preseed_rows}
+    group = [perm for perm in group if {perm[i] for i in preseed_set} == preseed_set]
+    hooks = _Orbits(group, rank, orbits)
+    indices = rank if indexed else None
+    if stats is None:
+        return _search(search_engine, preseed_rows, _make_limit(limit), False, row_keys,
+                       budget=budget, hooks=hooks, indices=indices)
+    search_engine = _instrument(search_engine, preseed_rows, stats, start)
+    return _timed(_search(search_engine, preseed_rows, _make_limit(limit), False, row_keys,
+                          budget=budget, hooks=hooks, indices=indices), stats)
+
+
+class _Orbits(_Hooks):
+    """Hooks that prune the search to one solution per orbit of the row permutations `group`.
+
+    Each node keeps the permutations that fix every chosen row, and only tries one row of each
+    orbit of those that also map the rows of the selected column onto themselves. Every orbit
+    still has a solution in the pruned tree, and solutions whose orbit was already yielded are
+    skipped by their canonical form: the least of their images, comparing the sorted row numbers.
+    With `orbits`, each solution is yielded with the size of its orbit. `rank` gives the number
+    of each engine row.
+    """
+
+    def __init__(self, group, rank, orbits):
+        """Start at the root, where the whole group fixes the chosen rows."""
+        self.group = group
+        self.rank = rank
+        self.orbits = orbits
+        self.node_group = group
+        # The permutations that fix the chosen rows of each node on the stack
+        self.groups = []
+        # The canonical forms of the orbits yielded so far
+        self.seen = set()
+
+    def branch(self, rows):
+        """Return the first row of each orbit of `rows`."""
+        self.groups.append(self.node_group)
+        if len(self.node_group) > 1:
+            return _orbit_representatives(rows, self.node_group, self.rank)
+        return rows
+
+    def advance(self, row):
+        """Keep the permutations of the node that also fix `row`."""
+        i = self.rank[row]
+        self.node_group = [perm for perm in self.groups[-1] if perm[i] == i]
+
+    def backtrack(self):
+        """Forget the permutations of the node."""
+        self.groups.pop()
+
+    def solution(self, chosen, solution):
+        """Return `solution` unless its orbit was already yielded."""
+        canonical, size = _canonical_form([self.rank[row] for row in chosen], self.group)
+        if canonical in self.seen:
+            return None
+        self.seen.add(canonical)
+        return (solution, size) if self.orbits else solution
+
+
+def _orbit_representatives(rows, group, rank):
+    """Return the first of `rows` in each orbit of the permutations mapping `rows` onto themselves.
+
+    The permutations are those of `group` and `rank` gives the number of each row.
+    """
+    rows = list(rows)
+    column = {rank[row] for row in rows}
+    stabilizer = [perm for perm in group if all(perm[i] in column for i in column)]
+    seen = set()
+    representatives = []
+    for row in rows:
+        if rank[row] not in seen:
+            seen.update(perm[rank[row]] for perm in stabilizer)
+            representatives.append(row)
+    return representatives
+
+
+def _row_group(universe_columns, subsets_rows, keys, symmetries):
+    """Return the permutations of the row numbers in the group generated by `symmetries`.
+
+    Each column permutation in `symmetries` is turned into a row permutation by mapping each row
+    to the row with the image of its columns. Rows with the same columns are mapped in order.
+    Permutations that are not dicts, do not permute the columns or do not map every row onto a
+    row are skipped.
+    """
+    columns = list(dict.fromkeys(universe_columns))
+    rows_by_columns = {}
+    for i, s_key in enumerate(keys):
+        rows_by_columns.setdefault(frozenset(subsets_rows[s_key]), []).append(i)
+    generators = []
+    for perm in symmetries:
+        if not isinstance(perm, dict):
+            continue
+        if set(perm.get(u_key, u_key) for u_key in columns) != set(columns):
+            continue
+        image = [None] * len(keys)
+        for cols, rows in rows_by_columns.items():
+            image_rows = rows_by_columns.get(frozenset(perm.get(u_key, u_key) for u_key in cols))
+            if image_rows is None or len(image_rows) != len(rows):
+                break
+            for i, j in zip(rows, image_rows):
+                image[i] = j
+        else:
+            generators.append(tuple(image))
+    identity = tuple(range(len(keys)))
+    group = {identity}
+    frontier = [identity]
+    while frontier:
+        new_perms = []
+        for perm in frontier:
+            for generator in generators:
+                product_perm = tuple(generator[i] for i in perm)
+                if product_perm not in group:
+                    group.add(product_perm)
+                    new_perms.append(product_perm)
+        frontier = new_perms
+    return list(group)
+
+
+def _canonical_form(solution, group):
+    """Return the least image of `solution` under `group` and the number of its images.
+
+    `solution` is a list of row numbers and images are compared as sorted tuples.
+    """
+    images = {tuple(sorted(perm[i] for i in solution)) for perm in group}
+    return min(images), len(images)
+
+
+def _decompose(universe_columns, subsets_rows, preseed, secondary):
+    """Return the preseed rows and the components of the problem left after covering them.
+
+    Each component is a pair of a list of columns and a dict of the rows over them. Rows that
+    share a column are in the same component. Rows that are empty, conflict with the preseed or
+    only have secondary columns are never part of a solution and are left out. `None` is
+    returned when two preseed rows share a column.
+    """
+    columns = {}
+    for u_element in universe_columns:
+        columns.setdefault(u_element, len(columns))
+    for s_key, u_subset in subsets_rows.items():
+        for u_key in u_subset:
+            if u_key not in columns:
+                raise ExactCoverKeyError('BadUKey', (u_key, s_key))
+    preseed_rows = _check_preseed(preseed, subsets_rows)
+    if preseed_rows is None:
+        return None
+    _secondary = secondary if isinstance(secondary, set) else set()
+    covered = set()
+    for s_key in preseed_rows:
+        covered.update(subsets_rows[s_key])
+    # Union-find over the column numbers
+    parent = list(range(len(columns)))
+
+    def find(col):
+        while parent[col] != col:
+            parent[col] = parent[parent[col]]
+            col = parent[col]
+        return col
+
+    rows = []
+    for s_key, u_subset in subsets_rows.items():
+        if u_subset and covered.isdisjoint(u_subset) and not u_subset <= _secondary:
+            rows.append(s_key)
+            cols = [columns[u_key] for u_key in u_subset]
+            root = find(cols[0])
+            for col in cols[1:]:
+                parent[find(col)] = root
+    components = {}
+    for u_element, col in columns.items():
+        if u_element not in covered:
+            components.setdefault(find(col), ([], {}))[0].append(u_element)
+    for s_key in rows:
+        u_key = next(iter(subsets_rows[s_key]))
+        components[find(columns[u_key])][1][s_key] = subsets_rows[s_key]
+    return preseed_rows, list(components.values())
+
+
+def _timed_decompose(universe_columns, subsets_rows, preseed, secondary, stats):
+    """Return `_decompose` of the problem, adding the time it takes to the setup time of `stats`.
+
+    `stats` is a `SearchStats` or `None`.
+    """
+    start = time.perf_counter()
+    parts = _decompose(universe_columns, subsets_rows, preseed, secondary)
+    if stats is not None:
+        stats.setup_time += time.perf_counter() - start
+    return parts
+
+
+def _count_components(parts, limit, engine, memo, secondary, budget=None, stats=None):
+    """Return the product of the number of solutions of each component of `parts`.
+
+    The components are searched within the same `budget` and counted in the same `stats`. If the
+    budget stops a search, no solution has been counted.
+    """
+    if parts is None:
+        return 0
+    total = 1
+    # Solve the smallest components first, so an unsolvable one is found early
+    for cols, rows in sorted(parts[1], key=lambda part: len(part[1])):
+        try:
+            total *= _solve_search(cols, rows, None, False, None, True, engine, memo, secondary,
+                                   budget, stats)
+        except ExactCoverSearchStopped as stopped:
+            stopped.result = 0
+            raise
+        if not total:
+            return 0
+    _limit = _make_limit(limit)
+    return total if _limit is None else min(total, _limit)
+
+
+def _iter_components(parts, limit, randomize, engine, secondary, budget=None, stats=None,
+                     index=None):
+    """Yield the unions of the preseed with one solution of each component of `parts`.
+
+    The components are searched within the same `budget` and counted in the same `stats`. If the
+    budget stops a search, no solution has been yielded. When `index` is given, the unions are
+    yielded as sorted tuples of the `index` of their rows.
+    """
+    if parts is None:
+        return
+    preseed_rows, components = parts
+    solutions = []
+    for cols, rows in components:
+        try:
+            solutions.append(_solve_search(cols, rows, None, randomize, None, False, engine, None,
+                                           secondary, budget, stats))
+        except ExactCoverSearchStopped as stopped:
+            stopped.result = []
+            raise
+        if not solutions[-1]:
+            return
+    combined = (set(preseed_rows).union(*chosen) for chosen in product(*solutions))
+    if index is not None:
+        combined = (tuple(sorted([index[s_key] for s_key in solution])) for solution in combined)
+    yield from islice(combined, _make_limit(limit))
+
+
+def _count_memoized(engine, preseed_rows, limit, masks, cache_size, weights=None, budget=None):
+    """Return the number of solutions found by `engine` after covering `preseed_rows`.
+
+    `masks` holds the columns of each row as an int bitmask, so the columns covered at a node are
+    the union of the masks of the chosen rows. The number of solutions below a node only depends on
+    those columns, so it is cached under their mask, for at most `cache_size` masks. Counting
+    stops once `limit` solutions are found. When `weights` is given, each solution counts as the
+    product of the weights of its rows, other than the preseed rows. `budget` is a `_Budget`
+    whose `step` is called at every node that is not found in the cache, or `None`. If it stops
+    the search, the solutions counted so far are stored in the exception.
+    """
+    if weights is None:
+        def combine(rows, counts):
+            return sum(counts)
+    else:
+        def combine(rows, counts):
+            return sum(count * weights[row] for row, count in zip(rows, counts))
+
+    found = 0
+
+    def visit(depth, node_count):
+        nonlocal found
+        if node_count is None:
+            if budget is not None:
+                try:
+                    budget.step(depth, found)
+                except ExactCoverSearchStopped as stopped:
+                    stopped.result = found
+                    raise
             return False
+        found += node_count
+        return limit is not None and found >= limit
+
+    # The solutions found so far are only needed to stop the count
+    count = _fold(engine, preseed_rows, masks, combine, OrderedDict(), cache_size,
+                  None if limit is None and budget is None else visit)
+    return limit if count is None else count
+
+
+def _fold(engine, preseed_rows, masks, combine, cache, cache_size=None, visit=None):
+    """Return the value of the search tree of `engine` after covering `preseed_rows`.
+
+    The tree is folded bottom up: a solution has the value `1`, and a node whose column has the
+    rows `rows` has the value `combine(rows, values)`, where `values` are the values of the nodes
+    below those rows. `masks` holds the columns of each row as an int bitmask. The value of a node
+    only depends on the columns covered by the chosen rows, so it is stored in `cache` under their
+    mask. When `cache_size` is given, `cache` is an `OrderedDict` that keeps the `cache_size` most
+    recently used values. `visit(depth, value)` is called, if given, with `value` `None` before a
+    node that is not in the cache is searched, and with the value of each solution and of each
+    node found in the cache. The fold stops and returns `None` when it returns true.
+    """
+    # Stack of [covered columns, iterator over the rows of the selected column, rows tried, values
+    # of their nodes]
+    frames = []
+    with _preseeded(engine, preseed_rows) as chosen:
+        depth = len(chosen)
+        covered = 0
+        for row in chosen:
+            covered |= masks[row]
+        while True:
+            # Enter the node that covers `covered`
+            value = cache.get(covered)
+            if value is not None:
+                if cache_size is not None:
+                    cache.move_to_end(covered)
+                if visit is not None and visit(len(chosen) - depth, value):
+                    return None
+            else:
+                if visit is not None:
+                    visit(len(chosen) - depth, None)
+                rows = engine.choose()
+                if rows is None:
+                    value = 1
+                    if visit is not None and visit(len(chosen) - depth, value):
+                        return None
+                else:
+                    frames.append([covered, iter(rows), [], []])
+            # Add finished nodes to their parent until a row is left to try
+            while True:
+                if value is not None:
+                    if len(chosen) == depth:
+                        return value
+                    engine.uncover(chosen.pop())
+                    frames[-1][3].append(value)
+                frame = frames[-1]
+                row = next(frame[1], _EXHAUSTED)
+                if row is not _EXHAUSTED:
+                    frame[2].append(row)
+                    break
+                frames.pop()
+                value = combine(frame[2], frame[3])
+                cache[frame[0]] = value
+                if cache_size is not None and len(cache) > cache_size:
+                    cache.popitem(last=False)
+            engine.cover(row)
+            chosen.append(row)
+            covered = frame[0] | masks[row]
+
+
+def _row_masks(universe_columns, subsets_rows):
+    """Return the columns of each row as an int bitmask, keyed by row."""
+    columns = {}
+    for u_element in universe_columns:
+        columns.setdefault(u_element, len(columns))
+    masks = {}
+    for s_key, u_subset in subsets_rows.items():
+        mask = 0
+        for u_key in u_subset:
+            mask |= 1 << columns[u_key]
+        masks[s_key] = mask
+    return masks
+
+
+def _make_limit(limit):
+    if isinstance(limit, int):
+        if limit > 0:
+            return limit
+    return None
+
+
+def _check_preseed(preseed, subsets_rows):
+    """Return the preseed rows, or `None` if two of them share a column.
+
+    `subsets_rows` maps each row to its columns.
+    """
+    if not isinstance(preseed, set):
+        return []
+    for r in preseed:
+        if r not in subsets_rows:
+            raise ExactCoverKeyError('BadPreseed', r)
+    covered = set()
+    for r in preseed:
+        if not covered.isdisjoint(subsets_rows[r]):
+            # contradiction
+            return None
+        covered.update(subsets_rows[r])
+    return list(preseed)
+
+
+def _intern(universe_columns, subsets_rows, randomize):
+    """Return the columns and rows numbered from zero.
+
+    The result holds the column keys, the row keys and the column numbers of each row, with the
+    rows in random order when `randomize` is true.
+    """
+    columns = {}
+    for u_element in universe_columns:
+        columns.setdefault(u_element, len(columns))
+    row_keys = list(subsets_rows)
+    if randomize is True:
+        shuffle(row_keys)
+    row_columns = []
+    for s_key in row_keys:
+        u_subset = []
+        for u_key in subsets_rows[s_key]:
+            if u_key not in columns:
+                raise ExactCoverKeyError('BadUKey', (u_key, s_key))
+            u_subset.append(columns[u_key])
+        row_columns.append(u_subset)
+    return list(columns), row_keys, row_columns
+
 
-        for selected_row_idx in UC[selected_uc]:
-            uc_backtrack = {}
-            sr_backtrack = {}
-            _reduce_and_update(selected_row_idx,
-                               sr_backtrack,
-                               uc_backtrack)
-
-            if _solve() and _limit is not None and (
-                    (_count is True and results >= _limit) or
-                    (_count is False and len(results) >= _limit)
-            ):
-                return True
-
-            # Backtrack: Restore cols & rows; Remove row from partial solution
-            for co_uc_key in uc_backtrack:
-                UC[co_uc_key] = uc_backtrack[co_uc_key]
-            for co_sr_idx in sr_backtrack:
-                for other_uc_idx in sr_backtrack[co_sr_idx]:
-                    UC[other_uc_idx][co_sr_idx] = None
-            partial.remove(selected_row_idx)
-        return False
-
-    def _initialize_sets():
-        nonlocal SR
-        if _randomize is True:
+class _DictEngine:
+    """Search engine over the `UC` dict-of-dicts and `SR` dict-of-sets cross-references.
+
+    `UC` maps each uncovered column to a dict whose keys are the rows that can still cover it. Rows
+    and columns removed by `cover` are recorded in flat trail lists that are allocated once, and
+    `uncover` replays the trail in the order it was written, so each column dict gets its rows back
+    in the same order as they were removed.
+
+    The uncovered primary columns are also kept in `buckets`, a list of dicts indexed by the number
+    of rows left in each column, so the smallest column is found without scanning `UC`. Ties go to
+    the column that comes first in `UC`, as with `min(UC, ...)`. `UC` keeps its columns in the
+    order they were last inserted, which `stamps` records with an increasing counter.
+
+    Secondary columns stay in `UC`, so covering a row still removes the rows that share one of them
+    with it, but they are never put in `buckets`. The last bucket holds a sentinel, so `choose`
+    reaches it only when no primary column is left.
+    """
+
+    def __init__(self, universe_columns, subsets_rows, randomize, secondary=()):
+        """Build the cross-references, the size buckets and the undo trail."""
+        UC = {}
+        if randomize is True:
+            SR = {}
             tmp_sr_idx = list(subsets_rows)
             shuffle(tmp_sr_idx)
             for i in tmp_sr_idx:
@@ -111,47 +1222,113 @@ def solve(universe_columns: Union[Dict[Hashable, Any], List[Hashable], set, str,
                 if u_key not in UC:
                     raise ExactCoverKeyError('BadUKey', (u_key, s_key))
                 UC[u_key][s_key] = None
+        self.UC = UC
+        self.SR = SR
+        self.secondary = frozenset(u_element for u_element in secondary if u_element in UC)
+        self.buckets = [{} for _ in range(1 + max(map(len, UC.values()), default=0))]
+        self.buckets.append({_EXHAUSTED: None})
+        for u_element, u_rows in UC.items():
+            if u_element not in self.secondary:
+                self.buckets[len(u_rows)][u_element] = None
+        self.stamps = {u_element: stamp for stamp, u_element in enumerate(UC)}
+        self.next_stamp = len(UC)
+        # Every (column, row) entry removed from UC is recorded at most once until it is
+        # restored, and so is every covered column
+        self.row_trail = [None] * (2 * sum(len(u_subset) for u_subset in SR.values()))
+        self.col_trail = [None] * (2 * len(UC))
+        self.row_top = 0
+        self.col_top = 0
+        self.marks = []
+        self.seen = set()
 
-    def _make_limit():
-        if isinstance(limit, int):
-            if limit > 0:
-                return limit
-        return None
+    def choose(self):
+        """Return the rows of the uncovered primary column with the fewest rows, or `None`."""
+        buckets = self.buckets
+        size = 0
+        while not buckets[size]:
+            size += 1
+        if size == len(buckets) - 1:
+            return None
+        bucket = buckets[size]
+        if len(bucket) == 1:
+            return self.UC[next(iter(bucket))]
+        return self.UC[min(bucket, key=self.stamps.__getitem__)]
 
-    def _check_preseed():
-        if isinstance(preseed, set):
-            for r in preseed:
-                if r not in SR:
-                    raise ExactCoverKeyError('BadPreseed', r)
-            return deepcopy(preseed)
-        return set()
-
-    def _do_preseed():
-        while len(_preseed) > 0:
-            row = _preseed.pop()
-            sr_backtrack = {}
-            uc_backtrack = {}
-            if _reduce_and_update(row, sr_backtrack, uc_backtrack) is False:
-                return False
-
-    def _check_count():
-        if count is True:
-            return True
-        return False
-
-    partial = set()
-    UC = {}
-    SR = {}
-    _randomize = True if randomize is True else False
-    _initialize_sets()
-    _count = _check_count()
-    results = [] if not _count else 0
-    _limit = _make_limit()
-    _preseed = _check_preseed()
-    if _do_preseed() is False:
-        return results
-    _solve()
-    return results
+    def conflicts(self, row):
+        """Return the number of rows that `cover(row)` removes, `row` included."""
+        return len({s_key for u_key in self.SR[row] for s_key in self.UC[u_key]})
+
+    def cover(self, row):
+        """Remove the columns of `row` and every row that shares a column with it."""
+        UC = self.UC
+        SR = self.SR
+        buckets = self.buckets
+        secondary = self.secondary
+        seen = self.seen
+        row_trail = self.row_trail
+        col_trail = self.col_trail
+        row_top = self.row_top
+        col_top = self.col_top
+        self.marks.append(row_top)
+        self.marks.append(col_top)
+        row_uc = SR[row]
+        for co_uc_idx in row_uc:
+            for co_sr_idx in UC[co_uc_idx]:
+                if co_sr_idx in seen:
+                    continue
+                seen.add(co_sr_idx)
+                for other_uc_idx in SR[co_sr_idx]:
+                    if other_uc_idx not in row_uc:
+                        other_rows = UC[other_uc_idx]
+                        if not secondary or other_uc_idx not in secondary:
+                            size = len(other_rows)
+                            del buckets[size][other_uc_idx]
+                            buckets[size - 1][other_uc_idx] = None
+                        del other_rows[co_sr_idx]
+                        row_trail[row_top] = other_uc_idx
+                        row_trail[row_top + 1] = co_sr_idx
+                        row_top += 2
+            co_rows = UC.pop(co_uc_idx)
+            if not secondary or co_uc_idx not in secondary:
+                del buckets[len(co_rows)][co_uc_idx]
+            col_trail[col_top] = co_uc_idx
+            col_trail[col_top + 1] = co_rows
+            col_top += 2
+        seen.clear()
+        self.row_top = row_top
+        self.col_top = col_top
+
+    def uncover(self, row):
+        """Undo the most recent `cover`."""
+        UC = self.UC
+        buckets = self.buckets
+        secondary = self.secondary
+        stamps = self.stamps
+        row_trail = self.row_trail
+        col_trail = self.col_trail
+        col_mark = self.marks.pop()
+        row_mark = self.marks.pop()
+        for i in range(col_mark, self.col_top, 2):
+            co_uc_idx = col_trail[i]
+            co_rows = col_trail[i + 1]
+            UC[co_uc_idx] = co_rows
+            if not secondary or co_uc_idx not in secondary:
+                buckets[len(co_rows)][co_uc_idx] = None
+            stamps[co_uc_idx] = self.next_stamp
+            self.next_stamp += 1
+            col_trail[i + 1] = None
+        for i in range(row_mark, self.row_top, 2):
+            other_rows = UC[row_trail[i]]
+            if not secondary or row_trail[i] not in secondary:
+                size = len(other_rows)
+                del buckets[size][row_trail[i]]
+                buckets[size + 1][row_trail[i]] = None
+            other_rows[row_trail[i + 1]] = None
+        self.row_top = row_mark
+        self.col_top = col_mark
+
+
+_EXHAUSTED = object()
 
 
 class ExactCoverKeyError(Exception):
@@ -159,7 +1336,8 @@ class ExactCoverKeyError(Exception):
 
     An `exactcover.ExactCoverKeyError` exception is raised when a subset in `subset_rows` contains
     an element that is not in `universe_columns`, or a preseed set contains an element that is not
-    in `subsets_rows`.
+    in `subsets_rows`. `Problem` also raises it when a row or column to remove is not in the
+    problem.
     """
 
     def __init__(self, *args):
@@ -173,11 +1351,46 @@ class ExactCoverKeyError(Exception):
             self.msg = (f'ExactCoverKeyError: Element {repr(self.keys[0])} in '
                         f'subsets_rows {repr(self.keys[1])} is not in '
                         f'Universe')
+        if self.num == 'BadRow':
+            self.msg = (f'ExactCoverKeyError: Row {repr(self.keys)} is not in '
+                        f'subsets_rows')
+        if self.num == 'BadColumn':
+            self.msg = (f'ExactCoverKeyError: Element {repr(self.keys)} is not in '
+                        f'Universe')
 
     def __str__(self):
         """Return the message string."""
         return self.msg
 
 
+class ExactCoverSearchStopped(Exception):
+    """The search was stopped by `max_nodes`, `timeout` or `cancel` before it was complete.
+
+    Attributes:
+        reason:
+            `'max_nodes'`, `'timeout'` or `'cancel'`.
+        nodes:
+            The number of nodes entered before the search was stopped.
+        found:
+            The number of solutions found before the search was stopped.
+        result:
+            The partial result of `solve`: the solutions found, or their number when counting.
+            `None` when raised by the iterator of `iter_solve`.
+    """
+
+    def __init__(self, reason, nodes, found):
+        """Set the message."""
+        super().__init__(reason, nodes, found)
+        self.reason = reason
+        self.nodes = nodes
+        self.found = found
+        self.result = None
+
+    def __str__(self):
+        """Return the message string."""
+        return (f'ExactCoverSearchStopped: The search was stopped by {self.reason} after '
+                f'{self.nodes} nodes and {self.found} solutions')
+
+
 if __name__ == '__main__':
     pass
@@ -0,0 +1,193 @@
+"""Parallel search that splits the search tree across worker processes."""
+
+
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+
+from .exactcover import ExactCoverSearchStopped, _make_budget, _make_limit, _prepare, _search
+
+#: The search tree is split until there are at least this many subproblems per worker.
+TASKS_PER_JOB = 8
+
+# A running subproblem reads the stop event after this many nodes
+_STOP_POLL_NODES = 64
+
+# The engine of a worker process, its row keys and the event that stops its searches
+_worker = None
+
+
+def parallel_solve(universe_columns: Union[Dict[Hashable, Any], List[Hashable], set, str,
+                                           Tuple[Hashable]],
+                   subsets_rows: Dict[Hashable, set],
+                   jobs: Optional[int] = None, limit: Optional[int] = None,
+                   preseed: Optional[set] = None, count: bool = False,
+                   engine: Optional[str] = None,
+                   secondary: Optional[set] = None) -> Union[List[set], int]:
+    """Solves exact cover problems on several processes.
+
+    The first levels of the search tree are expanded into preseeded subproblems, breadth first,
+    until there are at least `TASKS_PER_JOB` subproblems per worker or the tree cannot be split
+    further. The subproblems are solved by a pool of worker processes and their results are
+    merged in search order. The split is made once, before the workers start: having many
+    subproblems per worker evens out their sizes, but a worker that runs out of subproblems does
+    not take over part of a running one, so a single large subtree can leave the other workers
+    idle. Without `limit`, the solutions are the same as those of `solve`, and
+    with the `'dlx'` and `'bitset'` engines they also come in the same order.
+
+    Args:
+        universe_columns:
+            The set of elements in the universe/columns. Duplicate elements are silently ignored.
+        subsets_rows:
+            The collection of subsets in `universe_columns` of type dict.  The values are python
+            set objects that is a subset of `universe_columns`. The keys and values must be
+            picklable.
+        jobs:
+            The number of worker processes. When it is not a positive integer, the number of CPUs
+            is used. With `1`, the subproblems are solved in the calling process. Default: `None`
+        limit:
+            A positive integer. The number of solutions returned is <= `limit`. Once enough
+            solutions are found, the subproblems that have not started are cancelled and the
+            running ones stop
+            within a few nodes. Which solutions are returned then depends
+            on the order in which subproblems finish. This option is ignored if the value is not a
+            positive integer. Default: `None`
+        preseed:
+            A set of hashable row objects used to preseed a partial solution. This option is
+            ignored if the value is not a set object. Default: `None`
+        count:
+            When `True`, the total number of solutions is returned instead of the solution sets.
+            This option is ignored if the value is not a boolean. Default: `False`
+        engine:
+            The search engine, as in `solve`. Default: `None`
+        secondary:
+            The elements that are covered at most once, as in `solve`. Default: `None`
+
+    Returns:
+        Union[List[set], int]: A list of solutions, or the number of solutions when `count` is
+        `True`.
+    """
+    _count = count is True
+    _limit = _make_limit(limit)
+    _jobs = jobs if isinstance(jobs, int) and jobs > 0 else os.cpu_count() or 1
+    search_engine, preseed_rows, row_keys = _prepare(universe_columns, subsets_rows, False,
+                                                     preseed, engine, secondary)
+    if preseed_rows is None:
+        return 0 if _count else []
+    tasks = _split(search_engine, preseed_rows, _jobs * TASKS_PER_JOB)
+    if _jobs == 1:
+        _init_worker(search_engine, row_keys, None)
+        results = []
+        found = 0
+        for prefix in tasks:
+            results.append(_run_task(prefix, _limit, _count))
+            found += results[-1] if _count else len(results[-1])
+            if _limit is not None and found >= _limit:
+                break
+        return _merge(results, _limit, _count)
+
+    stop = multiprocessing.Event()
+    executor = ProcessPoolExecutor(max_workers=_jobs, initializer=_init_worker,
+                                   initargs=(search_engine, row_keys, stop))
+    try:
+        futures = [executor.submit(_run_task, prefix, _limit, _count) for prefix in tasks]
+        pending = set(futures)
+        found = 0
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found += future.result() if _count else len(future.result())
+            if _limit is not None and found >= _limit:
+                stop.set()
+                for future in pending:
+                    future.cancel()
+                break
+        results = [future.result() for future in futures
+                   if future.done() and not future.cancelled()]
+    finally:
+        executor.shutdown()
+    return _merge(results, _limit, _count)
+
+
+def _split(engine, prefix, min_tasks):
+    """Expand the search tree breadth first into at least `min_tasks` preseeds, if it can be.
+
+    Each preseed is a list of rows of `engine`. Branches without solutions are dropped and a
+    preseed that is already a solution is kept as is. The preseeds are in search order.
+    """
+    frontier = [list(prefix)]
+    while len(frontier) < min_tasks:
+        next_frontier = []
+        split = False
+        for rows in frontier:
+            for row in rows:
+                engine.cover(row)
+            candidates = engine.choose()
+            if candidates is None:
+                next_frontier.append(rows)
+            else:
+                split = True
+                next_frontier.extend(rows + [row] for row in candidates)
+            for row in reversed(rows):
+                engine.uncover(row)
+        frontier = next_frontier
+        if not split:
+            break
+    return frontier
+
+
+def _merge(results, limit, count):
+    if count:
+        total = sum(results)
+        return total if limit is None else min(total, limit)
+    return [solution for solutions in results for solution in solutions][:limit]
+
+
+def _init_worker(engine, row_keys, stop):
+    global _worker
+    _worker = (engine, row_keys, stop)
+
+
+def _run_task(prefix, limit, count):
+    """Solve one preseeded subproblem in a worker process.
+
+    The search stops, with the solutions found so far, once the stop event of the worker is set.
+    """
+    engine, row_keys, stop = _worker
+    budget = None if stop is None else _make_budget(None, None, _PolledEvent(stop), None, None)
+    results = 0 if count else []
+    solutions = _search(engine, prefix, limit, count, row_keys, budget=budget)
+    try:
+        for solution in solutions:
+            if count:
+                results += 1
+            else:
+                results.append(solution)
+    except ExactCoverSearchStopped:
+        pass
+    finally:
+        # Uncover the preseed so the next subproblem starts from the whole problem
+        solutions.close()
+    return results
+
+
+class _PolledEvent:
+    """An event that is only read every `_STOP_POLL_NODES` calls of `is_set`.
+
+    Reading a `multiprocessing.Event` takes a lock, which would slow down a search that reads it
+    at every node.
+    """
+
+    def __init__(self, event):
+        """Wrap `event`."""
+        self.event = event
+        self.calls = 0
+
+    def is_set(self):
+        """Return whether the event was set when it was last read."""
+        self.calls += 1
+        if self.calls < _STOP_POLL_NODES:
+            return False
+        self.calls = 0
+        return self.event.is_set()
@@ -0,0 +1,286 @@
+"""Presolve reductions that shrink an exact cover problem before the search."""
+
+
+from itertools import product
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple, Union
+
+from .exactcover import (ExactCoverKeyError, _check_preseed, _count_memoized, _make_limit,
+                         _prepare, _row_masks, _search)
+
+
+def presolve(universe_columns: Union[Dict[Hashable, Any], List[Hashable], set, str,
+                                     Tuple[Hashable]],
+             subsets_rows: Dict[Hashable, set],
+             preseed: Optional[set] = None, secondary: Optional[set] = None) -> 'Presolved':
+    """Reduce an exact cover problem before searching it.
+
+    The following reductions are applied until none of them changes the problem:
+
+    * A subset that is empty, or whose elements are all secondary, is removed, since it is never
+      part of a solution.
+    * Subsets with the same elements are merged into one, which stands for each of them.
+    * A primary element that only one subset contains forces that subset into every solution. The
+      forced subset's elements are removed from the universe, and so are the subsets that share an
+      element with it.
+    * When every subset that contains a primary element `x` also contains an element `y`, the
+      subsets that contain `y` but not `x` are removed, since covering `x` covers `y` as well.
+    * A primary element that no subset contains makes the problem infeasible.
+
+    The preseed subsets are forced before the reductions start.
+
+    Args:
+        universe_columns:
+            The set of elements in the universe/columns. Duplicate elements are silently ignored.
+        subsets_rows:
+            The collection of subsets in `universe_columns` of type dict.  The values are python
+            set objects that is a subset of `universe_columns`.
+        preseed:
+            A set of hashable row objects used to preseed a partial solution. This option is
+            ignored if the value is not a set object. Default: `None`
+        secondary:
+            The elements that are covered at most once, as in `solve`. Default: `None`
+
+    Returns:
+        Presolved: The reduced problem and a report of the reductions.
+
+    Raises:
+        ExactCoverKeyError: A subset contains an element that is not in `universe_columns`, or the
+            preseed contains a row that is not in `subsets_rows`.
+    """
+    col_rows = {}
+    for u_element in universe_columns:
+        col_rows[u_element] = {}
+    rows = {}
+    for s_key, u_subset in subsets_rows.items():
+        for u_key in u_subset:
+            if u_key not in col_rows:
+                raise ExactCoverKeyError('BadUKey', (u_key, s_key))
+            col_rows[u_key][s_key] = None
+        rows[s_key] = set(u_subset)
+    _secondary = {x for x in secondary if x in col_rows} if isinstance(secondary, set) else set()
+    _preseed = _check_preseed(preseed, subsets_rows)
+    result = Presolved(_secondary)
+    if _preseed is None:
+        result.infeasible = True
+        return result
+
+    def remove_row(s_key):
+        for u_key in rows.pop(s_key):
+            del col_rows[u_key][s_key]
+
+    def force_row(s_key):
+        result.forced.append(s_key)
+        for u_key in rows[s_key]:
+            for co_key in list(col_rows[u_key]):
+                if co_key != s_key:
+                    remove_row(co_key)
+                    result.removed_rows.append(co_key)
+        for u_key in rows.pop(s_key):
+            del col_rows[u_key]
+            result.removed_columns.append(u_key)
+
+    for s_key in _preseed:
+        force_row(s_key)
+    for s_key, u_subset in list(rows.items()):
+        if u_subset <= _secondary:
+            remove_row(s_key)
+            result.removed_rows.append(s_key)
+
+    changed = True
+    while changed:
+        changed = False
+        # Merge subsets with the same elements into the first of them
+        first_rows = {}
+        for s_key in list(rows):
+            first = first_rows.setdefault(frozenset(rows[s_key]), s_key)
+            if first != s_key:
+                result.merged.setdefault(first, [first]).extend(result.merged.pop(s_key, [s_key]))
+                remove_row(s_key)
+        # Force the subsets of the primary elements that only one subset contains
+        for u_key in list(col_rows):
+            if u_key in col_rows and u_key not in _secondary:
+                if not col_rows[u_key]:
+                    result.infeasible = True
+                    return result
+                if len(col_rows[u_key]) == 1:
+                    force_row(next(iter(col_rows[u_key])))
+                    changed = True
+        # Remove the subsets that contain an element implied by a primary element but not that
+        # primary element
+        for u_key in list(col_rows):
+            if u_key not in col_rows or u_key in _secondary:
+                continue
+            u_rows = col_rows[u_key]
+            if not u_rows:
+                # Found infeasible by the next pass
+                continue
+            implied = set.intersection(*(rows[s_key] for s_key in u_rows))
+            implied.discard(u_key)
+            for other_key in implied:
+                for s_key in [s_key for s_key in col_rows[other_key] if s_key not in u_rows]:
+                    remove_row(s_key)
+                    result.removed_rows.append(s_key)
+                    changed = True
+
+    result.universe_columns = list(col_rows)
+    result.subsets_rows = rows
+    result.secondary = _secondary & set(col_rows)
+    return result
+
+
+class Presolved:
+    """An exact cover problem reduced by `presolve`, with a report of what was removed.
+
+    The solutions of the original problem are the solutions of the reduced problem plus the
+    forced subsets, with each merged subset replaced in turn by each of the subsets it stands for.
+    `solve` and `iter_solve` search the reduced problem and return solutions of the original
+    problem.
+
+    Attributes:
+        universe_columns:
+            The elements left in the universe.
+        subsets_rows:
+            The subsets left, keyed by row. A merged subset keeps the key of the first of its rows.
+        secondary:
+            The secondary elements left.
+        forced:
+            The rows forced into every solution, including the preseed rows, in the order they
+            were forced.
+        merged:
+            The rows that stand for several rows with the same elements, mapped to those rows.
+        removed_rows:
+            The rows removed because they can never be part of a solution, in the order they were
+            removed. Rows merged into another row are not included.
+        removed_columns:
+            The elements covered by the forced rows.
+        infeasible:
+            `True` when the reductions proved that the problem has no solution. The reduced problem
+            is then empty and `solve` returns no solutions.
+    """
+
+    def __init__(self, secondary: set):
+        """Start an empty report."""
+        self.universe_columns = []
+        self.subsets_rows = {}
+        self.secondary = secondary
+        self.forced = []
+        self.merged = {}
+        self.removed_rows = []
+        self.removed_columns = []
+        self.infeasible = False
+
+    def weight(self, solution: set) -> int:
+        """Return the number of solutions of the original problem that `solution` stands for.
+
+        Args:
+            solution:
+                A solution of the reduced problem.
+
+        Returns:
+            int: The product of the number of rows merged into each row.
+        """
+        total = 1
+        for s_key in solution:
+            total *= len(self.merged.get(s_key, (s_key,)))
+        for s_key in self.forced:
+            total *= len(self.merged.get(s_key, (s_key,)))
+        return total
+
+    def expand(self, solution: set) -> Iterator[set]:
+        """Yield the solutions of the original problem that `solution` stands for.
+
+        Args:
+            solution:
+                A solution of the reduced problem.
+
+        Returns:
+            Iterator[set]: An iterator over the solutions.
+        """
+        choices = [self.merged.get(s_key, (s_key,)) for s_key in self.forced]
+        choices.extend(self.merged.get(s_key, (s_key,)) for s_key in solution)
+        for s_keys in product(*choices):
+            yield set(s_keys)
+
+    def iter_solve(self, limit: Optional[int] = None, randomize: bool = False,
+                   engine: Optional[str] = None) -> Iterator[set]:
+        """Yield the solutions of the original problem as they are found.
+
+        Args:
+            limit:
+                A positive integer. The number of solutions yielded is <= `limit`. This option is
+                ignored if the value is not a positive integer. Default: `None`
+            randomize:
+                When `true`, the reduced problem is searched in random order. This option is
+                ignored if the value is not a boolean. Default: `False`
+            engine:
+                The search engine, as in `solve`. Default: `None`
+
+        Returns:
+            Iterator[set]: An iterator over the solutions.
+        """
+        if self.infeasible:
+            return iter(())
+        search_engine, _, row_keys = _prepare(self.universe_columns, self.subsets_rows,
+                                              randomize is True, None, engine, self.secondary)
+        solutions = (solution for reduced in _search(search_engine, [], None, False, row_keys)
+                     for solution in self.expand(reduced))
+        _limit = _make_limit(limit)
+        if _limit is None:
+            return solutions
+        return (solution for _, solution in zip(range(_limit), solutions))
+
+    def solve(self, limit: Optional[int] = None, randomize: bool = False, count: bool = False,
+              engine: Optional[str] = None, memo: Optional[int] = None) -> Union[List[set], int]:
+        """Return the solutions of the original problem, or their number.
+
+        Args:
+            limit:
+                A positive integer. The number of solutions returned is <= `limit`. This option
+                is ignored if the value is not a positive integer. Default: `None`
+            randomize:
+                When `true`, the reduced problem is searched in random order. This option is
+                ignored if the value is not a boolean. Default: `False`
+            count:
+                When `True`, the total number of solutions is returned instead of the solution
+                sets. Each solution of the reduced problem is counted with its `weight`. This
+                option is ignored if the value is not a boolean. Default: `False`
+            engine:
+                The search engine, as in `solve`. Default: `None`
+            memo:
+                The number of cached counts when `count` is `True`, as in `solve`. Default: `None`
+
+        Returns:
+            Union[List[set], int]: A list of solutions, or the number of solutions when `count` is
+            `True`.
+        """
+        if count is not True:
+            return list(self.iter_solve(limit, randomize, engine))
+        if self.infeasible:
+            return 0
+        _limit = _make_limit(limit)
+        search_engine, _, row_keys = _prepare(self.universe_columns, self.subsets_rows, False,
+                                              None, engine, self.secondary)
+        forced_weight = self.weight(set())
+        weights = None
+        if self.merged:
+            weights = {s_key: self.weight({s_key}) // forced_weight for s_key in self.subsets_rows}
+            if row_keys is not None:
+                weights = [weights[s_key] for s_key in row_keys]
+        _memo = _make_limit(memo)
+        if _memo is not None:
+            masks = _row_masks(self.universe_columns, self.subsets_rows)
+            if row_keys is not None:
+                masks = [masks[s_key] for s_key in row_keys]
+            total = _count_memoized(search_engine, [], None, masks, _memo, weights)
+            total *= forced_weight
+        else:
+            total = 0
+            for chosen in _search(search_engine, [], None, True, row_keys):
+                solution_weight = forced_weight
+                if weights is not None:
+                    for row in chosen:
+                        solution_weight *= weights[row]
+                total += solution_weight
+                if _limit is not None and total >= _limit:
+                    break
+        return total if _limit is None else min(total, _limit)
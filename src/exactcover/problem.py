@@ -0,0 +1,451 @@
+"""A compiled exact cover problem that can be solved many times."""
+
+
+from bisect import bisect_right
+from itertools import accumulate
+from random import Random, randrange, shuffle
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple, Union
+
+from .dlx import DLX
+from .estimate import _probe
+from .exactcover import (ExactCoverKeyError, _check_preseed, _intern, _make_limit, _preseeded,
+                         _search)
+
+
+class Problem:
+    """An exact cover problem compiled once and solved many times.
+
+    The universe and subsets are validated, the columns and rows are numbered from zero and the
+    Dancing Links index is built when the problem is created. Each search covers its preseed rows
+    on the compiled index and uncovers them again when it ends, so solving with a different
+    preseed costs nothing more than the search itself.
+
+    Rows and columns can be added and removed in place with `add_row`, `remove_row`,
+    `add_column` and `remove_column`, at a cost proportional to the size of the row or column
+    rather than of the whole problem. `resolve` then finds a solution of the changed problem,
+    starting from the previous one.
+
+    Only one search runs on a problem at a time. Starting a search, or changing the problem,
+    closes any iterator returned by `iter_solve` that is still open.
+
+    Args:
+        universe_columns:
+            The set of elements in the universe/columns. Duplicate elements are silently ignored.
+        subsets_rows:
+            The collection of subsets in `universe_columns` of type dict.  The values are python
+            set objects that is a subset of `universe_columns`.
+        secondary:
+            A set of elements of `universe_columns` that are covered at most once instead of
+            exactly once, as in `solve`. This option is ignored if the value is not a set object.
+            Default: `None`
+
+    Raises:
+        ExactCoverKeyError: A subset contains an element that is not in `universe_columns`.
+    """
+
+    def __init__(self, universe_columns: Union[Dict[Hashable, Any], List[Hashable], set, str,
+                                               Tuple[Hashable]],
+                 subsets_rows: Dict[Hashable, set], secondary: Optional[set] = None):
+        """Validate the problem and build the index."""
+        columns, row_keys, row_columns = _intern(universe_columns, subsets_rows, False)
+        if not isinstance(secondary, set):
+            secondary = set()
+        self._build(columns, row_keys, row_columns,
+                    [col for col, u_element in enumerate(columns) if u_element in secondary])
+        self._active = None
+        self._solution = None
+
+    def _build(self, columns, row_keys, row_columns, secondary):
+        """Store the numbered columns and rows and link the Dancing Links index."""
+        # The element of each column and the key of each row, removed ones included
+        self._columns = columns
+        self._keys = row_keys
+        self._column_index = {u_element: col for col, u_element in enumerate(columns)}
+        self._row_index = {s_key: row for row, s_key in enumerate(row_keys)}
+        self._subsets = dict(zip(row_keys, map(tuple, row_columns)))
+        self._secondary = set(secondary)
+        self._dlx = DLX(len(columns), row_columns, secondary)
+        # The number of nodes of removed rows and columns left in the index
+        self._garbage = 0
+
+    @property
+    def columns(self) -> List[Hashable]:
+        """List[Hashable]: The elements of the universe, in the order they were added."""
+        return list(self._column_index)
+
+    @property
+    def rows(self) -> List[Hashable]:
+        """List[Hashable]: The row keys, in the order they were added."""
+        return list(self._row_index)
+
+    def iter_solve(self, preseed: Optional[set] = None, limit: Optional[int] = None,
+                   randomize: bool = False) -> Iterator[set]:
+        """Yield the solutions as they are found.
+
+        Args:
+            preseed:
+                A set of hashable row objects used to preseed a partial solution. This option is
+                ignored if the value is not a set object. Default: `None`
+            limit:
+                A positive integer. The number of solutions yielded is <= `limit`. This option is
+                ignored if the value is not a positive integer. Default: `None`
+            randomize:
+                When `true`, the rows are tried in random order at every step of the search, so
+                solutions are yielded in random order. This option is ignored if the value is not
+                a boolean. Default: `False`
+
+        Returns:
+            Iterator[set]: An iterator over the solutions.
+        """
+        return self._start(preseed, limit, randomize is True, False)
+
+    def solve(self, preseed: Optional[set] = None, limit: Optional[int] = None,
+              randomize: bool = False) -> List[set]:
+        """Return the solutions.
+
+        The arguments are the same as for `iter_solve`.
+
+        Returns:
+            List[set]: A list of solutions.
+        """
+        return list(self._start(preseed, limit, randomize is True, False))
+
+    def count(self, preseed: Optional[set] = None, limit: Optional[int] = None) -> int:
+        """Return the number of solutions.
+
+        Args:
+            preseed:
+                A set of hashable row objects used to preseed a partial solution. This option is
+                ignored if the value is not a set object. Default: `None`
+            limit:
+                A positive integer. Counting stops when `limit` solutions are found. This option
+                is ignored if the value is not a positive integer. Default: `None`
+
+        Returns:
+            int: The number of solutions.
+        """
+        return sum(1 for _ in self._start(preseed, limit, False, True))
+
+    def sample(self, k: int = 1, preseed: Optional[set] = None, uniform: bool = False,
+               probes: int = 4, rng: Optional[Random] = None) -> List[set]:
+        """Return `k` solutions drawn at random, independently of each other.
+
+        Each solution is found by a search that tries the rows of every node in a random order
+        and backtracks from dead ends. The search is restarted from the top with new random
+        choices once it has entered as many nodes as there are columns, and the limit doubles at
+        each restart, so a search that took a bad early choice does not get stuck in its subtree.
+        Solutions in small subtrees are more likely to be drawn than others, since the rows of a
+        node are equally likely whatever the number of solutions below them.
+
+        With `uniform`, the rows of a node are instead tried in an order drawn with probabilities
+        proportional to the number of solutions below them, as estimated by random probes like
+        those of `estimate`. If the estimates were exact and no search backtracked, every
+        solution would be equally likely, so the solutions are drawn close to uniformly, at the
+        cost of the probes at each node. `solve_zdd` draws exactly uniform solutions when the
+        diagram fits in memory.
+
+        Args:
+            k:
+                A positive integer. The number of solutions drawn. The same solution may be drawn
+                more than once. This option is ignored if the value is not a positive integer.
+                Default: `1`
+            preseed:
+                A set of hashable row objects used to preseed a partial solution. This option is
+                ignored if the value is not a set object. Default: `None`
+            uniform:
+                When `True`, the rows are weighted by their estimated number of solutions. This
+                option is ignored if the value is not a boolean. Default: `False`
+            probes:
+                A positive integer. The number of probes that estimate the solutions below each
+                row when `uniform` is `True`. More probes give estimates closer to the true
+                numbers. This option is ignored if the value is not a positive integer.
+                Default: `4`
+            rng:
+                The `random.Random` instance to draw from. The `random` module is used when it is
+                `None`. Default: `None`
+
+        Returns:
+            List[set]: The solutions drawn, or an empty list if there are no solutions.
+        """
+        _k = _make_limit(k) or 1
+        _probes = _make_limit(probes) or 4
+        self._close()
+        _preseed = _check_preseed(preseed, self._subsets)
+        if _preseed is None:
+            return []
+        draw = randrange if rng is None else rng.randrange
+        if uniform is True:
+            def order(rows):
+                return _weighted_order(self._dlx, chosen, rows, _probes, draw)
+        else:
+            _shuffle = shuffle if rng is None else rng.shuffle
+
+            def order(rows):
+                rows = list(rows)
+                _shuffle(rows)
+                return rows
+        solutions = []
+        with _preseeded(self._dlx, [self._row_index[r] for r in _preseed]) as chosen:
+            depth = len(chosen)
+            while len(solutions) < _k:
+                max_nodes = len(self._column_index) + 1
+                while True:
+                    found = _random_search(self._dlx, chosen, order, max_nodes)
+                    if found is not None:
+                        break
+                    max_nodes *= 2
+                if not found:
+                    # There are no solutions
+                    return []
+                solutions.append({self._keys[row] for row in chosen})
+                while len(chosen) > depth:
+                    self._dlx.uncover(chosen.pop())
+        return solutions
+
+    def resolve(self, solution: Optional[set] = None) -> Optional[set]:
+        """Return a solution, reusing `solution` when it still solves the problem.
+
+        `solution` is returned as it is when its rows are still in the problem and cover every
+        primary column exactly once and every secondary column at most once. Otherwise its rows
+        that are still in the problem and do not overlap are kept, and only the columns they leave
+        uncovered are searched, so a solution after a few edits costs little more than the edits.
+        When those columns cannot be covered around the kept rows, the kept rows that share a
+        column with the rows of the uncovered columns are freed too, in a neighbourhood that
+        doubles in depth at each attempt, until a solution is found or no row is kept and the
+        whole problem is searched. Rows of `solution` are tried first at every node.
+
+        Args:
+            solution:
+                A set of row keys, such as the result of an earlier call. The solution returned by
+                the last call of `resolve` is used when it is `None`. Default: `None`
+
+        Returns:
+            Optional[set]: A solution, or `None` if the problem has no solution.
+        """
+        self._close()
+        if not isinstance(solution, set):
+            solution = self._solution or set()
+        if not self._solves(solution):
+            kept = {}
+            owner = {}
+            for s_key in solution:
+                if self._coverable(s_key) and owner.keys().isdisjoint(self._subsets[s_key]):
+                    row = self._row_index[s_key]
+                    kept[row] = self._subsets[s_key]
+                    owner.update(dict.fromkeys(kept[row], row))
+            solution = self._repair(kept, owner)
+        self._solution = solution
+        return solution
+
+    def _repair(self, kept, owner):
+        """Return a solution that keeps as many of the disjoint rows of `kept` as attempts allow.
+
+        `kept` maps the rows to their columns and `owner` maps their columns back to them.
+        """
+        warm = set(kept)
+
+        def order(rows):
+            return sorted(rows, key=lambda row: row not in warm)
+
+        frontier = [col for col in self._column_index.values()
+                    if col not in owner and col not in self._secondary]
+        depth = 1
+        while True:
+            with _preseeded(self._dlx, list(kept)) as chosen:
+                if _random_search(self._dlx, chosen, order, None):
+                    return {self._keys[row] for row in chosen}
+            if not kept:
+                return None
+            size = len(kept)
+            for _ in range(depth):
+                freed = []
+                for col in frontier:
+                    for row in self._column_rows(col):
+                        for c in self._subsets[self._keys[row]]:
+                            if owner.get(c) in kept:
+                                freed.extend(kept.pop(owner[c]))
+                frontier = freed
+            if len(kept) == size:
+                # The uncovered columns share no row with the kept rows
+                kept.clear()
+            depth *= 2
+
+    def _column_rows(self, col):
+        """Yield the rows that contain column `col`."""
+        D, ROW = self._dlx.D, self._dlx.ROW
+        header = self._dlx.headers[col]
+        node = D[header]
+        while node != header:
+            yield ROW[node]
+            node = D[node]
+
+    def add_row(self, s_key: Hashable, subset: set):
+        """Add the row `s_key` with the elements of `subset`, replacing any row with that key.
+
+        Raises:
+            ExactCoverKeyError: `subset` contains an element that is not in the universe.
+        """
+        for u_key in subset:
+            if u_key not in self._column_index:
+                raise ExactCoverKeyError('BadUKey', (u_key, s_key))
+        if s_key in self._row_index:
+            # Removing the row may rebuild the index, which numbers the columns again
+            self.remove_row(s_key)
+        self._close()
+        cols = [self._column_index[u_key] for u_key in subset]
+        self._row_index[s_key] = self._dlx.add_row(cols)
+        self._keys.append(s_key)
+        self._subsets[s_key] = tuple(cols)
+
+    def remove_row(self, s_key: Hashable):
+        """Remove the row `s_key`.
+
+        Raises:
+            ExactCoverKeyError: `s_key` is not a row of the problem.
+        """
+        if s_key not in self._row_index:
+            raise ExactCoverKeyError('BadRow', s_key)
+        self._close()
+        self._dlx.remove_row(self._row_index.pop(s_key))
+        self._garbage += len(self._subsets.pop(s_key))
+        self._compact()
+
+    def add_column(self, u_element: Hashable, secondary: bool = False):
+        """Add the element `u_element` to the universe, without rows that contain it.
+
+        An element that is already in the universe is ignored.
+
+        Args:
+            u_element:
+                The element.
+            secondary:
+                When `True`, the element is covered at most once instead of exactly once. This
+                option is ignored if the value is not a boolean. Default: `False`
+        """
+        if u_element in self._column_index:
+            return
+        self._close()
+        col = self._dlx.add_column(secondary is True)
+        self._column_index[u_element] = col
+        self._columns.append(u_element)
+        if secondary is True:
+            self._secondary.add(col)
+
+    def remove_column(self, u_element: Hashable):
+        """Remove the element `u_element` from the universe and from the rows that contain it.
+
+        Raises:
+            ExactCoverKeyError: `u_element` is not in the universe.
+        """
+        if u_element not in self._column_index:
+            raise ExactCoverKeyError('BadColumn', u_element)
+        self._close()
+        col = self._column_index.pop(u_element)
+        self._secondary.discard(col)
+        rows = self._dlx.remove_column(col)
+        for row in rows:
+            s_key = self._keys[row]
+            self._subsets[s_key] = tuple(c for c in self._subsets[s_key] if c != col)
+        self._garbage += len(rows) + 1
+        self._compact()
+
+    def _solves(self, solution):
+        """Return whether the row keys of `solution` form a solution of the problem."""
+        covered = set()
+        for s_key in solution:
+            if not self._coverable(s_key):
+                return False
+            for col in self._subsets[s_key]:
+                if col in covered:
+                    return False
+                covered.add(col)
+        return len(covered - self._secondary) == len(self._column_index) - len(self._secondary)
+
+    def _coverable(self, s_key):
+        """Return whether `s_key` is a row with a primary column, as the rows of a search are."""
+        cols = self._subsets.get(s_key)
+        return cols is not None and not self._secondary.issuperset(cols)
+
+    def _compact(self):
+        """Rebuild the index once removed rows and columns take more nodes than the others."""
+        if self._garbage <= len(self._dlx.L) - self._garbage:
+            return
+        number = {col: i for i, col in enumerate(self._column_index.values())}
+        row_keys = list(self._row_index)
+        self._build(list(self._column_index), row_keys,
+                    [[number[col] for col in self._subsets[s_key]] for s_key in row_keys],
+                    [number[col] for col in self._secondary])
+
+    def _close(self):
+        """Close the search that is still open, uncovering the rows it left covered."""
+        if self._active is not None:
+            self._active.close()
+            self._active = None
+
+    def _start(self, preseed, limit, randomize, count):
+        self._close()
+        _preseed = _check_preseed(preseed, self._subsets)
+        if _preseed is None:
+            return iter(())
+        self._active = _search(self._dlx, [self._row_index[r] for r in _preseed],
+                               _make_limit(limit), count, self._keys, randomize)
+        return self._active
+
+
+def _random_search(engine, chosen, order, max_nodes):
+    """Search `engine` from its current node, trying the rows of each node as `order` lists them.
+
+    `chosen` holds the rows covered so far. Return `True` once a solution is found, with its rows
+    left covered and appended to `chosen`, `False` if there is no solution below the node, and
+    `None` if the search entered `max_nodes` nodes first, with the node restored. With a
+    `max_nodes` of `None`, the search runs to the end.
+    """
+    depth = len(chosen)
+    # The rows left to try at each depth, last first
+    stack = []
+    nodes = 0
+    while True:
+        if nodes == max_nodes:
+            while len(chosen) > depth:
+                engine.uncover(chosen.pop())
+            return None
+        nodes += 1
+        rows = engine.choose()
+        if rows is None:
+            return True
+        stack.append(order(rows)[::-1])
+        while stack:
+            if len(chosen) - depth == len(stack):
+                engine.uncover(chosen.pop())
+            if stack[-1]:
+                row = stack[-1].pop()
+                engine.cover(row)
+                chosen.append(row)
+                break
+            stack.pop()
+        else:
+            return False
+
+
+def _weighted_order(engine, chosen, rows, probes, draw):
+    """Return `rows` in a random order drawn by their estimated numbers of solutions.
+
+    Each row is weighted by the sum of the estimates of `probes` probes below it, and the rows
+    are drawn one by one with probabilities proportional to their weights. The rows whose probes
+    all reached dead ends come last, in random order.
+    """
+    weights = []
+    for row in rows:
+        engine.cover(row)
+        chosen.append(row)
+        weights.append(sum(_probe(engine, chosen, draw)[1] for _ in range(probes)))
+        engine.uncover(chosen.pop())
+    weighted = [(weight, row) for weight, row in zip(weights, rows) if weight]
+    ordered = []
+    while weighted:
+        bounds = list(accumulate(weight for weight, _ in weighted))
+        ordered.append(weighted.pop(bisect_right(bounds, draw(bounds[-1])))[1])
+    rest = [row for weight, row in zip(weights, rows) if not weight]
+    while rest:
+        ordered.append(rest.pop(draw(len(rest))))
+    return ordered
@@ -0,0 +1,372 @@
+"""A compact binary file format for exact cover problems, loaded by memory-mapping."""
+
+
+import ast
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .dlx import DLX
+from .exactcover import ExactCoverKeyError, _check_preseed, _make_limit, _search
+
+# The magic bytes, the byte order, the numbers of columns, rows, entries and secondary columns,
+# and the offsets of the column indices, the row pointers, the secondary columns, the column
+# labels and the row labels
+_HEADER = struct.Struct('=8sc7xQQQQQQQQQ')
+
+# The types of the labels that can be stored, and of the items of tuple labels
+_LABEL_TYPES = frozenset([str, int, float, bool, bytes, type(None)])
+
+
+class ProblemWriter:
+    """Writes an exact cover problem to a file one subset at a time.
+
+    The file stores the problem in compressed sparse row form: the column indices of every
+    subset one after the other, as 4-byte integers, and the position of the first index of each
+    subset, as 8-byte integers, followed by the labels of the elements and of the subsets.
+    `MappedProblem` maps the file into memory and searches it without building any set or dict.
+
+    The column indices are written as the subsets are added, so a problem with millions of
+    subsets never has to be held in memory as a dict of sets. The file is complete once the
+    writer is closed, which leaving a `with` block does.
+
+    The layout is a header holding the magic bytes `MAGIC`, the byte order, the sizes of the
+    problem and the offsets of the sections, then the column indices, the row pointers, the
+    secondary columns, and the column and row labels, each as the offsets of the labels and the
+    labels themselves. The integers are written in the byte order of the machine, and each
+    section starts at a multiple of 8 bytes, so they can be used in place once mapped. Labels are
+    stored as their `repr`, so they must be strings, ints, finite floats, bytes, `None` or tuples
+    of these.
+
+    Args:
+        path:
+            The path of the file, which is created or truncated.
+        universe_columns:
+            The set of elements in the universe/columns. Duplicate elements are silently ignored.
+        secondary:
+            A set of elements of `universe_columns` that are covered at most once instead of
+            exactly once, as in `solve`. This option is ignored if the value is not a set object.
+            Default: `None`
+
+    Attributes:
+        written:
+            The number of subsets written so far.
+
+    Raises:
+        ValueError: An element cannot be stored as a label.
+    """
+
+    #: The bytes that start a problem file.
+    MAGIC = b'XCOVPRB1'
+
+    def __init__(self, path: Union[str, os.PathLike],
+                 universe_columns: Union[Dict[Hashable, Any], List[Hashable], set, str,
+                                         Tuple[Hashable]],
+                 secondary: Optional[set] = None):
+        """Open the file and number the columns."""
+        self._columns = {}
+        for u_element in universe_columns:
+            self._columns.setdefault(u_element, len(self._columns))
+        if not isinstance(secondary, set):
+            secondary = set()
+        self._column_labels = _Encoder(self._columns)
+        self._secondary = array('I', sorted(self._columns[u_element] for u_element in secondary
+                                            if u_element in self._columns))
+        self._indptr = array('Q', [0])
+        self._row_labels = _Encoder()
+        self.written = 0
+        self._file = open(path, 'wb')
+        self._file.write(bytes(_HEADER.size))
+
+    def add_row(self, s_key: Hashable, subset: Iterable[Hashable]):
+        """Write the subset `s_key`, whose elements are `subset`.
+
+        Subset keys must be distinct, as the keys of `subsets_rows` are. Duplicate elements are
+        silently ignored.
+
+        Raises:
+            ExactCoverKeyError: `subset` contains an element that is not in `universe_columns`.
+            ValueError: `s_key` cannot be stored as a label.
+        """
+        try:
+            cols = array('I', map(self._columns.__getitem__, dict.fromkeys(subset)))
+        except KeyError as e:
+            raise ExactCoverKeyError('BadUKey', (e.args[0], s_key)) from None
+        self._row_labels.append(s_key)
+        self._file.write(cols.tobytes())
+        self._indptr.append(self._indptr[-1] + len(cols))
+        self.written += 1
+
+    def close(self):
+        """Write the pointers, the labels and the header, and close the file."""
+        if self._file.closed:
+            return
+        offsets = [_HEADER.size]
+        for section in (self._indptr, self._secondary, self._column_labels, self._row_labels):
+            offsets.append(self._align())
+            section.tofile(self._file)
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(self.MAGIC, sys.byteorder[0].encode(), len(self._columns),
+                                      self.written, self._indptr[-1], len(self._secondary),
+                                      *offsets))
+        self._file.close()
+
+    def __enter__(self) -> 'ProblemWriter':
+        """Return the writer."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the file."""
+        self.close()
+
+    def _align(self):
+        """Pad the file to a multiple of 8 bytes and return its size."""
+        position = self._file.tell()
+        self._file.write(bytes(-position % 8))
+        return position + -position % 8
+
+
+def write_problem(path: Union[str, os.PathLike],
+                  universe_columns: Union[Dict[Hashable, Any], List[Hashable], set, str,
+                                          Tuple[Hashable]],
+                  subsets_rows: Dict[Hashable, set], secondary: Optional[set] = None):
+    """Write an exact cover problem to a file that `MappedProblem` loads.
+
+    Args:
+        path:
+            The path of the file, which is created or truncated.
+        universe_columns:
+            The set of elements in the universe/columns, as in `solve`.
+        subsets_rows:
+            The collection of subsets in `universe_columns` of type dict, as in `solve`.
+        secondary:
+            A set of elements of `universe_columns` that are covered at most once, as in `solve`.
+            Default: `None`
+
+    Raises:
+        ExactCoverKeyError: A subset contains an element that is not in `universe_columns`.
+        ValueError: An element or subset key cannot be stored as a label.
+    """
+    with ProblemWriter(path, universe_columns, secondary) as writer:
+        for s_key, subset in subsets_rows.items():
+            writer.add_row(s_key, subset)
+
+
+class MappedProblem:
+    """An exact cover problem read from a file written by `ProblemWriter`, and solved in place.
+
+    The file is memory-mapped and its sections are used as they are: `indptr` and `indices` are
+    views of the mapped bytes, which the Dancing Links index reads when the first search builds
+    it, without a list or set per subset in between. Labels are only decoded when a solution
+    holds them. Processes that map the same file share one copy of it in the page cache, and a
+    `MappedProblem` is pickled as its path, so it is cheap to send to worker processes, which map
+    the file again.
+
+    Only one search runs on a problem at a time. Starting a search closes any iterator returned by
+    `iter_solve` that is still open.
+
+    Args:
+        path:
+            The path of the file.
+
+    Attributes:
+        path:
+            The path of the file.
+        columns:
+            A read-only sequence of the elements of the universe.
+        rows:
+            A read-only sequence of the subset keys.
+        indptr:
+            A view of the 8-byte positions in `indices` of the first column of each subset, with
+            the end of the last subset last.
+        indices:
+            A view of the 4-byte column indices of every subset, one subset after the other.
+        secondary:
+            A view of the 4-byte column indices of the secondary elements.
+
+    Raises:
+        ValueError: The file is not a problem file, or was written on a machine with a different
+            byte order.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        """Map the file and find its sections."""
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(ProblemWriter.MAGIC)) != ProblemWriter.MAGIC:
+                raise ValueError(f'{path} is not a problem file')
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (_, byteorder, num_columns, num_rows, num_entries, num_secondary, indices, indptr,
+         secondary, column_labels, row_labels) = _HEADER.unpack_from(self._map)
+        if byteorder != sys.byteorder[0].encode():
+            self._map.close()
+            raise ValueError(f'{path} was written with a different byte order')
+        self._views = [memoryview(self._map)]
+        self.indices = self._view(indices, num_entries, 'I')
+        self.indptr = self._view(indptr, num_rows + 1, 'Q')
+        self.secondary = self._view(secondary, num_secondary, 'I')
+        self.columns = _Labels(self._view(column_labels, num_columns + 1, 'Q'),
+                               self._views[0][column_labels + 8 * (num_columns + 1):])
+        self.rows = _Labels(self._view(row_labels, num_rows + 1, 'Q'),
+                            self._views[0][row_labels + 8 * (num_rows + 1):])
+        self._views.extend([self.columns.blob, self.rows.blob])
+        self._dlx = None
+        self._row_index = None
+        self._active = None
+
+    def _view(self, offset, size, typecode):
+        """Return a view of the `size` integers of type `typecode` at `offset` in the file."""
+        itemsize = array(typecode).itemsize
+        view = self._views[0][offset:offset + size * itemsize].cast(typecode)
+        self._views.append(view)
+        return view
+
+    def row_columns(self) -> Iterator[memoryview]:
+        """Yield the column indices of each subset, as views of `indices`."""
+        indices = self.indices
+        start = 0
+        for end in self.indptr[1:]:
+            yield indices[start:end]
+            start = end
+
+    def iter_solve(self, preseed: Optional[set] = None, limit: Optional[int] = None,
+                   randomize: bool = False) -> Iterator[set]:
+        """Yield the solutions as they are found.
+
+        The arguments are the same as for `Problem.iter_solve`. The first search with a preseed
+        decodes every subset key to find the preseed subsets.
+
+        Returns:
+            Iterator[set]: An iterator over the solutions.
+        """
+        return self._start(preseed, limit, randomize is True, False)
+
+    def solve(self, preseed: Optional[set] = None, limit: Optional[int] = None,
+              randomize: bool = False) -> List[set]:
+        """Return the solutions.
+
+        The arguments are the same as for `Problem.iter_solve`.
+
+        Returns:
+            List[set]: A list of solutions.
+        """
+        return list(self._start(preseed, limit, randomize is True, False))
+
+    def count(self, preseed: Optional[set] = None, limit: Optional[int] = None) -> int:
+        """Return the number of solutions.
+
+        The arguments are the same as for `Problem.count`.
+
+        Returns:
+            int: The number of solutions.
+        """
+        return sum(1 for _ in self._start(preseed, limit, False, True))
+
+    def close(self):
+        """Unmap the file, closing the search that is still open."""
+        if self._active is not None:
+            self._active.close()
+            self._active = None
+        for view in reversed(self._views):
+            view.release()
+        self._map.close()
+
+    def __enter__(self) -> 'MappedProblem':
+        """Return the problem."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Unmap the file."""
+        self.close()
+
+    def __reduce__(self):
+        """Pickle the problem as its path."""
+        return MappedProblem, (self.path,)
+
+    def _start(self, preseed, limit, randomize, count):
+        if self._active is not None:
+            # Uncover the rows left covered by an unfinished search
+            self._active.close()
+            self._active = None
+        if self._dlx is None:
+            self._dlx = DLX(len(self.columns), _Rows(self), self.secondary)
+        subsets = {}
+        if isinstance(preseed, set):
+            if self._row_index is None:
+                self._row_index = {s_key: row for row, s_key in enumerate(self.rows)}
+            subsets = {r: self.indices[self.indptr[self._row_index[r]]:
+                                       self.indptr[self._row_index[r] + 1]]
+                       for r in preseed if r in self._row_index}
+        _preseed = _check_preseed(preseed, subsets)
+        if _preseed is None:
+            return iter(())
+        self._active = _search(self._dlx, [self._row_index[r] for r in _preseed],
+                               _make_limit(limit), count, self.rows, randomize)
+        return self._active
+
+
+class _Rows:
+    """The column indices of each subset of a `MappedProblem`, as `DLX` reads them."""
+
+    def __init__(self, problem):
+        self._problem = problem
+
+    def __len__(self):
+        return len(self._problem.indptr) - 1
+
+    def __iter__(self):
+        return self._problem.row_columns()
+
+
+class _Labels(Sequence):
+    """A read-only sequence of labels decoded from the `repr` strings in `blob` when accessed."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(len(self))[i]]
+        i = range(len(self))[i]
+        return ast.literal_eval(str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf-8'))
+
+
+class _Encoder:
+    """The offsets and `repr` strings of labels, as `_Labels` reads them."""
+
+    def __init__(self, labels=()):
+        self.offsets = array('Q', [0])
+        self.blob = bytearray()
+        for label in labels:
+            self.append(label)
+
+    def append(self, label):
+        if not _storable(label):
+            raise ValueError(f'{label!r} cannot be stored as a label: labels must be strings, '
+                             f'ints, finite floats, bytes, None or tuples of these')
+        self.blob += repr(label).encode()
+        self.offsets.append(len(self.blob))
+
+    def tofile(self, f):
+        self.offsets.tofile(f)
+        f.write(self.blob)
+
+
+def _storable(label):
+    """Return whether `ast.literal_eval` gives `label` back from its `repr`."""
+    label_type = type(label)
+    if label_type is tuple:
+        return all(map(_storable, label))
+    if label_type is float:
+        # The repr of infinities and NaN is not a literal
+        return math.isfinite(label)
+    return label_type in _LABEL_TYPES
@@ -0,0 +1,340 @@
+"""Compact storage of the solutions of an exact cover problem, in memory or in files."""
+
+
+import gzip
+import io
+import itertools
+import json
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Sequence
+from typing import Any, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+
+# The count that marks the end of the solutions of a binary file
+_END = 0xFFFFFFFF
+
+# The number of offsets packed at a time at the end of a binary file
+_CHUNK = 1 << 16
+
+# The first bytes of a gzip file
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+class Solutions(Sequence):
+    """A read-only sequence of solutions stored as row indices in two flat arrays.
+
+    `solve` returns one with `output='array'`. A solution is stored as the sorted indices of its
+    subsets in `subsets_rows`, four bytes each, instead of a set of row keys, which takes a couple
+    of hundred bytes plus eight per key. Indexing or iterating decodes the solutions into sets of
+    row keys on demand. The arrays pickle as raw bytes, so the solutions are also cheap to send to
+    another process.
+
+    Args:
+        row_keys:
+            The row keys, in the order of `subsets_rows`, that the indices refer to.
+        solutions:
+            The solutions to store first, as iterables of indices. Default: `()`
+
+    Attributes:
+        row_keys:
+            The row keys that the indices refer to.
+        indices:
+            An `array('I')` holding the indices of every solution, one solution after the other.
+        offsets:
+            An `array('Q')` whose items `i` and `i + 1` are the start and end of solution `i` in
+            `indices`. It starts with `0` and has one more item than there are solutions.
+    """
+
+    def __init__(self, row_keys: List[Hashable], solutions: Iterable[Iterable[int]] = ()):
+        """Store `solutions`."""
+        self.row_keys = row_keys
+        self.indices = array('I')
+        self.offsets = array('Q', [0])
+        for solution in solutions:
+            self.append(solution)
+
+    def append(self, solution: Iterable[int]):
+        """Add a solution given as the indices of its subsets."""
+        self.indices.extend(solution)
+        self.offsets.append(len(self.indices))
+
+    def __len__(self) -> int:
+        """Return the number of solutions."""
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[set, List[set]]:
+        """Return solution `i` as a set of row keys, or a list of them for a slice."""
+        if isinstance(i, slice):
+            return [self[j] for j in range(len(self))[i]]
+        return {self.row_keys[row] for row in self.solution_indices(i)}
+
+    def __iter__(self) -> Iterator[set]:
+        """Yield the solutions as sets of row keys."""
+        for i in range(len(self)):
+            yield self[i]
+
+    def solution_indices(self, i: int) -> Tuple[int, ...]:
+        """Return solution `i` as the sorted indices of its subsets in `subsets_rows`."""
+        i = range(len(self))[i]
+        return tuple(self.indices[self.offsets[i]:self.offsets[i + 1]])
+
+    def __repr__(self):
+        """Return the number of solutions."""
+        return f'Solutions({len(self)} solutions)'
+
+
+class SolutionWriter:
+    """Writes solutions to a file one at a time, as sorted row indices.
+
+    Pass a writer as the `sink` option of `solve` to store each solution as soon as the search
+    finds it, instead of holding the list in memory. Writes are buffered, and the file is complete
+    once the writer is closed, which leaving a `with` block does.
+
+    The `'ndjson'` format writes one JSON list of indices per line. The `'binary'` format writes
+    the magic bytes `MAGIC`, then each solution as a little-endian 4-byte count followed by its
+    4-byte indices, then a count of `0xFFFFFFFF`. An uncompressed binary file ends with the byte
+    offset of each solution and of the end marker, as 8-byte integers, then the number of
+    solutions and `MAGIC` again, which let `SolutionReader` find any solution without reading
+    the others.
+
+    Args:
+        path:
+            The path of the file, which is created or truncated.
+        format:
+            `'binary'` or `'ndjson'`. This option is ignored if the value is not one of these
+            names. Default: `'binary'`
+        compress:
+            When `True`, the file is compressed with gzip. A compressed file can only be read in
+            order, by `read_solutions`. This option is ignored if the value is not a boolean.
+            Default: `False`
+        buffer_size:
+            A positive integer. The number of bytes buffered before they are written to the file.
+            This option is ignored if the value is not a positive integer. Default: `1 << 20`
+
+    Attributes:
+        written:
+            The number of solutions written so far.
+    """
+
+    #: The bytes that start and end a binary solution file.
+    MAGIC = b'XCOVSOL1'
+
+    def __init__(self, path: Union[str, os.PathLike], format: str = 'binary',
+                 compress: bool = False, buffer_size: int = 1 << 20):
+        """Open the file and write the header of the binary format."""
+        self.binary = format != 'ndjson'
+        if not isinstance(buffer_size, int) or buffer_size <= 0:
+            buffer_size = 1 << 20
+        if compress is True:
+            self._file = io.BufferedWriter(gzip.open(path, 'wb'), buffer_size)
+        else:
+            self._file = open(path, 'wb', buffering=buffer_size)
+        # The byte offset of each solution, which is only written for random access
+        self._offsets = array('Q') if self.binary and compress is not True else None
+        self._position = 0
+        self.written = 0
+        if self.binary:
+            self._write(self.MAGIC)
+
+    def append(self, solution: Iterable[int]):
+        """Write a solution given as the indices of its subsets."""
+        if self.binary:
+            solution = tuple(solution)
+            if self._offsets is not None:
+                self._offsets.append(self._position)
+            self._write(struct.pack(f'<{len(solution) + 1}I', len(solution), *solution))
+        else:
+            self._write(json.dumps(list(solution), separators=(',', ':')).encode() + b'\n')
+        self.written += 1
+
+    def close(self):
+        """Finish the file and close it."""
+        if self._file.closed:
+            return
+        if self.binary:
+            self._write(struct.pack('<I', _END))
+            if self._offsets is not None:
+                self._offsets.append(self._position - 4)
+                for i in range(0, len(self._offsets), _CHUNK):
+                    chunk = self._offsets[i:i + _CHUNK]
+                    self._write(struct.pack(f'<{len(chunk)}Q', *chunk))
+                self._write(struct.pack('<Q', self.written) + self.MAGIC)
+        self._file.close()
+
+    def __enter__(self) -> 'SolutionWriter':
+        """Return the writer."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the file."""
+        self.close()
+
+    def _write(self, data):
+        self._file.write(data)
+        self._position += len(data)
+
+
+class SolutionReader(Sequence):
+    """A read-only sequence of the solutions in a file written by `SolutionWriter`.
+
+    The file is memory-mapped, so solutions are read from the page cache when they are accessed
+    and several processes can share one copy. Binary files find any solution through their
+    offsets. NDJSON files, and binary files that were not closed by their writer, are scanned once
+    when they are opened to find where each solution starts. Compressed files cannot be mapped, so
+    read them with `read_solutions`.
+
+    Args:
+        path:
+            The path of the file.
+        row_keys:
+            The row keys, in the order of `subsets_rows`, that the indices refer to. When given,
+            the solutions are decoded into sets of row keys, and otherwise they are sorted tuples
+            of indices. Default: `None`
+
+    Raises:
+        ValueError: The file is compressed.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], row_keys: Optional[List[Hashable]] = None):
+        """Map the file and find its solutions."""
+        self.row_keys = row_keys
+        with open(path, 'rb') as f:
+            if f.read(2) == _GZIP_MAGIC:
+                raise ValueError(f'{path} is compressed, so it can only be read by read_solutions')
+            # An empty file, which has no solutions, cannot be mapped
+            empty = os.fstat(f.fileno()).st_size == 0
+            self._map = b'' if empty else mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = SolutionWriter.MAGIC
+        self.binary = self._map[:len(magic)] == magic
+        if self.binary and len(self._map) > 2 * len(magic) and self._map[-len(magic):] == magic:
+            # The offsets are read from the file when they are needed
+            self._count, = struct.unpack_from('<Q', self._map, len(self._map) - len(magic) - 8)
+            self._index = len(self._map) - len(magic) - 8 * (self._count + 2)
+            self._offsets = None
+        else:
+            self._offsets = self._scan()
+            self._count = len(self._offsets) - 1
+
+    def _scan(self):
+        """Return the offset of each solution and of the end of the last one."""
+        offsets = array('Q')
+        if not self.binary:
+            position = 0
+            while True:
+                offsets.append(position)
+                end = self._map.find(b'\n', position)
+                if end < 0:
+                    # A partial last line is not a solution
+                    return offsets
+                position = end + 1
+        position = len(SolutionWriter.MAGIC)
+        while position + 4 <= len(self._map):
+            size, = struct.unpack_from('<I', self._map, position)
+            if size == _END or position + 4 * (size + 1) > len(self._map):
+                break
+            offsets.append(position)
+            position += 4 * (size + 1)
+        offsets.append(position)
+        return offsets
+
+    def _offset(self, i):
+        """Return the byte offset of solution `i`, or of the end of the last one."""
+        if self._offsets is None:
+            return struct.unpack_from('<Q', self._map, self._index + 8 * i)[0]
+        return self._offsets[i]
+
+    def __len__(self) -> int:
+        """Return the number of solutions."""
+        return self._count
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        """Return solution `i`, or a list of them for a slice."""
+        if isinstance(i, slice):
+            return [self[j] for j in range(len(self))[i]]
+        solution = self.solution_indices(i)
+        if self.row_keys is None:
+            return solution
+        return {self.row_keys[row] for row in solution}
+
+    def __iter__(self) -> Iterator[Any]:
+        """Yield the solutions in the order they were written."""
+        for i in range(len(self)):
+            yield self[i]
+
+    def solution_indices(self, i: int) -> Tuple[int, ...]:
+        """Return solution `i` as the sorted indices of its subsets in `subsets_rows`."""
+        i = range(len(self))[i]
+        start = self._offset(i)
+        if self.binary:
+            size, = struct.unpack_from('<I', self._map, start)
+            return struct.unpack_from(f'<{size}I', self._map, start + 4)
+        return tuple(json.loads(self._map[start:self._offset(i + 1)]))
+
+    def close(self):
+        """Unmap the file."""
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    def __enter__(self) -> 'SolutionReader':
+        """Return the reader."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Unmap the file."""
+        self.close()
+
+
+def read_solutions(path: Union[str, os.PathLike],
+                   row_keys: Optional[List[Hashable]] = None) -> Iterator[Any]:
+    """Yield the solutions of a file written by `SolutionWriter`, in the order they were written.
+
+    The file is read in order through a buffer, so compressed files can be read too, and a file
+    whose writer was not closed yields the solutions written before the last buffer was lost.
+
+    Args:
+        path:
+            The path of the file.
+        row_keys:
+            The row keys that the indices refer to, as in `SolutionReader`. Default: `None`
+
+    Returns:
+        Iterator[Any]: An iterator over the solutions, as sets of row keys when `row_keys` is
+        given, or sorted tuples of indices otherwise.
+    """
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == _GZIP_MAGIC
+    with (gzip.open(path, 'rb') if compressed else open(path, 'rb')) as f:
+        magic = SolutionWriter.MAGIC
+        header = f.read(len(magic))
+        if header == magic:
+            solutions = _read_records(f)
+        else:
+            solutions = (tuple(json.loads(line)) for line in _lines(header, f))
+        for solution in solutions:
+            yield solution if row_keys is None else {row_keys[row] for row in solution}
+
+
+def _read_records(f):
+    """Yield the solutions of the binary file `f`, read past its magic bytes."""
+    while True:
+        data = f.read(4)
+        if len(data) < 4:
+            return
+        size, = struct.unpack('<I', data)
+        if size == _END:
+            return
+        data = f.read(4 * size)
+        if len(data) < 4 * size:
+            return
+        yield struct.unpack(f'<{size}I', data)
+
+
+def _lines(start, f):
+    """Yield the complete lines of the NDJSON file `f`, whose first bytes `start` were read."""
+    # The first bytes may hold several short lines, and the rest of the last one is read after
+    for line in itertools.chain((start + f.readline()).splitlines(True), f):
+        if not line.endswith(b'\n'):
+            return
+        yield line
@@ -0,0 +1,94 @@
+"""Statistics about the search of an exact cover problem."""
+
+
+from typing import Dict
+
+
+class SearchStats:
+    """Counters that `solve` and `iter_solve` fill in when given the `stats` option.
+
+    Depths are counted in subsets chosen by the search, so the preseed subsets are not included.
+    The counts of a search are added to those already in the object, so one object can gather
+    several searches.
+
+    Attributes:
+        nodes:
+            The number of nodes visited. A node is a partial solution whose next element to cover
+            is chosen, or a solution.
+        solutions_by_depth:
+            The number of solutions reached at each depth. Solutions that are skipped, such as
+            those of an orbit already found with `symmetries`, are included, and those reused from
+            the cache with `memo` are not.
+        branching:
+            For each depth, a histogram of the branching factors of the nodes at that depth,
+            mapping each branching factor to the number of nodes with it. The branching factor of
+            a node is the number of subsets that can cover the element it chooses, so dead ends
+            have a branching factor of `0`.
+        updates:
+            The number of rows removed when a subset is chosen, plus the number of rows restored
+            when it is unchosen, which are the updates of Knuth's Dancing Links. The subset itself
+            is one of the rows removed.
+        setup_time:
+            The wall time in seconds spent building the search engine.
+        search_time:
+            The wall time in seconds spent searching. The time between solutions spent by the
+            caller of `iter_solve` is not included.
+    """
+
+    def __init__(self):
+        """Start every counter at zero."""
+        self.nodes = 0
+        self.solutions_by_depth: Dict[int, int] = {}
+        self.branching: Dict[int, Dict[int, int]] = {}
+        self.updates = 0
+        self.setup_time = 0.0
+        self.search_time = 0.0
+
+    def __repr__(self):
+        """Return the counters."""
+        return (f'SearchStats(nodes={self.nodes}, solutions_by_depth={self.solutions_by_depth}, '
+                f'branching={self.branching}, updates={self.updates}, '
+                f'setup_time={self.setup_time:.6f}, search_time={self.search_time:.6f})')
+
+
+class _StatsEngine:
+    """A search engine that counts the calls made to another engine in a `SearchStats`.
+
+    The search is given this engine instead of the one it wraps when statistics are wanted, so the
+    engines themselves carry no counters. `depth` starts at minus the number of preseed rows, so
+    it is zero once they are covered.
+    """
+
+    def __init__(self, engine, stats, depth):
+        """Wrap `engine`."""
+        self.engine = engine
+        self.stats = stats
+        self.depth = -depth
+        # The number of rows removed by each cover, to add again when it is undone
+        self.removed = []
+
+    def choose(self):
+        """Count a node and return the rows of the next column."""
+        rows = self.engine.choose()
+        stats = self.stats
+        stats.nodes += 1
+        if rows is None:
+            stats.solutions_by_depth[self.depth] = stats.solutions_by_depth.get(self.depth, 0) + 1
+        else:
+            histogram = stats.branching.setdefault(self.depth, {})
+            histogram[len(rows)] = histogram.get(len(rows), 0) + 1
+        return rows
+
+    def cover(self, row):
+        """Count the rows removed by covering `row`, then cover it."""
+        removed = self.engine.conflicts(row)
+        self.removed.append(removed)
+        self.stats.updates += removed
+        self.engine.cover(row)
+        self.depth += 1
+
+    def uncover(self, row):
+        """Uncover `row` and count the rows restored."""
+        self.engine.uncover(row)
+        self.stats.updates += self.removed.pop()
+        self.depth -= 1
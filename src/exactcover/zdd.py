@@ -0,0 +1,236 @@
+"""Zero-suppressed decision diagrams of the solutions of an exact cover problem."""
+
+
+from random import Random, randrange
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple, Union
+
+from .exactcover import _fold, _prepare, _row_masks
+
+
+def solve_zdd(universe_columns: Union[Dict[Hashable, Any], List[Hashable], set, str,
+                                      Tuple[Hashable]],
+              subsets_rows: Dict[Hashable, set],
+              preseed: Optional[set] = None, engine: Optional[str] = None,
+              secondary: Optional[set] = None) -> 'ZDD':
+    """Return every solution of an exact cover problem as a ZDD.
+
+    The search is the one `solve` runs, but each node of the search tree becomes a node of the
+    diagram instead of a list of solutions. The subproblems left after covering the same columns
+    are solved once and shared, so the diagram can hold far more solutions than could be listed.
+
+    Args:
+        universe_columns:
+            The set of elements in the universe/columns. Duplicate elements are silently ignored.
+        subsets_rows:
+            The collection of subsets in `universe_columns` of type dict.  The values are python
+            set objects that is a subset of `universe_columns`.
+        preseed:
+            A set of hashable row objects used to preseed a partial solution. This option is
+            ignored if the value is not a set object. Default: `None`
+        engine:
+            The search engine, as in `solve`. Default: `None`
+        secondary:
+            The elements that are covered at most once, as in `solve`. Default: `None`
+
+    Returns:
+        ZDD: The family of solutions.
+    """
+    search_engine, preseed_rows, row_keys = _prepare(universe_columns, subsets_rows, False,
+                                                     preseed, engine, secondary)
+    table = _NodeTable()
+    if preseed_rows is None:
+        return ZDD(table, 0)
+    masks = _row_masks(universe_columns, subsets_rows)
+    if row_keys is not None:
+        masks = [masks[s_key] for s_key in row_keys]
+    else:
+        row_keys = {s_key: s_key for s_key in subsets_rows}
+    root = _build(search_engine, preseed_rows, masks, row_keys, table)
+    for row in reversed(preseed_rows):
+        root = table.make(row_keys[row], 0, root)
+    return ZDD(table, root)
+
+
+def _build(engine, preseed_rows, masks, row_keys, table):
+    """Search `engine` after covering `preseed_rows` and return the root node of its solutions.
+
+    A search node whose column has the rows `r1, ..., rk` becomes a chain of diagram nodes, one per
+    row, whose high edge leads to the solutions that contain the row and whose low edge leads to
+    the next row of the column. The root of the subproblem left after covering a set of columns is
+    cached under the mask of those columns.
+    """
+
+    def combine(rows, children):
+        node = 0
+        for row, child in zip(reversed(rows), reversed(children)):
+            node = table.make(row_keys[row], node, child)
+        return node
+
+    return _fold(engine, preseed_rows, masks, combine, {})
+
+
+class _NodeTable:
+    """The nodes of one or more diagrams, with a unique table so equal nodes are stored once.
+
+    Node `0` is the empty family and node `1` is the family holding only the empty set. Every other
+    node `n` is the family `family(low[n]) | {s | {var[n]} for s in family(high[n])}`.
+    """
+
+    def __init__(self):
+        """Create the two terminal nodes."""
+        self.var = [None, None]
+        self.low = [0, 1]
+        self.high = [0, 1]
+        self.unique = {}
+        # The number of sets in the family of each node, filled in on demand
+        self.counts = [0, 1]
+
+    def make(self, var, low, high):
+        """Return the node for `var`, `low` and `high`, creating it if it does not exist."""
+        if high == 0:
+            return low
+        key = (var, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = len(self.var)
+            self.var.append(var)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = node
+        return node
+
+    def postorder(self, root):
+        """Return the nodes reachable from `root`, each one after its low and high nodes."""
+        order = []
+        seen = {0, 1}
+        stack = [root]
+        while stack:
+            node = stack[-1]
+            if node in seen:
+                stack.pop()
+                continue
+            low = self.low[node]
+            high = self.high[node]
+            if low in seen and high in seen:
+                seen.add(node)
+                order.append(stack.pop())
+            else:
+                stack.append(low)
+                stack.append(high)
+        return order
+
+    def count(self, root):
+        """Return the number of sets in the family of `root`."""
+        counts = self.counts
+        if root >= len(counts):
+            counts.extend([None] * (len(self.var) - len(counts)))
+        if counts[root] is None:
+            low = self.low
+            high = self.high
+            for node in self.postorder(root):
+                if counts[node] is None:
+                    counts[node] = counts[low[node]] + counts[high[node]]
+        return counts[root]
+
+
+class ZDD:
+    """A family of solutions stored as a zero-suppressed decision diagram.
+
+    Each node of the diagram splits the family on one row: its high edge leads to the solutions
+    that contain the row and its low edge to those that do not. Rows may appear in a different
+    order on different paths, but never twice on the same path. Nodes with equal rows and edges
+    are stored once, so a family of billions of solutions can take a few thousand nodes. The
+    solutions are only built as sets when they are iterated over or sampled.
+
+    `ZDD` objects are returned by `solve_zdd` and `containing`.
+    """
+
+    def __init__(self, table: _NodeTable, root: int):
+        """Wrap the family of node `root` of `table`."""
+        self._table = table
+        self._root = root
+
+    def count(self) -> int:
+        """Return the number of solutions."""
+        return self._table.count(self._root)
+
+    def __iter__(self) -> Iterator[set]:
+        """Yield the solutions.
+
+        With the `'dlx'` and `'bitset'` engines, the solutions come in the same order as from
+        `solve`.
+        """
+        var = self._table.var
+        low = self._table.low
+        high = self._table.high
+        path = []
+        # Low nodes left to visit, with the length of the path leading to them
+        stack = [(self._root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            del path[depth:]
+            while node > 1:
+                if low[node]:
+                    stack.append((low[node], len(path)))
+                path.append(var[node])
+                node = high[node]
+            if node:
+                yield set(path)
+
+    def sample(self, rng: Optional[Random] = None) -> Optional[set]:
+        """Return a solution chosen uniformly at random, or `None` if there are no solutions.
+
+        Args:
+            rng:
+                The `random.Random` instance to draw from. The `random` module is used when it is
+                `None`. Default: `None`
+
+        Returns:
+            Optional[set]: A solution.
+        """
+        table = self._table
+        if not table.count(self._root):
+            return None
+        draw = randrange if rng is None else rng.randrange
+        counts = table.counts
+        solution = set()
+        node = self._root
+        while node > 1:
+            high = table.high[node]
+            if draw(counts[node]) < counts[high]:
+                solution.add(table.var[node])
+                node = high
+            else:
+                node = table.low[node]
+        return solution
+
+    def containing(self, row: Hashable) -> 'ZDD':
+        """Return the solutions that contain `row`, as a diagram that shares nodes with this one.
+
+        Args:
+            row:
+                A row key. A row that is in no solution gives an empty family.
+
+        Returns:
+            ZDD: The family of solutions that contain `row`.
+        """
+        table = self._table
+        var = table.var
+        low = table.low
+        high = table.high
+        # The node of the solutions below each node that contain `row`
+        restricted = {0: 0, 1: 0}
+        # The solutions below the low edge of a node never contain its row, because they contain
+        # another row of the same column
+        for node in table.postorder(self._root):
+            if var[node] == row:
+                restricted[node] = table.make(row, 0, high[node])
+            else:
+                restricted[node] = table.make(var[node], restricted[low[node]],
+                                              restricted[high[node]])
+        return ZDD(table, restricted[self._root])
+
+    @property
+    def node_count(self) -> int:
+        """int: The number of nodes reachable from the root, terminals excluded."""
+        return len(self._table.postorder(self._root))
@@ -0,0 +1,162 @@
+"""Tests for the aio module."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from exactcover import solve, iter_solve, ExactCoverKeyError, ExactCoverSearchStopped
+from exactcover.aio import solve_async, iter_solve_async, _solve_cancellable
+from exactcover.parallel import _STOP_POLL_NODES
+from helpers import strip
+
+
+async def collect(solutions, n=None):
+    """Return the first `n` solutions of an async iterator, or all of them."""
+    result = []
+    async for solution in solutions:
+        result.append(solution)
+        if len(result) == n:
+            break
+    return result
+
+
+def test_solve_async(example, engine):
+    result = asyncio.run(solve_async(example['u'], example['s'], engine=engine))
+    assert solve(example['u'], example['s'], engine=engine) == result
+    count = asyncio.run(solve_async(example['u'], example['s'], engine=engine, count=True))
+    assert 4 == count
+
+
+def test_solve_async_in_process():
+    u, s = strip(10)
+
+    async def main():
+        with ProcessPoolExecutor(1) as executor:
+            return await solve_async(u, s, executor=executor, engine='dlx')
+
+    assert solve(u, s, engine='dlx') == asyncio.run(main())
+
+
+@pytest.mark.parametrize('executor_type', [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_cancel_stops_search(executor_type):
+    # The strip has about 5.7e20 tilings, far more than a search can count
+    u, s = strip(100)
+
+    async def main(executor):
+        task = asyncio.ensure_future(solve_async(u, s, executor=executor, count=True,
+                                                 engine='dlx'))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    executor = executor_type(1)
+    asyncio.run(main(executor))
+    start = time.monotonic()
+    executor.shutdown(wait=True)
+    assert time.monotonic() - start < 5
+
+
+def test_solve_cancellable_polls_event():
+    u, s = strip(30)
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(ExactCoverSearchStopped) as e:
+        _solve_cancellable(cancel, True, u, s, {'engine': 'dlx'})
+    assert _STOP_POLL_NODES - 1 == e.value.nodes
+
+
+def test_given_cancel_still_stops(example):
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(ExactCoverSearchStopped) as e:
+        asyncio.run(solve_async(example['u'], example['s'], cancel=cancel))
+    assert 'cancel' == e.value.reason
+
+
+def test_errors_propagate(example):
+    example['s']['B'].add(10)
+    with pytest.raises(ExactCoverKeyError):
+        asyncio.run(solve_async(example['u'], example['s']))
+    with pytest.raises(ExactCoverKeyError):
+        asyncio.run(collect(iter_solve_async(example['u'], example['s'])))
+
+
+def test_iter_solve_async(example, engine):
+    result = asyncio.run(collect(iter_solve_async(example['u'], example['s'], engine=engine)))
+    assert list(iter_solve(example['u'], example['s'], engine=engine)) == result
+
+
+def test_iter_solve_async_executor():
+    u, s = strip(12)
+
+    async def main():
+        with ThreadPoolExecutor(1) as executor:
+            return await collect(iter_solve_async(u, s, maxsize=2, executor=executor))
+
+    assert list(iter_solve(u, s)) == asyncio.run(main())
+
+
+def test_iter_solve_async_waits_for_consumer():
+    u, s = strip(20)
+    found = []
+
+    async def main():
+        solutions = iter_solve_async(u, s, maxsize=2, progress=lambda *args: found.append(args[2]),
+                                     progress_every=1)
+        await solutions.__anext__()
+        await asyncio.sleep(0.2)
+        # The first solution was taken and two wait in the queue, so the search stops at the node
+        # of the fourth one, which it reports before counting it
+        assert 3 == max(found)
+        await solutions.aclose()
+
+    asyncio.run(main())
+
+
+def test_iter_solve_async_stops_when_closed():
+    u, s = strip(40)
+    executor = ThreadPoolExecutor(1)
+
+    async def main():
+        solutions = iter_solve_async(u, s, executor=executor)
+        assert 3 == len(await collect(solutions, 3))
+        await solutions.aclose()
+
+    asyncio.run(main())
+    start = time.monotonic()
+    executor.shutdown(wait=True)
+    assert time.monotonic() - start < 5
+
+
+def test_iter_solve_async_stops_when_cancelled():
+    u, s = strip(40)
+    executor = ThreadPoolExecutor(1)
+
+    async def main():
+        task = asyncio.ensure_future(collect(iter_solve_async(u, s, maxsize=1,
+                                                              executor=executor)))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    start = time.monotonic()
+    executor.shutdown(wait=True)
+    assert time.monotonic() - start < 5
+
+
+def test_iter_solve_async_timeout():
+    u, s = strip(40)
+
+    async def main():
+        solutions = []
+        with pytest.raises(ExactCoverSearchStopped) as e:
+            async for solution in iter_solve_async(u, s, timeout=0.1, maxsize='a'):
+                solutions.append(solution)
+        assert 'timeout' == e.value.reason
+        assert solutions
+
+    asyncio.run(main())
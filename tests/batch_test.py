@@ -0,0 +1,114 @@
+"""Tests for the batch module."""
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from exactcover import solve, solve_many, ExactCoverKeyError, ExactCoverSearchStopped
+from exactcover import batch
+from helpers import queens, strip
+
+
+@pytest.fixture(params=[1, 2])
+def jobs(request):
+    return request.param
+
+
+def problems():
+    """Return problems with different universes, options and preseeds."""
+    u, s = strip(10)
+    qu, qs, diagonals = queens(6)
+    return [
+        (u, s, {}),
+        (u, s, {'preseed': {('v', 0)}}),
+        (u, s, {'preseed': {('h', 0, 0), ('h', 1, 0)}, 'count': True}),
+        (u, s, {'preseed': {('v', 0), ('h', 0, 0)}}),
+        (u, s, {'preseed': {('v', 0), ('h', 0, 0)}, 'count': True}),
+        (u, s, {'limit': 3, 'engine': 'dlx'}),
+        (qu, qs, {'secondary': diagonals}),
+        (qu, qs, {'secondary': diagonals, 'engine': 'dict'}),
+        (u, s, {'memo': True, 'count': True}),
+    ]
+
+
+def test_same_results_as_solve(jobs):
+    expected = [solve(u, s, **options) for u, s, options in problems()]
+    assert expected == list(solve_many(problems(), jobs=jobs, chunksize=4))
+
+
+def test_unordered(jobs):
+    expected = [solve(u, s, **options) for u, s, options in problems()]
+    result = dict(solve_many(problems(), jobs=jobs, chunksize=2, ordered=False))
+    assert expected == [result[i] for i in range(len(expected))]
+
+
+def test_reads_problems_lazily():
+    u, s = strip(6)
+    read = []
+
+    def stream():
+        for i in range(100):
+            read.append(i)
+            yield u, s, {'count': True}
+
+    results = solve_many(stream(), jobs=1, chunksize=10)
+    assert 13 == next(results)
+    assert 10 == len(read)
+    assert [13] * 99 == list(results)
+
+
+def test_shares_compiled_engines(monkeypatch):
+    u, s = strip(8)
+    built = []
+    build_engine = batch._build_engine
+    monkeypatch.setattr(batch, '_build_engine', lambda *args: built.append(args) or
+                        build_engine(*args))
+    preseeds = [{('v', i)} for i in range(8)]
+    result = list(solve_many([(u, s, {'preseed': p}) for p in preseeds], jobs=1, chunksize=5))
+    assert [solve(u, s, preseed=p) for p in preseeds] == result
+    # One engine per chunk
+    assert 2 == len(built)
+    # A copy of the subsets is not the same problem
+    list(solve_many([(u, s, {}), (u, dict(s), {}), (u, s, {'engine': 'dlx'})], jobs=1))
+    assert 5 == len(built)
+
+
+def test_errors_are_raised_in_place(jobs):
+    u, s = strip(6)
+    bad = {**s, 'x': {'no such element'}}
+    results = solve_many([(u, s, {'count': True}), (u, bad, {}), (u, s, {})], jobs=jobs)
+    assert 13 == next(results)
+    with pytest.raises(ExactCoverKeyError):
+        next(results)
+    results = solve_many([(u, s, {'preseed': {'x'}})], jobs=jobs)
+    with pytest.raises(ExactCoverKeyError):
+        next(results)
+
+
+def test_stopped_search_keeps_its_result(jobs):
+    u, s = strip(20)
+    with pytest.raises(ExactCoverSearchStopped) as e:
+        list(solve_many([(u, s, {'count': True, 'max_nodes': 100})], jobs=jobs))
+    assert 'max_nodes' == e.value.reason
+    assert e.value.result > 0
+
+
+def test_shared_executor():
+    u, s = strip(8)
+    with ProcessPoolExecutor(2) as executor:
+        for n in range(2):
+            result = solve_many([(u, s, {'count': True})] * 50, chunksize='a', ordered=None,
+                                executor=executor)
+            assert [34] * 50 == list(result)
+        # The executor is still usable
+        assert 4 == executor.submit(pow, 2, 2).result()
+
+
+def test_early_close_cancels_chunks():
+    u, s = strip(14)
+    results = solve_many([(u, s, {})] * 200, jobs=2, chunksize=1)
+    assert 610 == len(next(results))
+    results.close()
+
+
+def test_invalid_jobs_uses_cpu_count():
+    u, s = strip(6)
+    assert [13, 13] == list(solve_many([(u, s, {'count': True})] * 2, jobs='a'))
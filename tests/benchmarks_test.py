@@ -0,0 +1,98 @@
+"""Tests for the benchmarks package."""
+import json
+
+import pytest
+from exactcover import solve
+from benchmarks import instances, runner
+from benchmarks.__main__ import main
+from helpers import strip
+
+
+@pytest.mark.parametrize('instance, count', [
+    (instances.sudoku(instances.EASY_SUDOKU), 1),
+    (instances.queens(6), 4),
+    (instances.langford(4), 2),
+    (instances.pentominoes(3, 20, quarter='X'), 4),
+])
+def test_instances(instance, count):
+    universe, subsets, options = instance
+    assert count == solve(universe, subsets, count=True, **options)
+
+
+def test_sudoku_solution():
+    universe, subsets, options = instances.sudoku(instances.HARD_SUDOKU)
+    [solution] = solve(universe, subsets, **options)
+    assert options['preseed'] <= solution
+    assert 81 == len({(r, c) for r, c, _ in solution})
+
+
+def test_random_sparse_has_a_solution():
+    universe, subsets, _ = instances.random_sparse(30, 60, seed=1)
+    assert 60 == len(subsets)
+    assert all(1 <= len(subset) <= 4 for subset in subsets.values())
+    assert solve(universe, subsets, limit=1)
+    assert (universe, subsets) == instances.random_sparse(30, 60, seed=1)[:2]
+
+
+def test_run():
+    reports = []
+    results = runner.run(['queens-8'], repeat=1,
+                         report=lambda *args: reports.append(args[:2]))
+    assert [('queens-8', mode) for mode in runner.MODES] == reports
+    assert 92 == results['queens-8']['enumerate']['solutions']
+    assert 92 == results['queens-8']['count']['solutions']
+    assert 1 == results['queens-8']['limit=1']['solutions']
+    measured = results['queens-8']['count']
+    assert measured['nodes'] == results['queens-8']['enumerate']['nodes']
+    assert results['queens-8']['limit=1']['nodes'] < measured['nodes']
+    assert measured['time'] > 0
+
+
+def test_measure_peak_memory():
+    u, s = strip(20)
+    # The 10946 solutions take a few MiB, which the count does not hold
+    listed = runner.measure(u, s, {}, repeat=1)
+    counted = runner.measure(u, s, {'count': True}, repeat=1)
+    assert 10946 == listed['solutions'] == counted['solutions']
+    assert listed['peak_memory'] > max(counted['peak_memory'], 1 << 20)
+
+
+def test_compare():
+    baseline = {'a': {'count': {'time': 1.0, 'nodes': 10, 'peak_memory': 100, 'solutions': 5},
+                      'randomize': {'time': 1.0, 'nodes': 10, 'peak_memory': 100,
+                                    'solutions': 5}}}
+    results = {'a': {'count': {'time': 1.1, 'nodes': 20, 'peak_memory': 100, 'solutions': 4},
+                     'randomize': {'time': 2.0, 'nodes': 20, 'peak_memory': 100,
+                                   'solutions': 5},
+                     'limit=1': {'time': 9.0, 'nodes': 9, 'peak_memory': 9, 'solutions': 1}},
+               'b': {'count': {'time': 9.0, 'nodes': 9, 'peak_memory': 9, 'solutions': 1}}}
+    regressions = runner.compare(results, baseline, 0.2)
+    assert [('count', 'solutions'), ('count', 'nodes'), ('randomize', 'time')] == [
+        (regression.mode, regression.metric) for regression in regressions]
+    assert 'a count: nodes +100% (10 -> 20)' == str(regressions[1])
+    assert 'a randomize: time +100% (1000.0 ms -> 2000.0 ms)' == str(regressions[2])
+    assert 'changed' in str(regressions[0])
+    assert [] == runner.compare(results, baseline, 1.5)[1:]
+    zero = runner.Regression('a', 'count', 'peak_memory', 0, 1024)
+    assert 'a count: peak_memory from 0 (0 KiB -> 1 KiB)' == str(zero)
+
+
+def test_main_saves_and_compares(tmp_path, capsys):
+    path = str(tmp_path / 'baseline.json')
+    assert 0 == main(['queens-8', '--mode', 'count', '--repeat', '1', '--save', path])
+    with open(path) as f:
+        saved = json.load(f)
+    assert ['queens-8'] == list(saved['results'])
+    assert saved['results'] == runner.load(path)
+    assert 0 == main(['queens-8', '--mode', 'count', '--compare', path, '--tolerance', '1000'])
+    assert 'No regressions' in capsys.readouterr().out
+    saved['results']['queens-8']['count']['solutions'] = 3
+    with open(path, 'w') as f:
+        json.dump(saved, f)
+    assert 1 == main(['queens-8', '--mode', 'count', '--compare', path])
+    assert 'REGRESSION queens-8 count: solutions changed' in capsys.readouterr().out
+
+
+def test_main_rejects_unknown_benchmarks():
+    with pytest.raises(SystemExit):
+        main(['no-such-benchmark'])
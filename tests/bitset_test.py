@@ -0,0 +1,85 @@
+"""Tests for the bitset module."""
+from exactcover.bitset import Bitset
+
+
+def state(bitset):
+    return (bitset.covered, bitset.live, list(bitset.planes))
+
+
+def sizes(bitset):
+    return [sum((plane >> col & 1) << i for i, plane in enumerate(bitset.planes))
+            for col in range(len(bitset.col_rows))]
+
+
+def test_masks_and_column_rows():
+    bitset = Bitset(3, [[0, 1], [1, 2], [0]])
+    assert [0b011, 0b110, 0b001] == bitset.masks
+    assert [[0, 2], [0, 1], [1]] == bitset.col_rows
+
+
+def test_sizes():
+    bitset = Bitset(3, [[0, 1], [1, 2], [0], [1]])
+    assert [2, 3, 1] == sizes(bitset)
+
+
+def test_choose_fewest_rows_first_column():
+    bitset = Bitset(3, [[0, 1], [1, 2], [0], [2]])
+    assert [0, 2] == bitset.choose()
+
+
+def test_choose_all_covered():
+    bitset = Bitset(2, [[0, 1]])
+    bitset.cover(0)
+    assert bitset.choose() is None
+
+
+def test_choose_uncoverable_column():
+    bitset = Bitset(2, [[0]])
+    assert [] == bitset.choose()
+
+
+def test_cover_removes_conflicting_rows():
+    bitset = Bitset(3, [[0, 1], [1, 2], [2]])
+    bitset.cover(0)
+    assert [2] == bitset.choose()
+    assert [0, 0, 1] == sizes(bitset)
+
+
+def test_uncover_restores_state():
+    bitset = Bitset(4, [[0, 1], [1, 2], [2, 3], [0, 3], [1]])
+    before = state(bitset)
+    bitset.cover(0)
+    bitset.cover(2)
+    bitset.uncover(2)
+    bitset.uncover(0)
+    assert before == state(bitset)
+
+
+def test_empty_row():
+    bitset = Bitset(1, [[], [0]])
+    before = state(bitset)
+    bitset.cover(0)
+    assert [1] == bitset.choose()
+    bitset.uncover(0)
+    assert before == state(bitset)
+
+
+def test_empty_problem():
+    bitset = Bitset(0, [])
+    assert bitset.choose() is None
+
+
+def test_secondary_column_is_not_chosen():
+    bitset = Bitset(3, [[0, 1], [1], [2], [0, 2]], secondary=[1])
+    assert [0, 3] == bitset.choose()
+    bitset.cover(3)
+    assert bitset.choose() is None
+
+
+def test_secondary_column_removes_conflicting_rows():
+    bitset = Bitset(2, [[0, 1], [1], [0]], secondary=[1])
+    before = state(bitset)
+    bitset.cover(1)
+    assert [2] == bitset.choose()
+    bitset.uncover(1)
+    assert before == state(bitset)
@@ -0,0 +1,26 @@
+"""Fixtures shared by the tests."""
+import pytest
+
+
+@pytest.fixture(params=['dict', 'dlx', 'bitset'])
+def engine(request):
+    """Return the name of each search engine in turn."""
+    return request.param
+
+
+@pytest.fixture
+def example():
+    """Return a problem with four solutions, each containing F."""
+    return {
+        'u': {1, 2, 3, 4, 5, 6, 7},
+        's': {
+            'A': {1, 4, 7},
+            'B': {1, 4},
+            'C': {4, 5, 7},
+            'D': {3, 5, 6},
+            'E': {2, 3, 6, 7},
+            'F': {2, 7},
+            'G': {3, 5, 6},
+            'H': {1, 4},
+            }
+    }
@@ -0,0 +1,102 @@
+"""Tests for the dlx module."""
+from exactcover.dlx import DLX
+
+
+def links(dlx):
+    return (list(dlx.L), list(dlx.R), list(dlx.U), list(dlx.D), list(dlx.S))
+
+
+def test_choose_fewest_rows_first_column():
+    dlx = DLX(3, [[0, 1], [1, 2], [0], [2]])
+    assert [0, 2] == dlx.choose()
+
+
+def test_choose_all_covered():
+    dlx = DLX(2, [[0, 1]])
+    dlx.cover(0)
+    assert dlx.choose() is None
+
+
+def test_choose_uncoverable_column():
+    dlx = DLX(2, [[0]])
+    assert [] == dlx.choose()
+
+
+def test_cover_removes_conflicting_rows():
+    dlx = DLX(3, [[0, 1], [1, 2], [2]])
+    dlx.cover(0)
+    assert [2] == dlx.choose()
+
+
+def test_uncover_restores_links():
+    dlx = DLX(4, [[0, 1], [1, 2], [2, 3], [0, 3], [1]])
+    before = links(dlx)
+    dlx.cover(0)
+    dlx.cover(2)
+    dlx.uncover(2)
+    dlx.uncover(0)
+    assert before == links(dlx)
+
+
+def test_empty_row():
+    dlx = DLX(1, [[], [0]])
+    before = links(dlx)
+    dlx.cover(0)
+    assert [1] == dlx.choose()
+    dlx.uncover(0)
+    assert before == links(dlx)
+
+
+def test_secondary_column_is_not_chosen():
+    dlx = DLX(3, [[0, 1], [1], [2], [0, 2]], secondary=[1])
+    assert [0, 3] == dlx.choose()
+    dlx.cover(3)
+    assert dlx.choose() is None
+
+
+def test_secondary_column_removes_conflicting_rows():
+    dlx = DLX(2, [[0, 1], [1], [0]], secondary=[1])
+    before = links(dlx)
+    dlx.cover(1)
+    assert [2] == dlx.choose()
+    dlx.uncover(1)
+    assert before == links(dlx)
+
+
+def test_add_row_and_column():
+    dlx = DLX(2, [[0], [1]])
+    assert 2 == dlx.add_column()
+    assert 3 == dlx.add_column(secondary=True)
+    assert [] == dlx.choose()
+    assert 2 == dlx.add_row([1, 2, 3])
+    assert 3 == dlx.add_row([])
+    assert [0] == dlx.choose()
+    before = links(dlx)
+    dlx.cover(2)
+    assert [0] == dlx.choose()
+    dlx.cover(0)
+    assert dlx.choose() is None
+    dlx.uncover(0)
+    dlx.uncover(2)
+    assert before == links(dlx)
+
+
+def test_remove_row():
+    dlx = DLX(2, [[0, 1], [0], [1]])
+    dlx.remove_row(0)
+    dlx.remove_row(0)
+    assert [1] == dlx.choose()
+    dlx.cover(1)
+    assert [2] == dlx.choose()
+
+
+def test_remove_column():
+    dlx = DLX(3, [[0, 1], [1], [1, 2], [2]])
+    assert [0, 1, 2] == dlx.remove_column(1)
+    # Row 1 has no columns left and row 0 lost its first node
+    assert -1 == dlx.first[1]
+    assert [0] == dlx.choose()
+    dlx.cover(0)
+    assert [2, 3] == dlx.choose()
+    dlx.cover(2)
+    assert dlx.choose() is None
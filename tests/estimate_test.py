@@ -0,0 +1,83 @@
+"""Tests for the estimate module."""
+import random
+
+import pytest
+from exactcover import ExactCoverKeyError, SearchStats, estimate, solve
+from helpers import queens
+
+
+def test_balanced_tree_is_exact(engine):
+    # Each of 5 elements has 3 subsets that cover only it, so every probe sees the whole tree
+    u = range(5)
+    s = {(x, i): {x} for x in u for i in range(3)}
+    result = estimate(u, s, probes=10, engine=engine)
+    assert 1 + 3 + 9 + 27 + 81 + 243 == result.nodes
+    assert 243 == result.solutions
+    assert (243, 243) == result.solutions_interval
+    assert (result.nodes, result.nodes) == result.nodes_interval
+
+
+@pytest.mark.parametrize('engine', ['dlx', 'bitset'])
+def test_close_to_the_search(engine):
+    u, s, secondary = queens(7)
+    stats = SearchStats()
+    count = solve(u, s, engine=engine, secondary=secondary, count=True, stats=stats)
+    result = estimate(u, s, probes=4000, engine=engine, secondary=secondary,
+                      rng=random.Random(1))
+    assert result.nodes_interval[0] < stats.nodes < result.nodes_interval[1]
+    assert result.solutions_interval[0] < count < result.solutions_interval[1]
+    assert 4000 == result.probes
+    assert 0.95 == result.confidence
+
+
+def test_confidence(example):
+    narrow = estimate(example['u'], example['s'], rng=random.Random(1), confidence=0.5)
+    wide = estimate(example['u'], example['s'], rng=random.Random(1), confidence=0.99)
+    assert narrow.solutions == wide.solutions
+    assert wide.solutions_interval[0] < narrow.solutions_interval[0]
+    assert narrow.solutions_interval[1] < wide.solutions_interval[1]
+
+
+def test_preseed(example, engine):
+    result = estimate(example['u'], example['s'], preseed={'B', 'F'}, engine=engine)
+    assert 3 == result.nodes
+    assert 2 == result.solutions
+    result = estimate(example['u'], example['s'], probes=5, preseed={'A', 'B'}, engine=engine)
+    assert 0 == result.solutions
+    assert 5 == result.probes
+
+
+def test_no_solution(example, engine):
+    example['u'].add(8)
+    result = estimate(example['u'], example['s'], engine=engine)
+    assert 1 == result.nodes
+    assert (0, 0) == result.solutions_interval
+
+
+def test_empty_problem():
+    result = estimate(set(), {}, probes=1)
+    assert 1 == result.nodes
+    assert 1 == result.solutions
+    assert 'solutions=1' in repr(result)
+
+
+def test_ignored_values(example):
+    result = estimate(example['u'], example['s'], probes=0, confidence=2)
+    assert 1000 == result.probes
+    assert 0.95 == result.confidence
+
+
+def test_bad_keys(example):
+    with pytest.raises(ExactCoverKeyError):
+        estimate(example['u'], example['s'], preseed={'Z'})
+
+
+def test_larger_than_floats(engine):
+    # Each of 200 elements has 50 subsets that cover only it, so there are 50 ** 200 solutions
+    u = range(200)
+    s = {(x, i): {x} for x in u for i in range(50)}
+    result = estimate(u, s, probes=3, engine=engine)
+    assert sum(50 ** k for k in range(201)) == result.nodes
+    assert 50 ** 200 == result.solutions
+    assert (50 ** 200, 50 ** 200) == result.solutions_interval
+    assert 'solutions=6.22302e+339' in repr(result)
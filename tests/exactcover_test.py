@@ -1,6 +1,12 @@
 """Tests for the exactcover module."""
+import json
+import random
+import threading
+
 import pytest
-from exactcover.exactcover import solve, ExactCoverKeyError
+import exactcover.exactcover
+from exactcover.exactcover import solve, iter_solve, ExactCoverKeyError, ExactCoverSearchStopped
+from helpers import queens, strip
 
 
 @pytest.fixture
@@ -36,129 +42,135 @@ def small_example():
     }
 
 
-def test_returns_set():
-    assert isinstance(solve(set(), dict()), list)
+def test_returns_set(engine):
+    assert isinstance(solve(set(), dict(), engine=engine), list)
 
 
-def test_accept_set_u(trivial):
-    assert isinstance(solve(trivial['u'], trivial['s']), list)
+def test_accept_set_u(trivial, engine):
+    assert isinstance(solve(trivial['u'], trivial['s'], engine=engine), list)
 
 
-def test_accept_list_u(trivial):
-    assert isinstance(solve(list(trivial['u']), trivial['s']), list)
+def test_accept_list_u(trivial, engine):
+    assert isinstance(solve(list(trivial['u']), trivial['s'], engine=engine), list)
 
 
-def test_accept_dict_u(trivial):
-    assert isinstance(solve({x: x for x in trivial['u']}, trivial['s']), list)
+def test_accept_dict_u(trivial, engine):
+    assert isinstance(solve({x: x for x in trivial['u']}, trivial['s'], engine=engine), list)
 
 
-def test_accept_tuple_u(trivial):
-    assert isinstance(solve(tuple(trivial['u']), trivial['s']), list)
+def test_accept_tuple_u(trivial, engine):
+    assert isinstance(solve(tuple(trivial['u']), trivial['s'], engine=engine), list)
 
 
-def test_accept_str_u(trivial):
+def test_accept_str_u(trivial, engine):
     s = {k: set([str(x) for x in v]) for k, v in trivial['s'].items()}
-    assert isinstance(solve(''.join(map(str, trivial['u'])), s), list)
+    assert isinstance(solve(''.join(map(str, trivial['u'])), s, engine=engine), list)
 
 
-def test_example(example):
-    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'])
+def test_example(example, engine):
+    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'], engine=engine)
 
 
-def test_no_solution(example):
+def test_no_solution(example, engine):
     example['s']['D'].remove(6)
     example['s']['E'].remove(6)
-    assert [] == solve(example['u'], example['s'])
+    assert [] == solve(example['u'], example['s'], engine=engine)
 
 
-def test_srow_contains_element_not_in_u(example):
+def test_srow_contains_element_not_in_u(example, engine):
     extra = 10
     subset = 'B'
     example['s'][subset].add(extra)
     with pytest.raises(ExactCoverKeyError) as e:
-        solve(example['u'], example['s'])
+        solve(example['u'], example['s'], engine=engine)
     assert (f'ExactCoverKeyError: Element {repr(extra)} in '
             f'subsets_rows {repr(subset)} is not in Universe') == str(e.value)
 
 
-def test_s_contains_empty_srow(example):
+def test_s_contains_empty_srow(example, engine):
     example['s']['G'] = set()
-    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'])
+    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'], engine=engine)
 
 
-def test_solution_in_single_srow(example):
+def test_preseed_empty_srow(example, engine):
+    example['s']['G'] = set()
+    result = solve(example['u'], example['s'], preseed={'G'}, engine=engine)
+    assert [{'B', 'D', 'F', 'G'}] == result
+
+
+def test_solution_in_single_srow(example, engine):
     example['s']['A'] = set()
     example['s']['B'] = {1, 2, 3, 4, 5, 6, 7}
     example['s']['C'] = set()
     example['s']['D'] = set()
     example['s']['E'] = set()
     example['s']['F'] = set()
-    assert [{'B'}] == solve(example['u'], example['s'])
+    assert [{'B'}] == solve(example['u'], example['s'], engine=engine)
 
 
-def test_one_each_in_subset():
+def test_one_each_in_subset(engine):
     u = {1, 2, 3}
     s = {10: {2}, 20: {1}, 30: {3}}
-    assert [{10, 20, 30}] == solve(u, s)
+    assert [{10, 20, 30}] == solve(u, s, engine=engine)
 
 
-def test_duplicate_subset_not_in_solution(example):
+def test_duplicate_subset_not_in_solution(example, engine):
     example['s']['G'] = {1, 4, 7}
-    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'])
+    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'], engine=engine)
 
 
-def test_multiple_solutions_all_results_default(example):
+def test_multiple_solutions_all_results_default(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result = solve(example['u'], example['s'])
+    result = solve(example['u'], example['s'], engine=engine)
     assert [{'B', 'D', 'F'}, {'B', 'F', 'G'}] == result
 
 
-def test_limit_empty_inputs():
-    assert isinstance(solve(set(), dict(), limit=1), list)
+def test_limit_empty_inputs(engine):
+    assert isinstance(solve(set(), dict(), limit=1, engine=engine), list)
 
 
-def test_limit1_multiple_solutions(example):
+def test_limit1_multiple_solutions(example, engine):
     example['s']['G'] = {3, 5, 6}
-    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'], limit=1)
+    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'], limit=1, engine=engine)
 
 
-def test_limiteqall_multiple_solutions(example):
+def test_limiteqall_multiple_solutions(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result = solve(example['u'], example['s'], limit=2)
+    result = solve(example['u'], example['s'], limit=2, engine=engine)
     assert [{'B', 'D', 'F'}, {'B', 'F', 'G'}] == result
 
 
-def test_limitgtall_multiple_solutions(example):
+def test_limitgtall_multiple_solutions(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result = solve(example['u'], example['s'], limit=3)
+    result = solve(example['u'], example['s'], limit=3, engine=engine)
     assert [{'B', 'D', 'F'}, {'B', 'F', 'G'}] == result
 
 
-def test_limit0_multiple_solutions(example):
+def test_limit0_multiple_solutions(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result = solve(example['u'], example['s'], limit=0)
+    result = solve(example['u'], example['s'], limit=0, engine=engine)
     assert [{'B', 'D', 'F'}, {'B', 'G', 'F'}] == result
 
 
-def test_limitneg1_multiple_solutions(example):
+def test_limitneg1_multiple_solutions(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result = solve(example['u'], example['s'], limit=-1)
+    result = solve(example['u'], example['s'], limit=-1, engine=engine)
     assert [{'B', 'D', 'F'}, {'B', 'G', 'F'}] == result
 
 
-def test_invalid_limit_multiple_solutions(example):
+def test_invalid_limit_multiple_solutions(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result = solve(example['u'], example['s'], limit='a')
+    result = solve(example['u'], example['s'], limit='a', engine=engine)
     assert [{'B', 'D', 'F'}, {'B', 'F', 'G'}] == result
 
 
-def test_limit1_random_multiple_solutions(small_example):
+def test_limit1_random_multiple_solutions(small_example, engine):
     counts_ab = 0
     counts_cd = 0
     size = 100
     for i in range(size):
         result = solve(small_example['u'], small_example['s'],
-                       limit=1, randomize=True)
+                       limit=1, randomize=True, engine=engine)
         if [{'A', 'B'}] == result:
             counts_ab += 1
         if [{'C', 'D'}] == result:
@@ -166,12 +178,12 @@ def test_limit1_random_multiple_solutions(small_example):
     assert counts_ab != 0 and counts_cd != 0
 
 
-def test_limit1_nonrandom_multiple_solutions(small_example):
+def test_limit1_nonrandom_multiple_solutions(small_example, engine):
     size = 100
     counts = {}
     for i in range(size):
         result = tuple(sorted(list(solve(small_example['u'], small_example['s'],
-                                         limit=1, randomize=False).pop())))
+                                         limit=1, randomize=False, engine=engine).pop())))
         if result not in counts:
             counts[result] = 1
         else:
@@ -179,117 +191,731 @@ def test_limit1_nonrandom_multiple_solutions(small_example):
     assert len(counts) == 1 and counts[result] == size
 
 
-def test_preseed_empty(example):
-    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'], preseed={})
+def test_preseed_empty(example, engine):
+    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'], preseed={}, engine=engine)
 
 
-def test_preseed_ignores_wrong_type_empty(example):
-    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'], preseed=[])
+def test_preseed_ignores_wrong_type_empty(example, engine):
+    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'], preseed=[], engine=engine)
 
 
-def test_preseed_ignores_wrong_type(example):
-    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'], preseed=[1])
+def test_preseed_ignores_wrong_type(example, engine):
+    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'], preseed=[1], engine=engine)
 
 
-def test_preseed_contains_1x_correct(example):
-    result = solve(example['u'], example['s'], preseed={'B'})
+def test_preseed_contains_1x_correct(example, engine):
+    result = solve(example['u'], example['s'], preseed={'B'}, engine=engine)
     assert [{'B', 'D', 'F'}] == result
 
 
-def test_preseed_contains_2x_correct(example):
-    result = solve(example['u'], example['s'], preseed={'B', 'F'})
+def test_preseed_contains_2x_correct(example, engine):
+    result = solve(example['u'], example['s'], preseed={'B', 'F'}, engine=engine)
     assert [{'B', 'D', 'F'}] == result
 
 
-def test_preseed_contains_all_correct(example):
-    result = solve(example['u'], example['s'], preseed={'B', 'D', 'F'})
+def test_preseed_contains_all_correct(example, engine):
+    result = solve(example['u'], example['s'], preseed={'B', 'D', 'F'}, engine=engine)
     assert [{'B', 'D', 'F'}] == result
 
 
-def test_preseed_contains_all_correct_and_1x_incorrect(example):
-    result = solve(example['u'], example['s'], preseed={'B', 'D', 'F', 'C'})
+def test_preseed_contains_all_correct_and_1x_incorrect(example, engine):
+    result = solve(example['u'], example['s'], preseed={'B', 'D', 'F', 'C'}, engine=engine)
     assert [] == result
 
 
-def test_preseed_contains_incorrect(example):
-    assert [] == solve(example['u'], example['s'], preseed={'A'})
+def test_preseed_contains_incorrect(example, engine):
+    assert [] == solve(example['u'], example['s'], preseed={'A'}, engine=engine)
 
 
-def test_preseed_contains_mix_incorrect_correct(example):
-    assert [] == solve(example['u'], example['s'], preseed={'A', 'B'})
+def test_preseed_contains_mix_incorrect_correct(example, engine):
+    assert [] == solve(example['u'], example['s'], preseed={'A', 'B'}, engine=engine)
 
 
-def test_preseed_contains_invalid(example):
+def test_preseed_contains_invalid(example, engine):
     fill = 'G'
     with pytest.raises(ExactCoverKeyError) as e:
-        solve(example['u'], example['s'], preseed={fill})
+        solve(example['u'], example['s'], preseed={fill}, engine=engine)
     assert (f'ExactCoverKeyError: Element {repr(fill)} in preseed '
             f'is not in subsets_rows') == str(e.value)
 
 
-def test_preseed_contains_mix_invalid_correct(example):
+def test_preseed_contains_mix_invalid_correct(example, engine):
     fill = 'G'
     with pytest.raises(ExactCoverKeyError) as e:
-        solve(example['u'], example['s'], preseed={fill, 'B'})
+        solve(example['u'], example['s'], preseed={fill, 'B'}, engine=engine)
     assert (f'ExactCoverKeyError: Element {repr(fill)} in preseed '
             f'is not in subsets_rows') == str(e.value)
 
 
-def test_preseed_multiple_solutions_choose_correct_possibility(example):
+def test_preseed_multiple_solutions_choose_correct_possibility(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result_d = solve(example['u'], example['s'], limit=1, preseed={'D'})
-    result_g = solve(example['u'], example['s'], limit=1, preseed={'G'})
+    result_d = solve(example['u'], example['s'], limit=1, preseed={'D'}, engine=engine)
+    result_g = solve(example['u'], example['s'], limit=1, preseed={'G'}, engine=engine)
     assert [{'B', 'D', 'F'}] == result_d
     assert [{'B', 'F', 'G'}] == result_g
 
 
-def test_preseed_multiple_solutions_choose_incorrect_possibility(example):
+def test_preseed_multiple_solutions_choose_incorrect_possibility(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result = solve(example['u'], example['s'], limit=1, preseed={'C'})
+    result = solve(example['u'], example['s'], limit=1, preseed={'C'}, engine=engine)
     assert [] == result
 
 
-def test_count_one_solution(example):
-    assert 1 == solve(example['u'], example['s'], count=True)
+def test_count_one_solution(example, engine):
+    assert 1 == solve(example['u'], example['s'], count=True, engine=engine)
 
 
-def test_count_no_solution(example):
+def test_count_no_solution(example, engine):
     example['s']['D'].remove(6)
     example['s']['E'].remove(6)
-    assert 0 == solve(example['u'], example['s'], count=True)
+    assert 0 == solve(example['u'], example['s'], count=True, engine=engine)
 
 
-def test_count_multiple_solutions(example):
+def test_count_multiple_solutions(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result = solve(example['u'], example['s'], count=True)
+    result = solve(example['u'], example['s'], count=True, engine=engine)
     assert 2 == result
 
 
-def test_count_false(example):
+def test_count_false(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result = solve(example['u'], example['s'], count=False)
+    result = solve(example['u'], example['s'], count=False, engine=engine)
     assert [{'B', 'D', 'F'}, {'B', 'F', 'G'}] == result
 
 
-def test_count_ignore(example):
+def test_count_ignore(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result = solve(example['u'], example['s'], count=3)
+    result = solve(example['u'], example['s'], count=3, engine=engine)
     assert [{'B', 'D', 'F'}, {'B', 'F', 'G'}] == result
 
 
-def test_count_preseed_2solutionTo2count(example):
+def test_count_preseed_2solutionTo2count(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result = solve(example['u'], example['s'], preseed={'B'}, count=True)
+    result = solve(example['u'], example['s'], preseed={'B'}, count=True, engine=engine)
     assert 2 == result
 
 
-def test_count_preseed_2solutionTo1count(example):
+def test_count_preseed_2solutionTo1count(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result = solve(example['u'], example['s'], preseed={'D'}, count=True)
+    result = solve(example['u'], example['s'], preseed={'D'}, count=True, engine=engine)
     assert 1 == result
 
 
-def test_count_preseed_2solutionTo0count(example):
+def test_count_preseed_2solutionTo0count(example, engine):
     example['s']['G'] = {3, 5, 6}
-    result = solve(example['u'], example['s'], preseed={'A'}, count=True)
+    result = solve(example['u'], example['s'], preseed={'A'}, count=True, engine=engine)
     assert 0 == result
+
+
+def test_iter_solve_is_lazy(example, engine):
+    example['s']['G'] = {3, 5, 6}
+    solutions = iter_solve(example['u'], example['s'], engine=engine)
+    assert {'B', 'D', 'F'} == next(solutions)
+    assert {'B', 'F', 'G'} == next(solutions)
+    with pytest.raises(StopIteration):
+        next(solutions)
+
+
+def test_iter_solve_same_order_as_solve(example, engine):
+    example['s']['G'] = {3, 5, 6}
+    example['s']['H'] = {1, 4}
+    assert (solve(example['u'], example['s'], engine=engine) ==
+            list(iter_solve(example['u'], example['s'], engine=engine)))
+
+
+def test_iter_solve_limit(example, engine):
+    example['s']['G'] = {3, 5, 6}
+    result = iter_solve(example['u'], example['s'], limit=1, engine=engine)
+    assert [{'B', 'D', 'F'}] == list(result)
+
+
+def test_iter_solve_preseed(example, engine):
+    example['s']['G'] = {3, 5, 6}
+    result = iter_solve(example['u'], example['s'], preseed={'G'}, engine=engine)
+    assert [{'B', 'F', 'G'}] == list(result)
+
+
+def test_iter_solve_preseed_incorrect(example, engine):
+    assert [] == list(iter_solve(example['u'], example['s'], preseed={'A'}, engine=engine))
+
+
+def test_iter_solve_randomize(small_example, engine):
+    seen = set()
+    for i in range(100):
+        solution = next(iter_solve(small_example['u'], small_example['s'], randomize=True,
+                                   engine=engine))
+        seen.add(tuple(sorted(solution)))
+    assert {('A', 'B'), ('C', 'D')} == seen
+
+
+def test_iter_solve_checks_keys_before_first_solution(example, engine):
+    example['s']['B'].add(10)
+    with pytest.raises(ExactCoverKeyError):
+        iter_solve(example['u'], example['s'], engine=engine)
+
+
+def test_deep_search_does_not_recurse(engine):
+    # Each row covers one column, so the search is as deep as the universe is wide
+    u = range(1200)
+    s = {x: {x} for x in u}
+    assert [set(u)] == solve(u, s, engine=engine)
+
+
+def test_search_restores_rows_between_branches(example, engine):
+    example['s']['G'] = {3, 5, 6}
+    example['s']['H'] = {1, 4}
+    example['s']['I'] = {2, 7}
+    assert 8 == solve(example['u'], example['s'], count=True, engine=engine)
+    assert 8 == len({frozenset(x) for x in solve(example['u'], example['s'], engine=engine)})
+
+
+def test_invalid_engine_uses_default(example):
+    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'], engine='nope')
+
+
+def test_engines_find_same_solutions():
+    rng = random.Random(0)
+    for trial in range(50):
+        u = range(10)
+        s = {r: set(rng.sample(u, rng.randint(1, 4))) for r in range(30)}
+        dict_result = solve(u, s, engine='dict')
+        for engine in ['dlx', 'bitset']:
+            result = solve(u, s, engine=engine)
+            assert sorted(map(sorted, dict_result)) == sorted(map(sorted, result))
+            assert len(dict_result) == solve(u, s, count=True, engine=engine)
+
+
+def test_default_engine_small_universe_is_bitset(example, monkeypatch):
+    monkeypatch.setattr(exactcover.exactcover, 'DLX', None)
+    monkeypatch.setattr(exactcover.exactcover, '_DictEngine', None)
+    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'])
+
+
+def test_default_engine_large_universe_is_dict(example, monkeypatch):
+    monkeypatch.setattr(exactcover.exactcover, 'BITSET_MAX_COLUMNS', 6)
+    monkeypatch.setattr(exactcover.exactcover, 'Bitset', None)
+    monkeypatch.setattr(exactcover.exactcover, 'DLX', None)
+    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'])
+
+
+def test_dict_engine_choose_matches_min_scan():
+    rng = random.Random(1)
+    u = range(12)
+    s = {r: set(rng.sample(u, rng.randint(1, 4))) for r in range(40)}
+    dict_engine = exactcover.exactcover._DictEngine(u, s, False)
+    UC = dict_engine.UC
+    chosen = []
+    for step in range(300):
+        rows = dict_engine.choose()
+        if rows is not None:
+            assert rows is UC[min(UC, key=lambda x: len(UC[x]))]
+        for x, x_rows in UC.items():
+            assert x in dict_engine.buckets[len(x_rows)]
+        if rows and rng.random() < 0.6:
+            row = rng.choice(list(rows))
+            dict_engine.cover(row)
+            chosen.append(row)
+        elif chosen:
+            dict_engine.uncover(chosen.pop())
+
+
+@pytest.mark.parametrize('memo', [1, 3, 1000])
+def test_count_memo_matches_count(engine, memo):
+    u, s = strip(14)
+    assert 610 == solve(u, s, count=True, engine=engine)
+    assert 610 == solve(u, s, count=True, engine=engine, memo=memo)
+    assert 275 == solve(u, s, count=True, preseed={('v', 4)}, engine=engine, memo=memo)
+    assert 100 == solve(u, s, count=True, limit=100, engine=engine, memo=memo)
+
+
+def test_count_memo_long_strip(engine):
+    u, s = strip(300)
+    a, b = 1, 1
+    for _ in range(299):
+        a, b = b, a + b
+    assert b == solve(u, s, count=True, engine=engine, memo=10000)
+
+
+def test_count_memo_edge_cases(example, engine):
+    assert 1 == solve(example['u'], example['s'], count=True, engine=engine, memo=10)
+    assert 1 == solve(set(), {}, count=True, engine=engine, memo=10)
+    assert 0 == solve(example['u'], example['s'], count=True, preseed={'A', 'B'},
+                      engine=engine, memo=10)
+    example['u'].add(8)
+    assert 0 == solve(example['u'], example['s'], count=True, engine=engine, memo=10)
+
+
+def test_count_memo_ignored(example, engine):
+    assert [{'B', 'D', 'F'}] == solve(example['u'], example['s'], engine=engine, memo=10)
+    assert 1 == solve(example['u'], example['s'], count=True, engine=engine, memo=0)
+
+
+def test_secondary_queens(engine):
+    u, s, diagonals = queens(6, False)
+    result = solve(u, s, engine=engine, secondary=diagonals)
+    assert 4 == len(result)
+    assert all(6 == len(solution) for solution in result)
+    u, s, _ = queens(6, True)
+    expected = [{row for row in solution if row[0] != 'slack'} for solution in solve(u, s)]
+    assert sorted(map(sorted, expected)) == sorted(map(sorted, result))
+    assert 92 == solve(*queens(8, False)[:2], count=True, engine=engine,
+                       secondary=queens(8, False)[2])
+
+
+def test_secondary_may_be_left_uncovered(example, engine):
+    example['u'] |= {8, 9}
+    example['s']['G'] = {3, 5, 6, 8}
+    example['s']['H'] = {8, 9}
+    result = solve(example['u'], example['s'], engine=engine, secondary={8, 9})
+    assert [{'B', 'D', 'F'}, {'B', 'F', 'G'}] == sorted(result, key=sorted)
+    result = iter_solve(example['u'], example['s'], engine=engine, preseed={'G'},
+                        secondary={8, 9})
+    assert [{'B', 'F', 'G'}] == list(result)
+
+
+def test_secondary_only_rows_are_never_chosen(engine):
+    assert [{'a'}] == solve({1, 2}, {'a': {1}, 'b': {2}}, engine=engine, secondary={2})
+
+
+def test_secondary_count_memo(engine):
+    u, s, diagonals = queens(7, False)
+    assert 40 == solve(u, s, count=True, engine=engine, secondary=diagonals, memo=100)
+
+
+def test_secondary_ignored(example, engine):
+    example['u'].add(8)
+    assert [] == solve(example['u'], example['s'], engine=engine, secondary=[8])
+    assert [] == solve(example['u'], example['s'], engine=engine, secondary={9})
+
+
+def strips(n, k):
+    # Domino tilings of k separate 2 x n strips
+    u = []
+    s = {}
+    for j in range(k):
+        strip_u, strip_s = strip(n)
+        u += [(j, x) for x in strip_u]
+        s.update({(j, key): {(j, x) for x in value} for key, value in strip_s.items()})
+    return u, s
+
+
+def test_decompose_count(engine):
+    u, s = strips(12, 4)
+    assert 233 ** 4 == solve(u, s, count=True, engine=engine, decompose=True)
+    assert 233 ** 4 == solve(u, s, count=True, engine=engine, decompose=True, memo=100)
+    assert 5 == solve(u, s, count=True, engine=engine, decompose=True, limit=5)
+
+
+def test_decompose_solutions(engine):
+    u, s = strips(4, 3)
+    result = solve(u, s, engine=engine, decompose=True)
+    assert 125 == len(result)
+    assert sorted(map(sorted, solve(u, s, engine=engine))) == sorted(map(sorted, result))
+    assert result[:7] == list(iter_solve(u, s, engine=engine, decompose=True, limit=7))
+
+
+def test_decompose_preseed(example, engine):
+    example['s']['G'] = {3, 5, 6}
+    result = solve(example['u'], example['s'], engine=engine, preseed={'F'}, decompose=True)
+    assert [{'B', 'D', 'F'}, {'B', 'F', 'G'}] == sorted(result, key=sorted)
+    assert 0 == solve(example['u'], example['s'], engine=engine, preseed={'A', 'B'},
+                      count=True, decompose=True)
+    assert [] == solve(example['u'], example['s'], engine=engine, preseed={'A', 'B'},
+                       decompose=True)
+
+
+def test_decompose_no_solution(example, engine):
+    example['u'] |= {8, 9}
+    example['s']['I'] = {8}
+    assert [] == solve(example['u'], example['s'], engine=engine, decompose=True)
+    assert 0 == solve(example['u'], example['s'], engine=engine, count=True, decompose=True)
+
+
+def test_decompose_secondary(engine):
+    u, s, diagonals = queens(5, False)
+    u += ['x', 'y']
+    s.update({'a': {'x'}, 'b': {'x', 'y'}, 'c': {'y'}})
+    result = solve(u, s, engine=engine, secondary=diagonals | {'y'}, decompose=True)
+    assert 10 * 2 == len(result)
+    assert 20 == solve(u, s, engine=engine, secondary=diagonals | {'y'}, count=True,
+                       decompose=True)
+
+
+def test_decompose_bad_universe_key(example):
+    example['s']['I'] = {9}
+    with pytest.raises(ExactCoverKeyError):
+        iter_solve(example['u'], example['s'], decompose=True)
+
+
+def dominoes(n):
+    # Domino tilings of an n x n board, with its reflections
+    cells = [(r, c) for r in range(n) for c in range(n)]
+    s = {}
+    for r, c in cells:
+        if r + 1 < n:
+            s[('v', r, c)] = {(r, c), (r + 1, c)}
+        if c + 1 < n:
+            s[('h', r, c)] = {(r, c), (r, c + 1)}
+    symmetries = [{(r, c): (n - 1 - r, c) for r, c in cells}, {(r, c): (c, r) for r, c in cells}]
+    return cells, s, symmetries
+
+
+def rotate(solution, n):
+    rows = set()
+    for row in solution:
+        if row[0] == 'v':
+            rows.add(('h', row[2], n - 2 - row[1]))
+        else:
+            rows.add(('v', row[2], n - 1 - row[1]))
+    return rows
+
+
+def test_symmetries_one_solution_per_orbit(engine):
+    u, s, symmetries = dominoes(4)
+    result = solve(u, s, engine=engine, symmetries=symmetries, orbits=True)
+    assert 36 == sum(size for _, size in result)
+    assert 9 == len(result)
+    assert 36 == solve(u, s, engine=engine, symmetries=symmetries, orbits=True, count=True)
+    assert 9 == solve(u, s, engine=engine, symmetries=symmetries, count=True)
+    assert [solution for solution, _ in result] == solve(u, s, engine=engine,
+                                                         symmetries=symmetries)
+    orbits = []
+    for solution, size in result:
+        orbit = {frozenset(solution)}
+        for _ in range(3):
+            orbit.add(frozenset(rotate(next(iter(orbit)), 4)))
+        orbits.append(orbit)
+    for i, orbit in enumerate(orbits):
+        assert all(orbit.isdisjoint(other) for other in orbits[i + 1:])
+
+
+def test_symmetries_interchangeable_machines(engine):
+    u = list(range(6)) + [(m, t) for m in range(3) for t in range(2)]
+    s = {(j, m, t): {j, (m, t)} for j in range(6) for m in range(3) for t in range(2)}
+    symmetries = [{(m, t): ((m + 1) % 3, t) for m in range(3) for t in range(2)},
+                  {(m, t): (1 - m, t) for m in range(2) for t in range(2)},
+                  {(0, 0): (0, 1), (0, 1): (0, 0)},
+                  # Not permutations of the subsets, so they are ignored
+                  'ignored', {(0, 0): (1, 0)}, {(0, 0): 0, 0: (0, 0)}]
+    result = solve(u, s, engine=engine, symmetries=symmetries, orbits=True)
+    assert 720 == sum(size for _, size in result)
+    assert 15 == len(result)
+
+
+def test_symmetries_preseed(engine):
+    u, s, symmetries = dominoes(4)
+    preseed = {('h', 0, 0)}
+    result = solve(u, s, engine=engine, symmetries=symmetries, orbits=True, preseed=preseed)
+    assert len(solve(u, s, engine=engine, preseed=preseed)) == sum(size for _, size in result)
+    assert all(('h', 0, 0) in solution for solution, _ in result)
+    assert [] == solve(u, s, engine=engine, symmetries=symmetries,
+                       preseed={('h', 0, 0), ('v', 0, 0)})
+
+
+def test_symmetries_limit(engine):
+    u, s, symmetries = dominoes(4)
+    assert 2 == len(solve(u, s, engine=engine, symmetries=symmetries, limit=2))
+    solutions = iter_solve(u, s, engine=engine, symmetries=symmetries)
+    assert solve(u, s, engine=engine, symmetries=symmetries)[0] == next(solutions)
+    solutions.close()
+
+
+def test_symmetries_edge_cases(example, engine):
+    assert [(set(), 1)] == solve(set(), {}, engine=engine, symmetries=[{}], orbits=True)
+    example['u'].add(8)
+    assert [] == solve(example['u'], example['s'], engine=engine, symmetries=[{8: 8}])
+    example['u'].remove(8)
+    result = solve(example['u'], example['s'], engine=engine, symmetries={1: 2})
+    assert [{'B', 'D', 'F'}] == result
+
+
+@pytest.fixture
+def tiling(engine):
+    u, s, _ = dominoes(4)
+    return {'u': u, 's': s, 'engine': engine}
+
+
+def test_checkpoint_resume_from_snapshot(tiling, tmp_path):
+    path = tmp_path / 'search.json'
+    snapshot = tmp_path / 'snapshot.json'
+    expected = solve(tiling['u'], tiling['s'], engine='dlx')
+    yielded = []
+    for solution in iter_solve(tiling['u'], tiling['s'], engine=tiling['engine'],
+                               checkpoint=str(path), checkpoint_every=7):
+        yielded.append(solution)
+        if len(yielded) == 20:
+            # A copy of the file as it would be found after a crash
+            snapshot.write_bytes(path.read_bytes())
+    assert expected == yielded
+    found = json.loads(snapshot.read_text())['found']
+    assert 0 < found <= 20
+    resumed = iter_solve(tiling['u'], tiling['s'], engine=tiling['engine'],
+                         checkpoint=str(snapshot), checkpoint_every=7)
+    assert expected == yielded[:found] + list(resumed)
+
+
+def test_checkpoint_resume_count(tiling, tmp_path):
+    path = tmp_path / 'search.json'
+    it = iter_solve(tiling['u'], tiling['s'], engine=tiling['engine'], checkpoint=path,
+                    checkpoint_every=5)
+    for _ in range(10):
+        next(it)
+    del it
+    assert 36 == solve(tiling['u'], tiling['s'], engine=tiling['engine'], count=True,
+                       checkpoint=path, checkpoint_every=5)
+
+
+def test_checkpoint_saved_when_closed(tiling, tmp_path):
+    path = tmp_path / 'search.json'
+    expected = solve(tiling['u'], tiling['s'], engine='dlx')
+    it = iter_solve(tiling['u'], tiling['s'], checkpoint=path)
+    yielded = [next(it) for _ in range(11)]
+    it.close()
+    assert 11 == json.loads(path.read_text())['found']
+    assert expected == yielded + solve(tiling['u'], tiling['s'], checkpoint=path)
+
+
+def test_checkpoint_finished(example, engine, tmp_path):
+    path = tmp_path / 'search.json'
+    assert 1 == solve(example['u'], example['s'], engine=engine, count=True, checkpoint=path)
+    assert json.loads(path.read_text())['path'] is None
+    assert [] == solve(example['u'], example['s'], engine=engine, checkpoint=path)
+    assert 1 == solve(example['u'], example['s'], engine=engine, count=True, checkpoint=path)
+
+
+def test_checkpoint_limit(tiling, tmp_path):
+    path = tmp_path / 'search.json'
+    expected = solve(tiling['u'], tiling['s'], engine='dlx')
+    first = solve(tiling['u'], tiling['s'], limit=10, checkpoint=path)
+    assert [] == solve(tiling['u'], tiling['s'], limit=10, checkpoint=path)
+    assert expected[:15] == first + solve(tiling['u'], tiling['s'], limit=15, checkpoint=path)
+
+
+def test_checkpoint_resume_with_smaller_limit(tiling, tmp_path):
+    path = tmp_path / 'search.json'
+    options = {'engine': tiling['engine'], 'checkpoint': path}
+    expected = solve(tiling['u'], tiling['s'], engine='dlx')
+    it = iter_solve(tiling['u'], tiling['s'], **options)
+    yielded = [next(it) for _ in range(10)]
+    it.close()
+    # The saved search already found more solutions than the limit
+    assert [] == solve(tiling['u'], tiling['s'], limit=3, **options)
+    assert 10 == solve(tiling['u'], tiling['s'], count=True, limit=3, **options)
+    assert expected == yielded + solve(tiling['u'], tiling['s'], **options)
+
+
+def test_checkpoint_preseed(example, engine, tmp_path):
+    path = tmp_path / 'search.json'
+    result = solve(example['u'], example['s'], engine=engine, preseed={'B'}, checkpoint=path)
+    assert [{'B', 'D', 'F'}] == result
+    assert [] == solve(example['u'], example['s'], preseed={'A', 'B'}, checkpoint=path)
+    expected = solve(example['u'], example['s'], secondary={7}, count=True)
+    assert expected == solve(example['u'], example['s'], engine=engine, secondary={7}, count=True,
+                             checkpoint=tmp_path / 'secondary.json')
+
+
+def test_checkpoint_other_problem(example, tmp_path):
+    path = tmp_path / 'search.json'
+    solve(example['u'], example['s'], checkpoint=path, checkpoint_every=1)
+    with pytest.raises(ValueError):
+        solve(example['u'], example['s'], preseed={'B'}, checkpoint=path)
+    path.write_text('{"fingerprint": 0}')
+    with pytest.raises(ValueError):
+        solve(example['u'], example['s'], checkpoint=path)
+    path = tmp_path / 'tiling.json'
+    u, s, _ = dominoes(4)
+    solve(u, s, limit=1, checkpoint=path)
+    state = json.loads(path.read_text())
+    state['path'][-1] = 100
+    path.write_text(json.dumps(state))
+    with pytest.raises(ValueError):
+        solve(u, s, checkpoint=path)
+
+
+def test_checkpoint_ignored(example, tmp_path):
+    assert 1 == len(solve(example['u'], example['s'], checkpoint=1))
+    path = tmp_path / 'search.json'
+    assert 1 == solve(example['u'], example['s'], count=True, checkpoint=path,
+                      checkpoint_every='x')
+
+
+def test_max_nodes(tiling):
+    calls = []
+    assert 36 == solve(tiling['u'], tiling['s'], engine=tiling['engine'], count=True,
+                       progress=lambda *args: calls.append(args), progress_every=1)
+    nodes = calls[-1][1]
+    assert list(range(1, nodes + 1)) == [n for _, n, _ in calls]
+    assert 36 == solve(tiling['u'], tiling['s'], engine=tiling['engine'], count=True,
+                       max_nodes=nodes)
+    with pytest.raises(ExactCoverSearchStopped) as stopped:
+        solve(tiling['u'], tiling['s'], engine=tiling['engine'], max_nodes=nodes // 2)
+    assert 'max_nodes' == stopped.value.reason
+    assert nodes // 2 == stopped.value.nodes
+    assert 0 < len(stopped.value.result) == stopped.value.found < 36
+    assert 'max_nodes' in str(stopped.value)
+
+
+def test_stopped_count_is_partial(tiling):
+    for memo in (None, 100):
+        with pytest.raises(ExactCoverSearchStopped) as stopped:
+            solve(tiling['u'], tiling['s'], engine=tiling['engine'], count=True, memo=memo,
+                  max_nodes=30)
+        assert 0 < stopped.value.result < 36
+
+
+def test_progress(tiling):
+    calls = []
+    solve(tiling['u'], tiling['s'], engine=tiling['engine'],
+          progress=lambda *args: calls.append(args), progress_every=10)
+    assert all(n % 10 == 0 for _, n, _ in calls)
+    assert all(0 <= depth <= 8 for depth, _, _ in calls)
+    assert [found for _, _, found in calls] == sorted(found for _, _, found in calls)
+
+
+def test_timeout(engine):
+    u, s, _ = dominoes(6)
+    with pytest.raises(ExactCoverSearchStopped) as stopped:
+        solve(u, s, engine=engine, timeout=1e-9)
+    assert 'timeout' == stopped.value.reason
+    assert [] == stopped.value.result
+    assert 6728 == solve(u, s, engine=engine, count=True, timeout=60)
+
+
+def test_cancel(tiling):
+    cancel = threading.Event()
+
+    def progress(depth, nodes, found):
+        if found >= 5:
+            cancel.set()
+
+    with pytest.raises(ExactCoverSearchStopped) as stopped:
+        solve(tiling['u'], tiling['s'], engine=tiling['engine'], cancel=cancel,
+              progress=progress, progress_every=1)
+    assert 'cancel' == stopped.value.reason
+    assert 5 == len(stopped.value.result)
+
+
+def test_iter_solve_stopped(tiling):
+    expected = solve(tiling['u'], tiling['s'], engine=tiling['engine'])
+    it = iter_solve(tiling['u'], tiling['s'], engine=tiling['engine'], max_nodes=40)
+    yielded = []
+    with pytest.raises(ExactCoverSearchStopped) as stopped:
+        for solution in it:
+            yielded.append(solution)
+    assert expected[:len(yielded)] == yielded
+    assert len(yielded) == stopped.value.found
+    assert stopped.value.result is None
+
+
+def test_stopped_checkpoint(tiling, tmp_path):
+    path = tmp_path / 'search.json'
+    total = 0
+    while True:
+        try:
+            total = solve(tiling['u'], tiling['s'], engine=tiling['engine'], count=True,
+                          checkpoint=path, max_nodes=10)
+            break
+        except ExactCoverSearchStopped as stopped:
+            assert stopped.result == json.loads(path.read_text())['found']
+    assert 36 == total
+
+
+def test_stopped_symmetries(engine):
+    u, s, symmetries = dominoes(4)
+    with pytest.raises(ExactCoverSearchStopped) as stopped:
+        solve(u, s, engine=engine, symmetries=symmetries, orbits=True, count=True, max_nodes=20)
+    assert 0 < stopped.value.result < 36
+    assert stopped.value.found < 9
+
+
+def test_stopped_decompose(engine):
+    u, s = strips(6, 3)
+    calls = []
+    assert 13 ** 3 == solve(u, s, engine=engine, count=True, decompose=True,
+                            progress=lambda *args: calls.append(args), progress_every=1)
+    # The nodes of every component are counted by the same budget
+    nodes = calls[-1][1]
+    strip_calls = []
+    solve(*strip(6), engine=engine, count=True, progress=lambda *args: strip_calls.append(args),
+          progress_every=1)
+    assert 3 * strip_calls[-1][1] == nodes
+    assert 13 ** 3 == solve(u, s, engine=engine, count=True, decompose=True, max_nodes=nodes)
+    for count in (True, False):
+        with pytest.raises(ExactCoverSearchStopped) as stopped:
+            solve(u, s, engine=engine, count=count, decompose=True, max_nodes=nodes - 1)
+        assert nodes - 1 == stopped.value.nodes
+        assert not stopped.value.result
+    with pytest.raises(ExactCoverSearchStopped):
+        next(iter_solve(u, s, engine=engine, decompose=True, max_nodes=nodes // 2))
+
+
+def test_budget_ignored(example, engine):
+    result = solve(example['u'], example['s'], engine=engine, max_nodes=0, timeout=True,
+                   cancel=object(), progress='x', progress_every=-1)
+    assert [{'B', 'D', 'F'}] == result
+    calls = []
+    solve(example['u'], example['s'], engine=engine, progress=lambda *args: calls.append(args),
+          progress_every=0)
+    assert [] == calls
+
+
+def as_keys(solutions, s):
+    keys = list(s)
+    return [{keys[i] for i in solution} for solution in solutions]
+
+
+def test_output_indices(example, engine):
+    expected = solve(example['u'], example['s'], engine=engine)
+    result = solve(example['u'], example['s'], engine=engine, output='indices')
+    assert [(1, 3, 5)] == result
+    assert expected == as_keys(result, example['s'])
+    assert result == list(iter_solve(example['u'], example['s'], engine=engine,
+                                     output='indices'))
+    array = solve(example['u'], example['s'], engine=engine, output='array')
+    assert expected == list(array)
+    assert result == [array.solution_indices(i) for i in range(len(array))]
+
+
+def test_output_randomize_keeps_indices(engine):
+    u, s = strip(8)
+    expected = sorted(solve(u, s, engine=engine, output='indices'))
+    result = solve(u, s, engine=engine, output='indices', randomize=True)
+    assert expected == sorted(result)
+    assert all(list(solution) == sorted(solution) for solution in result)
+
+
+def test_output_modes(engine, tmp_path):
+    u, s = strips(3, 2)
+    expected = solve(u, s, engine=engine)
+    result = solve(u, s, engine=engine, output='indices', decompose=True)
+    assert sorted(map(sorted, expected)) == sorted(map(sorted, as_keys(result, s)))
+    assert result[:2] == list(iter_solve(u, s, engine=engine, output='indices', decompose=True,
+                                         limit=2))
+    assert sorted(map(sorted, expected)) == sorted(
+        map(sorted, solve(u, s, engine=engine, output='array', decompose=True)))
+    result = solve(u, s, engine=engine, output='indices', checkpoint=str(tmp_path / 'c.json'))
+    assert solve(u, s, engine='dlx') == as_keys(result, s)
+    u, s, symmetries = dominoes(4)
+    expected = solve(u, s, engine=engine, symmetries=symmetries, orbits=True)
+    for output in ('indices', 'array'):
+        result = solve(u, s, engine=engine, symmetries=symmetries, orbits=True, output=output)
+        assert [size for _, size in expected] == [size for _, size in result]
+        assert [x for x, _ in expected] == as_keys([x for x, _ in result], s)
+    array = solve(u, s, engine=engine, symmetries=symmetries, output='array')
+    assert [x for x, _ in expected] == list(array)
+
+
+def test_output_ignored(example, engine):
+    expected = solve(example['u'], example['s'], engine=engine)
+    assert expected == solve(example['u'], example['s'], engine=engine, output='sets')
+    assert expected == list(iter_solve(example['u'], example['s'], engine=engine,
+                                       output='array'))
+    assert 1 == solve(example['u'], example['s'], engine=engine, output='indices', count=True)
+
+
+def test_stopped_output(tiling):
+    with pytest.raises(ExactCoverSearchStopped) as stopped:
+        solve(tiling['u'], tiling['s'], engine=tiling['engine'], output='array', max_nodes=40)
+    result = stopped.value.result
+    assert stopped.value.found == len(result) > 0
+    assert list(result) == solve(tiling['u'], tiling['s'], engine=tiling['engine'])[:len(result)]
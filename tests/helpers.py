@@ -0,0 +1,29 @@
+"""Problem builders shared by the tests."""
+
+
+def strip(n):
+    """Return the universe and subsets of the domino tilings of a 2 x n strip."""
+    s = {}
+    for i in range(n):
+        s[('v', i)] = {(0, i), (1, i)}
+        if i + 1 < n:
+            s[('h', 0, i)] = {(0, i), (0, i + 1)}
+            s[('h', 1, i)] = {(1, i), (1, i + 1)}
+    return [(r, i) for i in range(n) for r in range(2)], s
+
+
+def queens(n, slack=False):
+    """Return the universe, subsets and diagonals of the n queens problem.
+
+    The diagonals are meant to be secondary. With `slack`, each diagonal also has a subset that
+    covers only it, so the problem can be solved without secondary elements.
+    """
+    s = {}
+    for r in range(n):
+        for c in range(n):
+            s[(r, c)] = {('r', r), ('c', c), ('d', r + c), ('a', r - c)}
+    diagonals = {('d', k) for k in range(2 * n - 1)} | {('a', k) for k in range(1 - n, n)}
+    if slack:
+        s.update({('slack', x): {x} for x in diagonals})
+    u = [('r', r) for r in range(n)] + [('c', c) for c in range(n)] + sorted(diagonals)
+    return u, s, diagonals
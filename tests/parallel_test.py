@@ -0,0 +1,113 @@
+"""Tests for the parallel module."""
+import multiprocessing
+import pytest
+from exactcover import parallel_solve, solve, ExactCoverKeyError
+from exactcover.parallel import (_init_worker, _run_task, _split, _PolledEvent,
+                                 _STOP_POLL_NODES)
+from exactcover.dlx import DLX
+from helpers import strip
+
+
+@pytest.fixture(params=[1, 2])
+def jobs(request):
+    return request.param
+
+
+@pytest.mark.parametrize('engine', ['dlx', 'bitset'])
+def test_same_solutions_as_solve(jobs, engine):
+    u, s = strip(10)
+    assert solve(u, s, engine=engine) == parallel_solve(u, s, jobs=jobs, engine=engine)
+
+
+def test_same_solutions_as_solve_dict_engine(jobs):
+    u, s = strip(10)
+    result = parallel_solve(u, s, jobs=jobs, engine='dict')
+    assert sorted(map(sorted, solve(u, s, engine='dict'))) == sorted(map(sorted, result))
+
+
+def test_count(jobs):
+    u, s = strip(12)
+    assert 233 == parallel_solve(u, s, jobs=jobs, count=True)
+
+
+def test_limit(jobs):
+    u, s = strip(12)
+    result = parallel_solve(u, s, jobs=jobs, limit=5)
+    assert 5 == len(result)
+    assert all(x in solve(u, s) for x in result)
+
+
+def test_count_limit(jobs):
+    u, s = strip(12)
+    assert 5 == parallel_solve(u, s, jobs=jobs, limit=5, count=True)
+
+
+def test_preseed(example, jobs):
+    result = parallel_solve(example['u'], example['s'], jobs=jobs, preseed={'B'})
+    assert [{'B', 'D', 'F'}, {'B', 'F', 'G'}] == result
+
+
+def test_preseed_contradiction(example, jobs):
+    assert [] == parallel_solve(example['u'], example['s'], jobs=jobs, preseed={'B', 'H'})
+    assert 0 == parallel_solve(example['u'], example['s'], jobs=jobs, preseed={'A'},
+                               count=True)
+
+
+def test_preseed_complete_solution(example, jobs):
+    result = parallel_solve(example['u'], example['s'], jobs=jobs, preseed={'B', 'D', 'F'})
+    assert [{'B', 'D', 'F'}] == result
+
+
+def test_no_solution(example, jobs):
+    example['s']['D'].remove(6)
+    example['s']['E'].remove(6)
+    example['s']['G'].remove(6)
+    assert [] == parallel_solve(example['u'], example['s'], jobs=jobs)
+
+
+def test_invalid_jobs_uses_cpu_count(example):
+    assert 4 == parallel_solve(example['u'], example['s'], jobs='a', count=True)
+
+
+def test_bad_universe_key(example):
+    example['s']['B'].add(10)
+    with pytest.raises(ExactCoverKeyError):
+        parallel_solve(example['u'], example['s'], jobs=2)
+
+
+def test_split_reaches_task_count():
+    dlx = DLX(4, [[0], [1], [2], [3], [0, 1], [2, 3]])
+    assert [[0, 1, 2], [0, 1, 5], [4, 2, 3], [4, 5]] == _split(dlx, [], 4)
+
+
+def test_split_stops_at_solutions():
+    dlx = DLX(2, [[0], [1]])
+    assert [[0, 1]] == _split(dlx, [], 8)
+
+
+def test_run_task_stops_when_event_is_set():
+    u, s = strip(30)
+    dlx = DLX(len(u), [[u.index(x) for x in s[key]] for key in s])
+    stop = multiprocessing.Event()
+    stop.set()
+    _init_worker(dlx, None, stop)
+    # The strip has 1346269 tilings, and the search stops at its first read of the event, after
+    # fewer nodes than that
+    assert _run_task([], None, True) < _STOP_POLL_NODES
+    assert len(_run_task([], None, False)) < _STOP_POLL_NODES
+    assert [0, 1] == sorted(dlx.choose())
+
+
+def test_polled_event_is_read_every_few_calls():
+    stop = multiprocessing.Event()
+    polled = _PolledEvent(stop)
+    stop.set()
+    assert not any(polled.is_set() for _ in range(_STOP_POLL_NODES - 1))
+    assert polled.is_set()
+
+
+def test_secondary(example, jobs):
+    example['u'].add(8)
+    example['s']['G'].add(8)
+    result = parallel_solve(example['u'], example['s'], jobs=jobs, secondary={8})
+    assert solve(example['u'], example['s'], secondary={8}) == result
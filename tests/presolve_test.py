@@ -0,0 +1,109 @@
+"""Tests for the presolve module."""
+import random
+
+import pytest
+from exactcover import presolve, solve, ExactCoverKeyError
+
+
+def canonical(solutions):
+    return sorted(sorted(map(repr, solution)) for solution in solutions)
+
+
+def test_forced_row(example):
+    del example['s']['E']
+    result = presolve(example['u'], example['s'])
+    # F is the only subset containing 2
+    assert 'F' == result.forced[0]
+    assert {'A', 'C'} <= set(result.removed_rows)
+    assert {2, 7} <= set(result.removed_columns)
+
+
+def test_duplicate_rows_are_merged(example):
+    result = presolve(example['u'], example['s'])
+    assert {'B': ['B', 'H'], 'D': ['D', 'G']} == result.merged
+    assert 'H' not in result.subsets_rows
+    assert 'G' not in result.subsets_rows
+    assert 'H' not in result.removed_rows
+
+
+def test_solves_to_fixpoint(example):
+    result = presolve(example['u'], example['s'])
+    assert [] == result.universe_columns
+    assert {} == result.subsets_rows
+    assert not result.infeasible
+    assert 4 == result.weight(set())
+
+
+def test_implied_column_removes_rows():
+    u = {1, 2, 3, 4}
+    s = {'a': {1, 2}, 'b': {1, 2, 3}, 'c': {2, 4}, 'd': {3}, 'e': {4}, 'f': {3, 4}}
+    result = presolve(u, s)
+    # Every subset with 1 also has 2, so c cannot be part of a solution
+    assert 'c' == result.removed_rows[0]
+    assert canonical(solve(u, s)) == canonical(result.solve())
+    assert len(solve(u, s)) == result.solve(count=True)
+
+
+def test_empty_column_is_infeasible(example):
+    example['u'].add(8)
+    result = presolve(example['u'], example['s'])
+    assert result.infeasible
+    assert [] == result.solve()
+    assert 0 == result.solve(count=True)
+
+
+def test_preseed(example):
+    result = presolve(example['u'], example['s'], preseed={'H', 'F'})
+    assert ['H', 'F'] == sorted(result.forced[:2], reverse=True)
+    assert canonical([{'D', 'F', 'H'}, {'F', 'G', 'H'}]) == canonical(result.solve())
+
+
+def test_preseed_contradiction(example):
+    result = presolve(example['u'], example['s'], preseed={'A', 'B'})
+    assert result.infeasible
+    assert [] == list(result.iter_solve())
+
+
+def test_bad_keys(example):
+    with pytest.raises(ExactCoverKeyError):
+        presolve(example['u'], example['s'], preseed={'Z'})
+    example['s']['I'] = {9}
+    with pytest.raises(ExactCoverKeyError):
+        presolve(example['u'], example['s'])
+
+
+def test_secondary():
+    u = {1, 2, 3}
+    s = {'a': {1}, 'b': {1, 3}, 'c': {2, 3}, 'd': {2}, 'e': {3}, 'f': set()}
+    result = presolve(u, s, secondary={3})
+    assert {'e', 'f'} <= set(result.removed_rows)
+    assert {3} == result.secondary
+    assert canonical(solve(u, s, secondary={3})) == canonical(result.solve())
+
+
+def test_expand(example):
+    result = presolve(example['u'], example['s'])
+    assert canonical(solve(example['u'], example['s'])) == canonical(result.expand(set()))
+
+
+def test_random_problems(engine):
+    rng = random.Random(4)
+    for _ in range(200):
+        u = range(8)
+        s = {r: set(rng.sample(u, rng.randint(1, 3))) for r in range(12)}
+        s.update({(r, 'copy'): set(s[r]) for r in range(4)})
+        expected = solve(u, s, engine=engine)
+        result = presolve(u, s)
+        assert canonical(expected) == canonical(result.solve(engine=engine))
+        assert len(expected) == result.solve(count=True, engine=engine)
+        assert len(expected) == result.solve(count=True, engine=engine, memo=8)
+
+
+def test_limit(engine):
+    u = {1, 2}
+    s = {'a': {1}, 'b': {1}, 'c': {2}, 'd': {2}, 'e': {1, 2}}
+    result = presolve(u, s)
+    assert 5 == result.solve(count=True, engine=engine)
+    assert 3 == result.solve(count=True, limit=3, engine=engine)
+    assert 2 == len(result.solve(limit=2, engine=engine))
+    assert 5 == len(result.solve(randomize=True, engine=engine))
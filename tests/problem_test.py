@@ -0,0 +1,348 @@
+"""Tests for the problem module."""
+import random
+from collections import Counter
+
+import pytest
+import exactcover.problem
+from exactcover import Problem, ExactCoverKeyError, solve
+from helpers import queens, strip
+
+
+@pytest.fixture
+def problem(example):
+    return Problem(example['u'], example['s'])
+
+
+def links(problem):
+    dlx = problem._dlx
+    return (list(dlx.L), list(dlx.R), list(dlx.U), list(dlx.D), list(dlx.S))
+
+
+def test_solve(example, problem):
+    assert solve(example['u'], example['s'], engine='dlx') == problem.solve()
+
+
+def test_solve_repeatedly(example, problem):
+    assert problem.solve() == problem.solve()
+
+
+def test_rows_and_columns(problem):
+    assert ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H'] == problem.rows
+    assert {1, 2, 3, 4, 5, 6, 7} == set(problem.columns)
+
+
+def test_count(problem):
+    assert 4 == problem.count()
+
+
+def test_count_limit(problem):
+    assert 2 == problem.count(limit=2)
+
+
+def test_solve_limit(problem):
+    assert [{'B', 'D', 'F'}] == problem.solve(limit=1)
+
+
+@pytest.mark.parametrize('preseed, expected', [
+    ({'B'}, [{'B', 'D', 'F'}, {'B', 'F', 'G'}]),
+    ({'D'}, [{'B', 'D', 'F'}, {'D', 'F', 'H'}]),
+    ({'B', 'G'}, [{'B', 'F', 'G'}]),
+    ({'A'}, []),
+    ({'B', 'H'}, []),
+    (None, [{'B', 'D', 'F'}, {'B', 'F', 'G'}, {'D', 'F', 'H'}, {'F', 'G', 'H'}]),
+])
+def test_preseed(example, problem, preseed, expected):
+    assert expected == problem.solve(preseed=preseed)
+    assert expected == solve(example['u'], example['s'], preseed=preseed, engine='dlx')
+
+
+def test_preseed_restores_index(problem):
+    before = links(problem)
+    for preseed in [{'B'}, {'D'}, {'B', 'G'}, {'A'}, {'F', 'G'}]:
+        problem.solve(preseed=preseed)
+        problem.count(preseed=preseed)
+        assert before == links(problem)
+
+
+def test_limit_restores_index(problem):
+    before = links(problem)
+    problem.solve(preseed={'B'}, limit=1)
+    assert before == links(problem)
+
+
+def test_iter_solve(problem):
+    solutions = problem.iter_solve(preseed={'F'})
+    assert {'B', 'D', 'F'} == next(solutions)
+    assert {'B', 'F', 'G'} == next(solutions)
+
+
+def test_closed_iter_solve_restores_index(problem):
+    before = links(problem)
+    solutions = problem.iter_solve(preseed={'F'})
+    next(solutions)
+    solutions.close()
+    assert before == links(problem)
+
+
+def test_new_search_closes_open_iter_solve(problem):
+    solutions = problem.iter_solve(preseed={'B'})
+    next(solutions)
+    assert 4 == problem.count()
+    assert [] == list(solutions)
+
+
+def test_randomize(problem):
+    seen = set()
+    for i in range(100):
+        seen.add(frozenset(problem.solve(limit=1, randomize=True)[0]))
+    assert 4 == len(seen)
+
+
+def test_bad_universe_key(example):
+    example['s']['B'].add(10)
+    with pytest.raises(ExactCoverKeyError):
+        Problem(example['u'], example['s'])
+
+
+def test_bad_preseed(problem):
+    with pytest.raises(ExactCoverKeyError) as e:
+        problem.solve(preseed={'Z'})
+    assert ("ExactCoverKeyError: Element 'Z' in preseed "
+            "is not in subsets_rows") == str(e.value)
+
+
+def test_secondary(example):
+    example['s']['I'] = {1, 4, 8}
+    example['u'].add(8)
+    problem = Problem(example['u'], example['s'], secondary={8})
+    assert solve(example['u'], example['s'], engine='dlx', secondary={8}) == problem.solve()
+    assert 6 == problem.count()
+
+
+@pytest.mark.parametrize('uniform', [False, True])
+def test_sample(problem, uniform):
+    solutions = problem.solve()
+    rng = random.Random(0)
+    drawn = problem.sample(200, uniform=uniform, rng=rng)
+    assert 200 == len(drawn)
+    assert all(solution in solutions for solution in drawn)
+    assert len(solutions) == len({frozenset(solution) for solution in drawn})
+
+
+def test_sample_uniform_is_closer_to_uniform():
+    u, s = strip(6)
+    problem = Problem(u, s)
+    rng = random.Random(1)
+    spreads = []
+    for uniform in (False, True):
+        counts = Counter(frozenset(x) for x in problem.sample(1300, uniform=uniform, rng=rng))
+        assert 13 == len(counts)
+        spreads.append(max(counts.values()) - min(counts.values()))
+    assert spreads[1] < spreads[0] / 2
+
+
+def test_sample_preseed(problem):
+    assert all('B' in solution for solution in problem.sample(20, preseed={'B'}))
+    assert [] == problem.sample(5, preseed={'B', 'H'})
+    assert [] == problem.sample(5, preseed={'A'})
+    with pytest.raises(ExactCoverKeyError):
+        problem.sample(preseed={'Z'})
+
+
+def test_sample_restarts(monkeypatch):
+    # Most random choices of the slack rows lead to dead ends far from a solution
+    u, s, _ = queens(8, slack=True)
+    problem = Problem(u, s)
+    calls = []
+    random_search = exactcover.problem._random_search
+    monkeypatch.setattr(exactcover.problem, '_random_search',
+                        lambda *args: calls.append(args[3]) or random_search(*args))
+    solutions = problem.sample(3, rng=random.Random(2))
+    assert 3 == len(solutions)
+    assert all(8 == sum(key[0] != 'slack' for key in solution) for solution in solutions)
+    assert max(calls) > len(u) + 1
+
+
+def test_sample_closes_search_and_restores_index(problem):
+    before = links(problem)
+    solutions = problem.iter_solve()
+    next(solutions)
+    problem.sample(10, preseed={'F'})
+    problem.sample(10, uniform=True, probes=1)
+    assert before == links(problem)
+
+
+def test_sample_options_ignored(problem):
+    assert 1 == len(problem.sample(k='a', uniform='yes', probes=0))
+    assert 1 == len(problem.sample(k=0))
+
+
+def as_set(solutions):
+    return {frozenset(solution) for solution in solutions}
+
+
+def test_add_and_remove_rows(example, problem):
+    problem.remove_row('F')
+    assert [] == problem.solve()
+    problem.add_row('F', example['s']['F'])
+    assert 4 == problem.count()
+    problem.add_row('I', {1, 4, 7})
+    assert {'I', 'F'} <= set(problem.rows)
+    example['s']['I'] = {1, 4, 7}
+    assert as_set(solve(example['u'], example['s'])) == as_set(problem.solve())
+    # Adding a row that exists replaces it
+    problem.add_row('I', {1})
+    example['s']['I'] = {1}
+    assert as_set(solve(example['u'], example['s'])) == as_set(problem.solve())
+
+
+def test_replace_row_after_compaction():
+    problem = Problem(['a', 'b', 'c'], {'x1': {'a'}, 'x2': {'a'}, 'x3': {'a'}, 'r': {'b'},
+                                        'q': {'c'}})
+    problem.remove_column('a')
+    problem.add_row('r', {'b'})
+    assert [{'r', 'q'}] == problem.solve()
+    problem.add_row('q', {'c', 'b'})
+    assert [{'q'}] == problem.solve()
+    problem.add_row('q', {'c'})
+    assert [{'r', 'q'}] == problem.solve()
+
+
+def test_add_and_remove_columns(example, problem):
+    problem.add_column(8)
+    assert 0 == problem.count()
+    problem.add_row('I', {8})
+    assert 4 == problem.count()
+    assert all('I' in solution for solution in problem.solve())
+    problem.remove_column(1)
+    assert 1 not in problem.columns
+    for subset in example['s'].values():
+        subset.discard(1)
+    u = {2, 3, 4, 5, 6, 7, 8}
+    expected = solve(u, {**example['s'], 'I': {8}})
+    assert as_set(expected) == as_set(problem.solve())
+    # An element that is already in the universe is ignored
+    problem.add_column(2, secondary=True)
+    assert as_set(expected) == as_set(problem.solve())
+
+
+def test_secondary_columns(problem):
+    problem.add_column('x', secondary=True)
+    problem.add_row('I', {'x', 1})
+    problem.add_row('J', {'x', 4})
+    assert 4 == problem.count()
+    problem.add_column('y', secondary=True)
+    problem.remove_column('x')
+    # I and J no longer conflict
+    assert 6 == problem.count()
+    problem.add_column('z', secondary='yes')
+    assert 0 == problem.count()
+
+
+def test_random_edits_match_solve():
+    rng = random.Random(5)
+    u, s = strip(8)
+    universe = list(u)
+    subsets = {key: set(subset) for key, subset in s.items()}
+    problem = Problem(u, s)
+    for step in range(150):
+        choice = rng.randrange(4)
+        if choice == 0 and subsets:
+            key = rng.choice(sorted(subsets, key=repr))
+            del subsets[key]
+            problem.remove_row(key)
+        elif choice == 1:
+            key = ('new', step)
+            subsets[key] = set(rng.sample(universe, rng.randrange(1, 4)))
+            problem.add_row(key, subsets[key])
+        elif choice == 2 and len(universe) > 4:
+            element = universe.pop(rng.randrange(len(universe)))
+            for subset in subsets.values():
+                subset.discard(element)
+            problem.remove_column(element)
+        else:
+            universe.append(('col', step))
+            problem.add_column(('col', step))
+        assert universe == problem.columns
+        assert list(subsets) == problem.rows
+        expected = as_set(solve(universe, subsets, engine='dlx'))
+        assert expected == as_set(problem.solve())
+        solution = problem.resolve()
+        assert (solution and frozenset(solution)) in (expected or {None})
+    # The removed rows and columns were dropped from the index along the way
+    assert len(problem._dlx.L) <= 2 * (1 + len(universe) + sum(map(len, subsets.values())))
+
+
+def test_edit_errors(problem):
+    with pytest.raises(ExactCoverKeyError) as e:
+        problem.add_row('I', {1, 9})
+    assert 'Element 9 in subsets_rows' in str(e.value)
+    assert 'I' not in problem.rows
+    with pytest.raises(ExactCoverKeyError) as e:
+        problem.remove_row('I')
+    assert "Row 'I' is not in subsets_rows" in str(e.value)
+    with pytest.raises(ExactCoverKeyError) as e:
+        problem.remove_column(9)
+    assert 'Element 9 is not in Universe' in str(e.value)
+
+
+def test_edit_closes_search(problem):
+    before = links(problem)
+    solutions = problem.iter_solve(preseed={'B'})
+    next(solutions)
+    problem.add_row('I', {1})
+    problem.remove_row('I')
+    assert before[4] == links(problem)[4]
+    assert 4 == problem.count()
+
+
+def test_resolve_reuses_valid_solution(problem, monkeypatch):
+    solution = problem.resolve()
+    assert solution in problem.solve()
+    # B and H overlap
+    assert problem.resolve({'B', 'D', 'F', 'H'}) in problem.solve()
+    solution = problem.resolve()
+    monkeypatch.setattr(exactcover.problem, '_random_search', None)
+    # A solution that is still valid is returned without a search
+    assert solution is problem.resolve()
+    problem.add_row('I', {1, 4, 7})
+    assert solution is problem.resolve()
+    assert {'F', 'G', 'H'} == problem.resolve({'F', 'G', 'H'})
+
+
+def test_resolve_drops_rows_without_primary_columns(problem):
+    problem.add_column('x', secondary=True)
+    problem.add_row('I', {'x'})
+    problem.add_row('J', set())
+    # The search never chooses I or J, so they are not kept either
+    assert {'B', 'D', 'F'} == problem.resolve({'B', 'D', 'F', 'I'})
+    assert {'B', 'D', 'F'} == problem.resolve({'B', 'D', 'F', 'J'})
+    assert {'B', 'D', 'F'} == problem.resolve({'B', 'D', 'I', 'J'})
+
+
+def test_resolve_warm_start(problem):
+    assert {'B', 'D', 'F'} == problem.resolve()
+    problem.remove_row('D')
+    # B and F are kept and G covers the columns of D
+    assert {'B', 'F', 'G'} == problem.resolve()
+    # H is kept although B comes first in their columns
+    assert {'F', 'G', 'H'} == problem.resolve({'G', 'H', 'Z'})
+    problem.remove_row('F')
+    assert problem.resolve() is None
+    assert problem.resolve() is None
+    problem.add_row('F', {2, 7})
+    assert problem.resolve() in problem.solve()
+    # No row can cover the new column
+    problem.add_column(8)
+    assert problem.resolve() is None
+
+
+def test_resolve_large_warm_start():
+    u, s = strip(60)
+    problem = Problem(u, s)
+    solution = problem.resolve()
+    key = next(key for key in sorted(solution, key=repr) if key[0] == 'v')
+    problem.remove_row(key)
+    new = problem.resolve()
+    assert problem._solves(new)
+    assert len(solution & new) >= len(solution) - 4
@@ -0,0 +1,151 @@
+"""Tests for the problemfile module."""
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from exactcover import (Problem, ExactCoverKeyError, MappedProblem, ProblemWriter, solve,
+                        write_problem)
+from helpers import queens, strip
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / 'problem.xcp'
+
+
+def test_round_trip(example, path):
+    write_problem(path, example['u'], example['s'])
+    with MappedProblem(path) as problem:
+        assert list(example['u']) == list(problem.columns)
+        assert list(example['s']) == list(problem.rows)
+        assert [list(example['u']).index(e) for e in sorted(example['s']['C'])] == \
+            sorted(problem.indices[problem.indptr[2]:problem.indptr[3]])
+        assert Problem(example['u'], example['s']).solve() == problem.solve()
+        assert 4 == problem.count()
+
+
+def test_secondary(path):
+    u, s, diagonals = queens(6)
+    write_problem(path, u, s, diagonals)
+    with MappedProblem(path) as problem:
+        assert sorted(problem.secondary) == sorted(list(u).index(d) for d in diagonals)
+        assert solve(u, s, secondary=diagonals, engine='dlx') == problem.solve()
+
+
+@pytest.mark.parametrize('preseed, expected', [
+    ({'B'}, [{'B', 'D', 'F'}, {'B', 'F', 'G'}]),
+    ({'B', 'H'}, []),
+    ('B', [{'B', 'D', 'F'}, {'B', 'F', 'G'}, {'D', 'F', 'H'}, {'F', 'G', 'H'}]),
+])
+def test_preseed(example, path, preseed, expected):
+    write_problem(path, example['u'], example['s'])
+    with MappedProblem(path) as problem:
+        assert expected == problem.solve(preseed=preseed)
+        assert expected[:1] == problem.solve(preseed=preseed, limit=1)
+        with pytest.raises(ExactCoverKeyError):
+            problem.solve(preseed={'Z'})
+
+
+def test_open_search_is_closed(example, path):
+    write_problem(path, example['u'], example['s'])
+    problem = MappedProblem(path)
+    solutions = problem.iter_solve(randomize=True)
+    next(solutions)
+    assert 4 == problem.count()
+    next(problem.iter_solve())
+    problem.close()
+
+
+def test_labels(path):
+    u = [('a', 1), 2, 'c', 4.5, None, b'f', True, ((), ('x', (-1,)))]
+    s = {u[i]: set(u[:i + 1]) for i in range(len(u))}
+    write_problem(path, u, s)
+    with MappedProblem(path) as problem:
+        assert u == list(problem.columns)
+        assert u[::-1] == problem.rows[::-1]
+        assert u[-1] == problem.rows[-1]
+        with pytest.raises(IndexError):
+            problem.rows[len(u)]
+        assert [{u[-1]}] == problem.solve()
+
+
+def test_float_labels(path):
+    u = [0.1, -0.0, 1e300, (2.5, 'x')]
+    write_problem(path, u, {(1.5, -2e-300): set(u)})
+    with MappedProblem(path) as problem:
+        assert u == list(problem.columns)
+        assert [{(1.5, -2e-300)}] == problem.solve()
+
+
+@pytest.mark.parametrize('label', [float('inf'), float('-inf'), float('nan'), ('x', float('nan'))])
+def test_non_finite_float_labels(path, label):
+    with pytest.raises(ValueError) as e:
+        write_problem(path, [1, label], {})
+    assert 'finite floats' in str(e.value)
+    with pytest.raises(ValueError):
+        write_problem(path, [1], {label: {1}})
+
+
+def test_bad_labels_and_elements(path):
+    with pytest.raises(ValueError) as e:
+        write_problem(path, [1, frozenset()], {})
+    assert 'frozenset() cannot be stored' in str(e.value)
+    with pytest.raises(ValueError):
+        write_problem(path, [1], {(1, frozenset()): {1}})
+    with pytest.raises(ExactCoverKeyError) as e:
+        write_problem(path, [1], {'A': {1, 2}})
+    assert "Element 2 in subsets_rows 'A'" in str(e.value)
+
+
+def test_writer_streams_rows(path):
+    u, s = strip(16)
+    with ProblemWriter(path, u, secondary='ignored') as writer:
+        for key, subset in s.items():
+            writer.add_row(key, iter(subset))
+        assert len(s) == writer.written
+        writer.close()
+    with MappedProblem(path) as problem:
+        assert 1597 == problem.count()
+
+
+def test_duplicate_elements_are_ignored(example, path):
+    with ProblemWriter(path, example['u']) as writer:
+        for key, subset in example['s'].items():
+            writer.add_row(key, list(subset) * 2)
+    with MappedProblem(path) as problem:
+        assert len(problem.indices) == sum(map(len, example['s'].values()))
+        assert Problem(example['u'], example['s']).solve() == problem.solve()
+
+
+def test_empty_problem(path):
+    write_problem(path, [], {})
+    with MappedProblem(path) as problem:
+        assert [set()] == problem.solve()
+        assert 0 == len(problem.rows)
+
+
+def test_not_a_problem_file(path):
+    path.write_bytes(b'XCOVSOL1')
+    with pytest.raises(ValueError):
+        MappedProblem(path)
+
+
+def test_other_byte_order(example, path):
+    write_problem(path, example['u'], example['s'])
+    data = bytearray(path.read_bytes())
+    data[8:9] = b'b' if data[8:9] == b'l' else b'l'
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError) as e:
+        MappedProblem(path)
+    assert 'byte order' in str(e.value)
+
+
+def test_shared_by_workers(path):
+    u, s = strip(12)
+    write_problem(path, u, s)
+    with MappedProblem(path) as problem:
+        assert problem.count() == pickle.loads(pickle.dumps(problem)).count()
+        preseeds = [{('v', i)} for i in range(12)]
+        with ProcessPoolExecutor(2) as executor:
+            counts = list(executor.map(MappedProblem.count, [problem] * 12, preseeds))
+        assert [problem.count(preseed=p) for p in preseeds] == counts
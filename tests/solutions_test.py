@@ -0,0 +1,135 @@
+"""Tests for the solutions module."""
+import pickle
+from array import array
+
+import pytest
+from exactcover import (solve, read_solutions, ExactCoverSearchStopped, Solutions,
+                        SolutionReader, SolutionWriter)
+from helpers import strip
+
+
+@pytest.fixture
+def solutions():
+    return Solutions(['a', 'b', 'c', 'd'], [(0, 1), (2,), (), (1, 2, 3)])
+
+
+def test_decodes_on_demand(solutions):
+    assert 4 == len(solutions)
+    assert {'a', 'b'} == solutions[0]
+    assert {'b', 'c', 'd'} == solutions[-1]
+    assert [{'c'}, set()] == solutions[1:3]
+    assert [{'a', 'b'}, {'c'}, set(), {'b', 'c', 'd'}] == list(solutions)
+    assert {'c'} in solutions
+    assert 'Solutions(4 solutions)' == repr(solutions)
+
+
+def test_indices(solutions):
+    assert (1, 2, 3) == solutions.solution_indices(3)
+    assert () == solutions.solution_indices(-2)
+    assert array('I', [0, 1, 2, 1, 2, 3]) == solutions.indices
+    assert array('Q', [0, 2, 3, 3, 6]) == solutions.offsets
+    with pytest.raises(IndexError):
+        solutions[4]
+    with pytest.raises(TypeError):
+        solutions[0] = {'a'}
+
+
+def test_append():
+    solutions = Solutions(['a', 'b'])
+    assert 0 == len(solutions)
+    solutions.append([1])
+    assert [{'b'}] == list(solutions)
+
+
+def test_pickle(solutions):
+    copy = pickle.loads(pickle.dumps(solutions))
+    assert list(solutions) == list(copy)
+    assert solutions.indices == copy.indices
+
+
+@pytest.fixture(params=['binary', 'ndjson'])
+def file_format(request):
+    return request.param
+
+
+def test_sink(file_format, tmp_path):
+    path = tmp_path / 'solutions'
+    u, s = strip(8)
+    expected = solve(u, s, output='indices')
+    with SolutionWriter(path, format=file_format) as writer:
+        assert writer is solve(u, s, sink=writer)
+    assert 34 == writer.written
+    with SolutionReader(path) as reader:
+        assert 34 == len(reader)
+        assert expected == list(reader)
+        assert expected[-1] == reader[-1]
+        assert expected[3:5] == reader[3:5]
+    with SolutionReader(str(path), row_keys=list(s)) as reader:
+        assert solve(u, s) == list(reader)
+        assert expected[2] == reader.solution_indices(2)
+    assert expected == list(read_solutions(path))
+    assert solve(u, s) == list(read_solutions(path, list(s)))
+
+
+def test_compressed(file_format, tmp_path):
+    path = tmp_path / 'solutions.gz'
+    u, s = strip(8)
+    with SolutionWriter(path, format=file_format, compress=True, buffer_size=16) as writer:
+        solve(u, s, sink=writer)
+    assert solve(u, s, output='indices') == list(read_solutions(path))
+    with pytest.raises(ValueError):
+        SolutionReader(path)
+
+
+def test_empty(file_format, tmp_path):
+    path = tmp_path / 'solutions'
+    with SolutionWriter(path, format=file_format) as writer:
+        solve({1}, {}, sink=writer)
+    with SolutionReader(path) as reader:
+        assert 0 == len(reader)
+    assert [] == list(read_solutions(path))
+
+
+def test_unclosed_writer(file_format, tmp_path):
+    path = tmp_path / 'solutions'
+    writer = SolutionWriter(path, format=file_format)
+    for solution in [(0, 1), (2,), ()]:
+        writer.append(solution)
+    writer._file.flush()
+    with SolutionReader(path) as reader:
+        assert [(0, 1), (2,), ()] == list(reader)
+    assert [(0, 1), (2,), ()] == list(read_solutions(path))
+    # A partial solution, as left by a crash in the middle of a write
+    writer._file.write(b'\x05\x00\x00\x00\x01' if writer.binary else b'[1,2')
+    writer._file.flush()
+    with SolutionReader(path) as reader:
+        assert [(0, 1), (2,), ()] == list(reader)
+    assert [(0, 1), (2,), ()] == list(read_solutions(path))
+    writer._file.close()
+    writer.close()
+
+
+def test_writer_options_ignored(tmp_path):
+    path = tmp_path / 'solutions'
+    with SolutionWriter(path, format='xml', compress='yes', buffer_size=0) as writer:
+        writer.append([3, 1])
+    with open(path, 'rb') as f:
+        assert SolutionWriter.MAGIC == f.read(8)
+    with SolutionReader(path) as reader:
+        assert [(3, 1)] == list(reader)
+
+
+def test_stopped_sink(tmp_path):
+    path = tmp_path / 'solutions'
+    u, s = strip(20)
+    with SolutionWriter(path) as writer:
+        with pytest.raises(ExactCoverSearchStopped) as stopped:
+            solve(u, s, sink=writer, max_nodes=1000)
+    assert writer is stopped.value.result
+    with SolutionReader(path) as reader:
+        assert stopped.value.found == len(reader) > 0
+
+
+def test_sink_ignored(example):
+    assert 4 == solve(example['u'], example['s'], count=True, sink=[])
+    assert solve(example['u'], example['s']) == solve(example['u'], example['s'], sink='x')
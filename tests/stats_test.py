@@ -0,0 +1,125 @@
+"""Tests for the stats module."""
+import pytest
+from exactcover import SearchStats, iter_solve, solve
+from helpers import queens
+
+
+def test_counts_are_consistent(engine):
+    u, s, secondary = queens(6)
+    stats = SearchStats()
+    assert 4 == solve(u, s, engine=engine, secondary=secondary, count=True, stats=stats)
+    assert {6: 4} == stats.solutions_by_depth
+    children = sum(factor * nodes for histogram in stats.branching.values()
+                   for factor, nodes in histogram.items())
+    assert stats.nodes - 1 == children
+    inner = sum(sum(histogram.values()) for histogram in stats.branching.values())
+    assert stats.nodes == inner + 4
+    assert set(range(6)) == set(stats.branching)
+    # Every row removed is restored
+    assert 0 == stats.updates % 2
+    assert stats.updates > 2 * (stats.nodes - 1)
+    assert stats.setup_time > 0
+    assert stats.search_time > 0
+
+
+def test_same_counts_for_integer_engines():
+    u, s, secondary = queens(6)
+    counts = []
+    for engine in ('dlx', 'bitset'):
+        stats = SearchStats()
+        solve(u, s, engine=engine, secondary=secondary, stats=stats)
+        counts.append((stats.nodes, stats.branching, stats.updates))
+    assert counts[0] == counts[1]
+
+
+def test_small_problem(example, engine):
+    stats = SearchStats()
+    solve(example['u'], example['s'], engine=engine, stats=stats)
+    assert 9 == stats.nodes
+    # Element 2 (E or F) first, then a dead end below E and element 1 (B or H) below F
+    assert {0: {2: 1}, 1: {0: 1, 2: 1}, 2: {2: 2}} == stats.branching
+    assert {3: 4} == stats.solutions_by_depth
+    assert 44 == stats.updates
+
+
+def test_preseed_is_not_counted(example, engine):
+    stats = SearchStats()
+    solve(example['u'], example['s'], engine=engine, preseed={'B', 'F'}, stats=stats)
+    assert {1: 2} == stats.solutions_by_depth
+    assert {0: {2: 1}} == stats.branching
+    example['s']['Z'] = set()
+    empty = SearchStats()
+    solve(example['u'], example['s'], engine=engine, preseed={'B', 'F', 'Z'}, stats=empty)
+    assert stats.updates == empty.updates
+
+
+def test_stats_accumulate(example, engine):
+    stats = SearchStats()
+    solve(example['u'], example['s'], engine=engine, stats=stats)
+    nodes = stats.nodes
+    solve(example['u'], example['s'], engine=engine, stats=stats)
+    assert 2 * nodes == stats.nodes
+    assert {3: 8} == stats.solutions_by_depth
+    assert 'nodes={}'.format(2 * nodes) in repr(stats)
+
+
+def test_iter_solve(engine):
+    u, s, secondary = queens(6)
+    stats = SearchStats()
+    it = iter_solve(u, s, engine=engine, secondary=secondary, stats=stats)
+    next(it)
+    nodes = stats.nodes
+    assert nodes > 0
+    it.close()
+    assert nodes == stats.nodes
+    assert stats.search_time > 0
+
+
+def test_memo(engine):
+    u, s, secondary = queens(6)
+    plain = SearchStats()
+    solve(u, s, engine=engine, secondary=secondary, count=True, stats=plain)
+    memo = SearchStats()
+    assert 4 == solve(u, s, engine=engine, secondary=secondary, count=True, memo=1000,
+                      stats=memo)
+    assert 0 < memo.nodes <= plain.nodes
+    assert memo.search_time > 0
+
+
+def test_symmetries_and_checkpoint(example, engine, tmp_path):
+    stats = SearchStats()
+    solve(example['u'], example['s'], engine=engine, symmetries=[{1: 1}], stats=stats)
+    assert 4 == sum(stats.solutions_by_depth.values())
+    stats = SearchStats()
+    solve(example['u'], example['s'], engine=engine, checkpoint=tmp_path / 'search.json',
+          stats=stats)
+    assert {3: 4} == stats.solutions_by_depth
+
+
+@pytest.mark.parametrize('engine', ['dlx', 'bitset'])
+def test_decompose(engine):
+    u, s, secondary = queens(6)
+    single = SearchStats()
+    solve(u, s, engine=engine, secondary=secondary, stats=single)
+    # Two copies of the problem, which are searched as two components
+    u = [(k, x) for k in range(2) for x in u]
+    s = {(k, key): {(k, x) for x in value} for k in range(2) for key, value in s.items()}
+    secondary = {(k, x) for k in range(2) for x in secondary}
+    for count in (True, False):
+        stats = SearchStats()
+        solve(u, s, engine=engine, secondary=secondary, count=count, decompose=True, stats=stats)
+        assert 2 * single.nodes == stats.nodes
+        assert {6: 8} == stats.solutions_by_depth
+        assert 2 * single.updates == stats.updates
+        assert stats.setup_time > 0
+    stats = SearchStats()
+    assert 16 == len(list(iter_solve(u, s, engine=engine, secondary=secondary, decompose=True,
+                                     stats=stats)))
+    assert 2 * single.nodes == stats.nodes
+
+
+def test_stats_ignored(example, engine):
+    assert 4 == len(solve(example['u'], example['s'], engine=engine, stats={}))
+    stats = SearchStats()
+    solve(example['u'], example['s'], engine=engine, preseed={'A', 'B'}, stats=stats)
+    assert 0 == stats.nodes
@@ -0,0 +1,114 @@
+"""Tests for the zdd module."""
+import random
+
+import pytest
+from exactcover import solve, solve_zdd, ExactCoverKeyError
+from helpers import strip
+
+
+def fibonacci(n):
+    a, b = 1, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+def test_same_solutions_as_solve(example, engine):
+    zdd = solve_zdd(example['u'], example['s'], engine=engine)
+    assert 4 == zdd.count()
+    result = solve(example['u'], example['s'], engine=engine)
+    if engine == 'dict':
+        assert sorted(map(sorted, result)) == sorted(map(sorted, zdd))
+    else:
+        assert result == list(zdd)
+
+
+def test_random_problems(engine):
+    rng = random.Random(3)
+    for _ in range(100):
+        u = range(8)
+        s = {r: set(rng.sample(u, rng.randint(1, 3))) for r in range(14)}
+        result = solve(u, s, engine=engine)
+        zdd = solve_zdd(u, s, engine=engine)
+        assert len(result) == zdd.count()
+        assert sorted(map(sorted, result)) == sorted(map(sorted, zdd))
+
+
+def test_preseed(example, engine):
+    zdd = solve_zdd(example['u'], example['s'], preseed={'B', 'F'}, engine=engine)
+    assert [{'B', 'D', 'F'}, {'B', 'F', 'G'}] == sorted(zdd, key=sorted)
+
+
+def test_preseed_contradiction(example, engine):
+    zdd = solve_zdd(example['u'], example['s'], preseed={'A', 'B'}, engine=engine)
+    assert 0 == zdd.count()
+    assert [] == list(zdd)
+    assert zdd.sample() is None
+
+
+def test_empty_problem(engine):
+    zdd = solve_zdd(set(), {}, engine=engine)
+    assert 1 == zdd.count()
+    assert [set()] == list(zdd)
+    assert set() == zdd.sample()
+
+
+def test_no_solution(example, engine):
+    example['u'].add(8)
+    assert 0 == solve_zdd(example['u'], example['s'], engine=engine).count()
+
+
+def test_bad_universe_key(example):
+    example['s']['I'] = {9}
+    with pytest.raises(ExactCoverKeyError):
+        solve_zdd(example['u'], example['s'])
+
+
+def test_shares_subproblems(engine):
+    u, s = strip(500)
+    zdd = solve_zdd(u, s, engine=engine)
+    assert fibonacci(500) == zdd.count()
+    assert zdd.node_count < 3 * 500
+
+
+def test_containing(example, engine):
+    zdd = solve_zdd(example['u'], example['s'], engine=engine)
+    with_h = zdd.containing('H')
+    assert 2 == with_h.count()
+    assert [{'D', 'F', 'H'}, {'F', 'G', 'H'}] == sorted(with_h, key=sorted)
+    assert [{'D', 'F', 'H'}] == list(with_h.containing('D'))
+    assert 4 == zdd.containing('F').count()
+    assert 0 == zdd.containing('A').count()
+    assert 0 == zdd.containing('Z').count()
+
+
+def test_containing_large(engine):
+    u, s = strip(200)
+    zdd = solve_zdd(u, s, engine=engine)
+    assert fibonacci(99) * fibonacci(100) == zdd.containing(('v', 99)).count()
+
+
+def test_sample_is_uniform():
+    u, s = strip(5)
+    zdd = solve_zdd(u, s)
+    rng = random.Random(0)
+    counts = {}
+    for _ in range(4000):
+        solution = frozenset(zdd.sample(rng))
+        counts[solution] = counts.get(solution, 0) + 1
+    assert 8 == len(counts)
+    assert all(400 < c < 600 for c in counts.values())
+    assert set(counts) == set(map(frozenset, solve(u, s)))
+
+
+def test_sample_large(engine):
+    u, s = strip(300)
+    solution = solve_zdd(u, s, engine=engine).sample()
+    assert set(u) == set().union(*(s[row] for row in solution))
+
+
+def test_secondary(example, engine):
+    example['u'].add(8)
+    example['s']['G'].add(8)
+    zdd = solve_zdd(example['u'], example['s'], engine=engine, secondary={8})
+    assert 4 == zdd.count()